@@ -0,0 +1,367 @@
+# benchmark.py — Benchmarks for every feature path on synthetic scaled catalogs
+
+# Imports
+import argparse
+import csv
+import inspect
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from config import file_path
+import features.feature1 as feature1
+import features.feature2 as feature2
+import features.feature3 as feature3
+import features.feature4 as feature4
+import features.feature5 as feature5
+import loader
+import title_index
+
+# Catalog sizes, as multiples of the source CSV
+SCALES = [1, 10, 100, 1000]
+DEFAULT_SCALES = [1, 10, 100]
+
+# Timing defaults
+WARMUP = 3
+REPEATS = 30
+LOAD_REPEATS = 3
+
+# A benchmark is a regression when its median is this much slower than the baseline
+THRESHOLD = 0.25
+
+# Seconds a fresh console start (interpreter plus imports) may take
+STARTUP_BUDGET = 0.5
+
+# Seed for catalogs and sampled queries, so runs are comparable
+SEED = 2025
+
+# Search keywords, from very common to rare
+KEYWORDS = ['a', 'the', 'mario', 'star wars', 'call of duty', 'pok', 'zzz']
+
+# Titles as typed by users: exact, prefixes and misspellings
+TYPED_TITLES = ['Tetris', 'mario kart', 'halo', 'grand theft auot', 'wii sprots', 'pokmon', 'super maro bros']
+
+# Title variations used to grow the catalog
+TITLE_SUFFIXES = [
+    ' 2', ' 3', ' II', ' III', ': Remastered', ' HD', ' Deluxe',
+    ' Collection', ': Special Edition', ' Online', ' Legends', ' Origins',
+]
+
+CSV_FIELDS = [
+    'rank', 'name', 'platform', 'year', 'genre', 'publisher',
+    'na_sales', 'eu_sales', 'jp_sales', 'other_sales', 'global_sales',
+]
+
+
+# Write a synthetic catalog
+def make_catalog(source_csv, scale, path, seed=SEED):
+    """
+    Write a CSV `scale` times the size of `source_csv` to `path`.
+    Every source row is kept once; extra rows reuse a real title with a
+    sequel-style suffix, the platform, year, genre and publisher of
+    another real game, and its regional sales scaled by a random factor,
+    so the value distributions stay close to the real catalog.
+    """
+    with open(source_csv, 'r', encoding='utf-8') as file:
+        source = list(csv.DictReader(file))
+
+    rng = random.Random(seed)
+    rank = 0
+
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+
+        for copy in range(scale):
+            for template in source:
+                rank += 1
+                row = dict(template, rank=rank)
+
+                if copy:
+                    profile = rng.choice(source)
+                    factor = rng.lognormvariate(0, 0.5)
+                    row['name'] = template['name'] + rng.choice(TITLE_SUFFIXES)
+
+                    for column in ('platform', 'year', 'genre', 'publisher'):
+                        row[column] = profile[column]
+
+                    for column in ('na_sales', 'eu_sales', 'jp_sales', 'other_sales', 'global_sales'):
+                        if template[column]:
+                            row[column] = f"{float(template[column]) * factor:.2f}"
+
+                writer.writerow(row)
+
+    return path
+
+
+# Catalog for a scale, generated on first use
+def catalog(source_csv, scale, data_dir):
+    """Return the path of the synthetic catalog for `scale`, creating it if needed."""
+    if scale == 1:
+        return source_csv
+
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"games_{scale}x.csv")
+
+    if not os.path.exists(path):
+        print(f"Generating {scale}x catalog...")
+        make_catalog(source_csv, scale, path)
+
+    return path
+
+
+# Time repeated calls
+def measure(func, args_list, warmup, repeats):
+    """
+    Call func(*args) for `warmup` untimed and `repeats` timed rounds,
+    cycling through `args_list`. Returns the timings in seconds and the
+    peak memory allocated by one extra traced call.
+    """
+    for i in range(warmup):
+        func(*args_list[i % len(args_list)])
+
+    timings = []
+
+    for i in range(repeats):
+        args = args_list[i % len(args_list)]
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+
+    try:
+        func(*args_list[0])
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return timings, peak
+
+
+# Latency percentiles and throughput
+def summarize(timings, peak):
+    """Return p50/p95/mean latency in ms, calls per second and peak memory in KiB."""
+    ordered = sorted(timings)
+    mean = statistics.fmean(ordered)
+
+    return {
+        'p50_ms': round(statistics.median(ordered) * 1000, 4),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        'mean_ms': round(mean * 1000, 4),
+        'ops_per_s': round(1 / mean, 2) if mean else None,
+        'peak_kib': round(peak / 1024, 1),
+        'repeats': len(ordered),
+    }
+
+
+# All benchmarks for one catalog
+def bench_scale(csv_path, warmup=WARMUP, repeats=REPEATS, load_repeats=LOAD_REPEATS, seed=SEED):
+    """Benchmark every entry point on one catalog and return the results by name."""
+    results = {}
+
+    def record(name, func, args_list, warmup, repeats):
+        results[name] = summarize(*measure(func, args_list, warmup, repeats))
+        print(f"  {name:<48} p50 {results[name]['p50_ms']:>10.3f} ms  "
+              f"p95 {results[name]['p95_ms']:>10.3f} ms")
+
+    # Parsing the CSV, then reading the snapshot it leaves behind
+    record('loader.init (csv)', loader.init, [(csv_path, False)], 0, load_repeats)
+    loader.init(csv_path)
+    record('loader.init (snapshot)', loader.init, [(csv_path,)], 1, load_repeats)
+
+    games = loader.init(csv_path)
+    rng = random.Random(seed)
+    sample = [games[rng.randrange(len(games))] for _ in range(repeats)]
+
+    # Entry points are timed without the shared result cache, plus one cached run
+    record('feature2.search_games', inspect.unwrap(feature2.search_games),
+           [(games, keyword) for keyword in KEYWORDS], warmup, repeats)
+
+    record('feature2.search_games (cached)', feature2.search_games,
+           [(games, keyword) for keyword in KEYWORDS], warmup, repeats)
+
+    record('title_index.resolve', inspect.unwrap(title_index.resolve),
+           [(games, title) for title in TYPED_TITLES], warmup, repeats)
+
+    record('feature3.rec_game', feature3.rec_game,
+           [(games, game) for game in sample], warmup, repeats)
+
+    leaderboards = inspect.unwrap(feature4.top_five_games_by_region_gui)
+
+    record('feature4.top_five_games_by_region_gui', leaderboards,
+           [(games,)], warmup, repeats)
+
+    record('feature4.top_five_games_by_region_gui (filtered)',
+           lambda data: leaderboards(data, filters={'Genre': 'Puzzle'}),
+           [(games,)], warmup, repeats)
+
+    record('feature5.rollup', inspect.unwrap(feature5.rollup), [
+        (games, ['Genre', 'Year'], None, 'EU_Sales'),
+        (games, ['Platform'], None, 'JP_Sales'),
+        (games, ['Publisher'], {'Platform': 'PS2'}, 'Global_Sales'),
+    ], warmup, repeats)
+
+    titled = [
+        [games[row] for row in title_index.exact(games, game['Title'])]
+        for game in sample
+    ]
+    record('feature1.prepare_for_plot', feature1.prepare_for_plot,
+           [(rows,) for rows in titled], warmup, repeats)
+
+    return len(games), results
+
+
+# Time a fresh console start
+def bench_startup(repeats=LOAD_REPEATS):
+    """
+    Time `import main` in a new interpreter, which is what the console
+    menu and one-shot queries pay before loading data. The GUI and
+    matplotlib must not be part of it.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+
+    for _ in range(repeats):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import main'], cwd=here, check=True)
+        timings.append(time.perf_counter() - started)
+
+    result = summarize(timings, 0)
+    del result['peak_kib']
+
+    print(f"  {'startup (import main)':<48} p50 {result['p50_ms']:>10.3f} ms  "
+          f"p95 {result['p95_ms']:>10.3f} ms")
+    return result
+
+
+# Run the suite
+def run(scales=DEFAULT_SCALES, source_csv=file_path, data_dir='bench_data',
+        warmup=WARMUP, repeats=REPEATS, load_repeats=LOAD_REPEATS):
+    """Benchmark every scale and return the results as a JSON-ready dict."""
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'warmup': warmup,
+            'repeats': repeats,
+            'load_repeats': load_repeats,
+        },
+        'scales': {},
+    }
+
+    print("\n=== Start-up ===")
+    report['startup'] = bench_startup(load_repeats)
+
+    for scale in scales:
+        csv_path = catalog(source_csv, scale, data_dir)
+        print(f"\n=== {scale}x ({csv_path}) ===")
+        rows, results = bench_scale(csv_path, warmup, repeats, load_repeats)
+
+        report['scales'][f"{scale}x"] = {'rows': rows, 'benchmarks': results}
+
+    return report
+
+
+# Compare a run against a baseline
+def compare(report, baseline, threshold=THRESHOLD):
+    """
+    Print the median latency change of every benchmark found in both
+    runs and return the names of those slower than `threshold` allows.
+    """
+    regressions = []
+
+    print(f"\n=== Compared with baseline (threshold +{threshold:.0%}) ===")
+
+    if baseline.get('startup') and report.get('startup'):
+        change = report['startup']['p50_ms'] / baseline['startup']['p50_ms'] - 1
+
+        if change > threshold:
+            regressions.append("startup")
+
+        print(f"  {'':>6} {'startup (import main)':<48} {change:>+8.1%}"
+              f"{'  REGRESSION' if change > threshold else ''}")
+
+    for scale, current in report['scales'].items():
+        previous = baseline.get('scales', {}).get(scale)
+
+        if previous is None:
+            continue
+
+        for name, result in current['benchmarks'].items():
+            before = previous['benchmarks'].get(name)
+
+            if before is None or not before['p50_ms']:
+                continue
+
+            change = result['p50_ms'] / before['p50_ms'] - 1
+            slower = change > threshold
+
+            if slower:
+                regressions.append(f"{scale} {name}")
+
+            print(f"  {scale:>6} {name:<48} {change:>+8.1%}{'  REGRESSION' if slower else ''}")
+
+    return regressions
+
+
+# Command line entry point
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the feature paths on scaled catalogs.")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, choices=SCALES,
+                        help="catalog sizes as multiples of the CSV (1000x takes a long time)")
+    parser.add_argument('--csv', default=file_path, help="source CSV the catalogs are grown from")
+    parser.add_argument('--data-dir', default='bench_data', help="where generated catalogs are kept")
+    parser.add_argument('--warmup', type=int, default=WARMUP, help="untimed calls per benchmark")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="timed calls per benchmark")
+    parser.add_argument('--load-repeats', type=int, default=LOAD_REPEATS, help="timed loads per catalog")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare against results saved by an earlier run")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="allowed median slowdown before failing, e.g. 0.25 for 25%%")
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET,
+                        help="fail when the median console start takes longer (seconds)")
+    args = parser.parse_args()
+
+    if args.repeats < 1 or args.load_repeats < 1:
+        parser.error("--repeats and --load-repeats must be at least 1")
+
+    report = run(args.scales, args.csv, args.data_dir, args.warmup, args.repeats, args.load_repeats)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+        print(f"\nResults written to {args.output}")
+
+    startup = report['startup']['p50_ms'] / 1000
+    over_budget = startup > args.startup_budget
+
+    if over_budget:
+        print(f"\nStart-up took {startup:.3f}s, over the {args.startup_budget}s budget.")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+
+        regressions = compare(report, baseline, args.threshold)
+
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+        print("\nNo regressions.")
+
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# bulk_charts.py — Render sales charts for many titles on a process pool
+
+# Imports
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import json
+import os
+import re
+import time
+
+from charts import ChartRenderer
+from config import file_path
+import features.feature1 as feature1
+import leaderboard
+import loader
+import title_index
+
+# Titles handled by one task
+BATCH_SIZE = 25
+
+# Dataset and renderer owned by each worker process
+_worker_games = None
+_worker_renderer = None
+
+
+# Titles to chart
+def select_titles(games, titles=None, filters=None):
+    """
+    Return the distinct titles to chart, in table order.
+    `titles` is an explicit list; otherwise every title with a row
+    matching `filters` (e.g. {'Publisher': 'Nintendo'}) is used.
+    """
+    column = games.column('Title')
+
+    if titles:
+        rows = [title_index.exact(games, title) for title in titles]
+        return list(dict.fromkeys(column[found[0]] for found in rows if found))
+
+    rows = leaderboard.filter_rows(games, filters)
+
+    return list(dict.fromkeys(column[row] for row in rows))
+
+
+# File name for a chart
+def chart_filename(number, title, fmt):
+    """Return a filesystem-safe, unique file name for a title."""
+    slug = re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-') or 'untitled'
+    return f"{number:05d}-{slug[:60]}.{fmt}"
+
+
+# Worker start-up: one dataset and one matplotlib state per process
+def _init_worker(csv_path):
+    global _worker_games, _worker_renderer
+    _worker_games = loader.init(csv_path)
+    _worker_renderer = ChartRenderer(cache_size=0)
+
+
+# Render one batch of titles
+def render_batch(jobs, output_dir, fmt, style):
+    """
+    Render (number, title) jobs into `output_dir`.
+    Returns one manifest entry per title with its render latency.
+    """
+    entries = []
+
+    for number, title in jobs:
+        started = time.perf_counter()
+        rows = title_index.exact(_worker_games, title)
+        plot_data = feature1.prepare_for_plot([_worker_games[row] for row in rows])
+        image = _worker_renderer.render(plot_data, title, fmt, style)
+
+        filename = chart_filename(number, title, fmt)
+
+        with open(os.path.join(output_dir, filename), 'wb') as file:
+            file.write(image)
+
+        entries.append({
+            'title': title,
+            'file': filename,
+            'platforms': list(plot_data),
+            'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+        })
+
+    return entries
+
+
+# Run the whole batch
+def run(titles=None, filters=None, output_dir='charts', csv_path=file_path,
+        workers=None, fmt='png', style='default', batch_size=BATCH_SIZE):
+    """
+    Render a chart for every selected title on a process pool, write
+    the images and a manifest.json to `output_dir`, and print progress,
+    latency and throughput. Returns the manifest.
+    """
+    games = loader.init(csv_path)
+    selected = select_titles(games, titles, filters)
+    missing = [title for title in titles or [] if not title_index.exact(games, title)]
+
+    for title in missing:
+        print(f"No sales data found for '{title}', skipping.")
+
+    jobs = list(enumerate(selected, start=1))
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    entries = []
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(csv_path,)
+    ) as pool:
+        futures = [
+            pool.submit(render_batch, batch, output_dir, fmt, style)
+            for batch in batches
+        ]
+
+        for future in as_completed(futures):
+            entries.extend(future.result())
+            elapsed = time.perf_counter() - started
+            print(f"{len(entries)}/{len(jobs)} charts ({len(entries) / elapsed:.1f} charts/s)")
+
+    elapsed = time.perf_counter() - started
+    entries.sort(key=lambda entry: entry['file'])
+    latencies = sorted(entry['latency_ms'] for entry in entries)
+
+    manifest = {
+        'csv': csv_path,
+        'format': fmt,
+        'style': style,
+        'filters': filters or {},
+        'count': len(entries),
+        'missing': missing,
+        'elapsed_s': round(elapsed, 3),
+        'charts_per_s': round(len(entries) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'median': latencies[len(latencies) // 2] if latencies else None,
+            'max': latencies[-1] if latencies else None,
+        },
+        'charts': entries,
+    }
+
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+
+    print(
+        f"Rendered {len(entries)} charts to {output_dir} in {elapsed:.1f}s "
+        f"({manifest['charts_per_s']} charts/s, "
+        f"median {manifest['latency_ms']['median']} ms per chart)"
+    )
+    return manifest
+
+
+# Command line entry point
+def main():
+    parser = argparse.ArgumentParser(description="Render regional sales charts for many titles.")
+    parser.add_argument('titles', nargs='*', help="exact game titles to chart")
+    parser.add_argument('--publisher', help="chart every title from this publisher")
+    parser.add_argument('--genre', help="chart every title in this genre")
+    parser.add_argument('--platform', help="chart every title on this platform")
+    parser.add_argument('--out', default='charts', help="output directory")
+    parser.add_argument('--csv', default=file_path, help="CSV file to read")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--format', default='png', choices=['png', 'svg'], help="image format")
+    parser.add_argument('--style', default='default', help="matplotlib style name")
+    args = parser.parse_args()
+
+    filters = {
+        'Publisher': args.publisher,
+        'Genre': args.genre,
+        'Platform': args.platform,
+    }
+
+    if not args.titles and not any(filters.values()):
+        parser.error("give some titles or at least one of --publisher, --genre, --platform")
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    run(
+        titles=args.titles,
+        filters={column: value for column, value in filters.items() if value},
+        output_dir=args.out,
+        csv_path=args.csv,
+        workers=args.workers,
+        fmt=args.format,
+        style=args.style,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# charts.py — Headless chart rendering with figure reuse and an image cache
+
+# Imports
+from collections import OrderedDict
+import io
+import os
+import threading
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib.style
+
+import features.feature1 as feature1
+
+# Rendered images kept in memory
+CACHE_SIZE = 256
+
+# Figures kept around for reuse
+POOL_SIZE = 4
+
+# Chart size in inches, resolution and fixed margins
+# (fixed margins avoid a tight_layout pass per chart)
+FIGURE_SIZE = (12, 6)
+DPI = 100
+MARGINS = {'left': 0.07, 'right': 0.98, 'bottom': 0.1, 'top': 0.92}
+
+
+# Renders sales charts to PNG/SVG bytes on the Agg backend
+class ChartRenderer:
+    """
+    Draws feature1's regional sales chart without opening a window.
+    Figures and their axes are reused from a small pool instead of being
+    created per chart, and rendered images are kept in an LRU cache keyed by the
+    title, the plotted platforms and sales, the style and the format.
+    Safe to share between threads; drawing itself is serialised because
+    matplotlib is not thread-safe.
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE, pool_size=POOL_SIZE):
+        self.cache_size = cache_size
+        self.pool_size = pool_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._cache = OrderedDict()
+        self._figures = []
+        self._lock = threading.Lock()
+        self._draw_lock = threading.Lock()
+
+    # Take a figure and its axes from the pool
+    def _acquire(self):
+        with self._lock:
+            if self._figures:
+                return self._figures.pop()
+
+        figure = Figure(figsize=FIGURE_SIZE, dpi=DPI)
+        FigureCanvasAgg(figure)
+        figure.subplots_adjust(**MARGINS)
+
+        return figure, figure.add_subplot()
+
+    # Give a figure back to the pool
+    def _release(self, pooled):
+        with self._lock:
+            if len(self._figures) < self.pool_size:
+                self._figures.append(pooled)
+
+    # Cache key for a chart
+    @staticmethod
+    def cache_key(plot_data, game_name, style, fmt):
+        platforms = tuple((platform, tuple(sales)) for platform, sales in plot_data.items())
+        return (game_name.strip().lower(), platforms, style, fmt)
+
+    # Render prepared plot data
+    def render(self, plot_data, game_name, fmt='png', style='default'):
+        """
+        Return the chart for `plot_data` as image bytes in format `fmt`
+        ('png' or 'svg'), using the cache when possible.
+        """
+        key = self.cache_key(plot_data, game_name, style, fmt)
+
+        with self._lock:
+            image = self._cache.get(key)
+
+            if image is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return image
+
+            self.misses += 1
+
+        figure, ax = pooled = self._acquire()
+
+        try:
+            with self._draw_lock, matplotlib.style.context(style):
+                ax.clear()
+                feature1.draw_bar_chart(ax, plot_data, game_name)
+
+                buffer = io.BytesIO()
+                figure.savefig(buffer, format=fmt)
+
+            image = buffer.getvalue()
+        finally:
+            self._release(pooled)
+
+        with self._lock:
+            self._cache[key] = image
+
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+        return image
+
+    # Render a chart straight from the dataset
+    def render_title(self, data, game_name, fmt='png', style='default'):
+        """
+        Return chart bytes for `game_name`, or None if it is not found.
+        """
+        found = feature1.chart_data(data, game_name)
+
+        if found is None:
+            return None
+
+        title, plot_data = found
+        return self.render(plot_data, title, fmt, style)
+
+    # Write a chart to disk
+    def save(self, path, data, game_name, style='default'):
+        """
+        Render `game_name` into `path`; the format comes from the file
+        extension. Returns False if the title is not found.
+        """
+        fmt = os.path.splitext(path)[1].lstrip('.').lower() or 'png'
+        image = self.render_title(data, game_name, fmt, style)
+
+        if image is None:
+            return False
+
+        with open(path, 'wb') as file:
+            file.write(image)
+
+        return True
+
+    # Cache statistics
+    def stats(self):
+        """Return cache hit/miss/eviction counts and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._cache),
+            }
@@ -1,3 +1,5 @@
 # config.py
 file_path = "games.csv"
 # You can change the path to your CSV file here if needed.
+# It may also be a glob pattern such as "data/*.csv" or a list of files;
+# a (title, platform) found in several files is taken from the last one.
@@ -0,0 +1,356 @@
+# cube.py — Pre-aggregated sales by platform, genre, publisher and year
+
+# Imports
+from array import array
+
+import profiling
+from query import FIELDS
+from table import CATEGORY_COLUMNS, MISSING_YEAR, SALES_COLUMNS, UNKNOWN
+
+# Dimensions, in the order their members appear in cell keys
+DIMENSIONS = CATEGORY_COLUMNS + ['Year_of_Release']
+
+# Values kept per cell: the number of games, then one sum per sales column
+MEASURES = ['Count'] + SALES_COLUMNS
+WIDTH = len(MEASURES)
+_EMPTY = array('d', [0.0]) * WIDTH
+
+# Shown for the year member of games without a release year
+UNKNOWN_YEAR = 'Unknown'
+
+
+# Dimension named by a column or query field name
+def dimension(name):
+    """Return the column for a dimension name such as 'genre' or 'year'."""
+    column = FIELDS.get(name.strip().lower(), name.strip())
+
+    if column not in DIMENSIONS:
+        raise ValueError(f"unknown dimension '{name}' (use platform, genre, publisher or year)")
+
+    return column
+
+
+# Measure named by a column or query field name
+def measure(name):
+    """Return the measure for a name such as 'eu', 'Global_Sales' or 'count'."""
+    name = name.strip()
+
+    if name.lower() in ('count', 'games'):
+        return 'Count'
+
+    column = FIELDS.get(name.lower(), name)
+
+    if column not in SALES_COLUMNS:
+        raise ValueError(f"unknown measure '{name}' (use na, eu, jp, other, global or count)")
+
+    return column
+
+
+# Short name of a dimension for display
+def label(column):
+    return 'Year' if column == 'Year_of_Release' else column
+
+
+# Totals for one combination of dimensions
+class Cuboid:
+    """
+    Count and sales sums for every combination of members of some
+    dimensions (e.g. genre and year). Cells live in one flat array of
+    WIDTH values each; `slots` maps a key of member codes to its cell.
+    Keys holding a given member are indexed on first use (see slice).
+    """
+
+    __slots__ = ('dims', 'picks', 'slots', 'values', '_free', '_slices')
+
+    def __init__(self, dims):
+        self.dims = dims
+        self.picks = [DIMENSIONS.index(dim) for dim in dims]
+        self.slots = {}
+        self.values = array('d')
+        self._free = []
+        self._slices = {}
+
+    def __len__(self):
+        return len(self.slots)
+
+    # Add (or with sign -1, take away) values to a cell
+    def add(self, key, cell, sign=1):
+        slot = self.slots.get(key)
+
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self.values) // WIDTH
+                self.values.extend(_EMPTY)
+
+            self.slots[key] = slot
+
+            for position, members in self._slices.items():
+                members.setdefault(key[position], set()).add(key)
+
+        start = slot * WIDTH
+        values = self.values
+
+        for offset, value in enumerate(cell):
+            values[start + offset] += sign * value
+
+        # Cells without games are dropped and their slot reused
+        if values[start] <= 0:
+            del self.slots[key]
+            values[start:start + WIDTH] = _EMPTY
+            self._free.append(slot)
+
+            for position, members in self._slices.items():
+                members[key[position]].discard(key)
+
+    # Keys holding one member
+    def slice(self, position, code):
+        """Return the keys whose member at `position` is `code`."""
+        members = self._slices.get(position)
+
+        if members is None:
+            members = {}
+
+            for key in self.slots:
+                members.setdefault(key[position], set()).add(key)
+
+            self._slices[position] = members
+
+        return members.get(code, ())
+
+    # Values of one cell
+    def cell(self, key):
+        """Return the WIDTH values stored for `key`, or None."""
+        slot = self.slots.get(key)
+
+        if slot is None:
+            return None
+
+        return self.values[slot * WIDTH:(slot + 1) * WIDTH]
+
+    # Totals over fewer dimensions
+    def roll_up(self, dims):
+        """Return a new Cuboid for `dims`, a subset of this one's, summed from its cells."""
+        positions = [self.dims.index(dim) for dim in dims]
+        cuboid = Cuboid(dims)
+        slots = cuboid.slots
+        moves = []
+
+        for key, slot in self.slots.items():
+            target_key = tuple(key[position] for position in positions)
+            target = slots.get(target_key)
+
+            if target is None:
+                target = slots[target_key] = len(slots)
+
+            moves.append((target * WIDTH, slot * WIDTH))
+
+        values = cuboid.values = _EMPTY * len(slots)
+        source = self.values
+
+        for offset in range(WIDTH):
+            for target, start in moves:
+                values[target + offset] += source[start + offset]
+
+        return cuboid
+
+
+# Aggregation cube over the table
+class SalesCube:
+    """
+    Count and sales sums of the games grouped by every combination of
+    platform, genre, publisher and year, so aggregate questions read a
+    few precomputed cells instead of scanning the games.
+
+    The finest grouping (all four dimensions) is built in one pass over
+    the table when the cube is first looked up. A coarser grouping is rolled up from the
+    smallest finer one the first time it is asked for, then kept. Row
+    hooks keep every grouping up to date as games are added, changed or
+    removed.
+
+    Roll-up is a query by fewer dimensions; drill-down fixes a member
+    in `where` and groups by another dimension. Either way the answer
+    comes from the cells of one grouping, filtered by `where`.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._codes = [table.codes(col) for col in CATEGORY_COLUMNS]
+        self._cuboids = {}
+
+    # Aggregate a whole table
+    @classmethod
+    def build(cls, table):
+        """Build the finest grouping of `table` in one pass."""
+        cube = cls(table)
+        columns = [codes.codes for codes in cube._codes] + [table.column('Year_of_Release')]
+        base = Cuboid(tuple(DIMENSIONS))
+        slots = base.slots
+        starts = []
+
+        # Every distinct key gets the next cell
+        for key in zip(*columns):
+            slot = slots.get(key)
+
+            if slot is None:
+                slot = slots[key] = len(slots)
+
+            starts.append(slot * WIDTH)
+
+        values = base.values = _EMPTY * len(slots)
+
+        for start in starts:
+            values[start] += 1
+
+        for offset, col in enumerate(SALES_COLUMNS, start=1):
+            for start, value in zip(starts, table.column(col)):
+                values[start + offset] += value
+
+        cube._cuboids[base.dims] = base
+        return cube
+
+    # Grouping for some dimensions, rolled up on first use
+    def cuboid(self, dims):
+        """Return the Cuboid for `dims` (in DIMENSIONS order)."""
+        dims = tuple(dim for dim in DIMENSIONS if dim in dims)
+        cuboid = self._cuboids.get(dims)
+
+        if cuboid is None:
+            parent = min(
+                (found for found in self._cuboids.values() if set(dims) <= set(found.dims)),
+                key=len
+            )
+            cuboid = self._cuboids[dims] = parent.roll_up(dims)
+
+        return cuboid
+
+    # Code of a dimension member
+    def code(self, dim, value):
+        """Return the code of `value` in dimension `dim`, or UNKNOWN."""
+        if dim == 'Year_of_Release':
+            if value is None or str(value).strip().lower() in ('', 'none', UNKNOWN_YEAR.lower()):
+                return MISSING_YEAR
+
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"year must be a number, not '{value}'") from None
+
+        return self._codes[CATEGORY_COLUMNS.index(dim)].lookup(str(value))
+
+    # Display values of a dimension's members, by code
+    def _decoder(self, dim):
+        if dim == 'Year_of_Release':
+            return lambda code: UNKNOWN_YEAR if code == MISSING_YEAR else code
+
+        return self._codes[CATEGORY_COLUMNS.index(dim)].names.__getitem__
+
+    # Grouped totals
+    @profiling.timed('cube.query')
+    def query(self, by=(), where=None, measure_name='Global_Sales', order='total'):
+        """
+        Return one (members, count, total, share) tuple per group of the
+        `by` dimensions among the games matching `where` ({dimension:
+        value}). `total` is the sum of the measure and `share` its part
+        of the sum over all groups. Groups come largest total first, or
+        sorted by member with `order='members'`.
+        Names may be given like query fields ('genre', 'year', 'eu').
+        """
+        by = [dimension(name) for name in by]
+        column = measure(measure_name)
+        offset = MEASURES.index(column)
+        conditions = {}
+
+        for name, value in (where or {}).items():
+            dim = dimension(name)
+            conditions[dim] = self.code(dim, value)
+
+            # A platform, genre or publisher that never occurs matches nothing
+            if dim != 'Year_of_Release' and conditions[dim] == UNKNOWN:
+                return []
+
+        cuboid = self.cuboid(set(by) | set(conditions))
+        tests = [(cuboid.dims.index(dim), code) for dim, code in conditions.items()]
+        slots = cuboid.slots
+        values = cuboid.values
+
+        # Start from the smallest slice; each matching cell is one group
+        if tests:
+            keys = min((cuboid.slice(position, code) for position, code in tests), key=len)
+
+            if len(tests) > 1:
+                keys = [key for key in keys if all(key[position] == code for position, code in tests)]
+        else:
+            keys = slots
+
+        profiling.scanned(len(keys))
+        found = []
+        grand_total = 0.0
+
+        for key in keys:
+            start = slots[key] * WIDTH
+            total = values[start + offset]
+            found.append((key, values[start], total))
+            grand_total += total
+
+        decoders = [(cuboid.dims.index(dim), self._decoder(dim)) for dim in by]
+        results = [
+            (
+                tuple(decode(key[position]) for position, decode in decoders),
+                int(count),
+                total,
+                total / grand_total if grand_total else 0.0,
+            )
+            for key, count, total in found
+        ]
+
+        if order == 'members':
+            results.sort(key=lambda result: [
+                (isinstance(value, str), str(value).lower() if isinstance(value, str) else value)
+                for value in result[0]
+            ])
+        else:
+            results.sort(key=lambda result: -result[2])
+
+        return results
+
+    # Key and values of one game
+    def _cell_of(self, codes, year, sales):
+        key = tuple(codes) + (MISSING_YEAR if year is None else year,)
+        return key, [1] + list(sales)
+
+    def _apply(self, key, cell, sign):
+        for cuboid in list(self._cuboids.values()):
+            cuboid.add(tuple(key[pick] for pick in cuboid.picks), cell, sign)
+
+    def _row_cell(self, table, row):
+        return self._cell_of(
+            (codes.codes[row] for codes in self._codes),
+            table.value(row, 'Year_of_Release'),
+            (table.column(col)[row] for col in SALES_COLUMNS)
+        )
+
+    def _old_cell(self, old):
+        return self._cell_of(
+            (codes.lookup(old[col]) for codes, col in zip(self._codes, CATEGORY_COLUMNS)),
+            old['Year_of_Release'],
+            (old[col] for col in SALES_COLUMNS)
+        )
+
+    # Table hook: a row was appended
+    def on_insert(self, table, row):
+        self._apply(*self._row_cell(table, row), 1)
+
+    # Table hook: a row was changed
+    def on_update(self, table, row, old):
+        new_key, new_cell = self._row_cell(table, row)
+        old_key, old_cell = self._old_cell(old)
+
+        if new_key != old_key or new_cell != old_cell:
+            self._apply(old_key, old_cell, -1)
+            self._apply(new_key, new_cell, 1)
+
+    # Table hook: the last row was removed
+    def on_delete(self, table, row, old):
+        self._apply(*self._old_cell(old), -1)
@@ -1,9 +1,9 @@
 # feature1.py — Sales Visualization System
 
 # Imports
-import csv
-import matplotlib.pyplot as plt
-import sys
+# (matplotlib.pyplot is imported when a chart window is opened)
+import profiling
+import title_index
 
 # Column names
 GAME_COLUMN_HEADER = 'Title'
@@ -13,9 +13,6 @@ PLATFORM_COLUMN_HEADER = 'Platform'
 SALES_COLUMNS_HEADERS = ['NA_Sales', 'EU_Sales', 'JP_Sales', 'Other_Sales', 'Global_Sales']
 REGION_LABELS = ['North America', 'Europe', 'Japan', 'Other', 'Global']
 
-# Data file path
-FILE_PATH = 'games.csv'
-
 # Platform color mapping
 PLATFORM_COLORS = {
     '2600': 'brown',
@@ -59,94 +56,37 @@ PLATFORM_COLORS = {
 }
 
 
-# Load and clean CSV data
-def load_data(file_path):
-    data = []
-
-    try:
-        with open(file_path, mode='r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-
-            for row in reader:
-                name = row.get('name') or row.get('Title')
-                platform = row.get('platform') or row.get('Platform')
-
-                if not name or not platform:
-                    continue
-
-                fixed_row = {
-                    'Title': (row.get('Title') or row.get('name') or '').strip(),
-                    'Platform': (row.get('Platform') or row.get('platform') or '').strip(),
-                    'NA_Sales': float(row.get('NA_Sales') or row.get('na_sales') or 0),
-                    'EU_Sales': float(row.get('EU_Sales') or row.get('eu_sales') or 0),
-                    'JP_Sales': float(row.get('JP_Sales') or row.get('jp_sales') or 0),
-                    'Other_Sales': float(row.get('Other_Sales') or row.get('other_sales') or 0),
-                    'Global_Sales': float(row.get('Global_Sales') or row.get('global_sales') or 0),
-                }
-
-                data.append(fixed_row)
-
-        print(f"Data loaded successfully from {file_path}. Total rows: {len(data)}")
-        return data
-
-    except FileNotFoundError:
-        print(f"Error: CSV file not found at {file_path}.")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Unexpected error while loading CSV: {e}")
-        sys.exit(1)
-
-
 # Filter games by title
+@profiling.timed()
 def filter_game_data(data, game_name):
-    filtered_data = []
-    normalized = game_name.lower().strip()
-
-    for row in data:
-        title_value = row.get('Title') or row.get('name') or ''
-        title = title_value.lower().strip()
-
-        if normalized in title:
-            filtered_data.append(row)
+    # The exact title, else the best prefix, substring or near-miss match
+    titles = title_index.resolve(data, game_name, 1)
 
-    if not filtered_data:
+    if not titles:
         print(f"\nNo sales data found for '{game_name}'.")
         return None
 
-    print(f"Found {len(filtered_data)} entries for '{game_name}'.")
+    filtered_data = [data[row] for row in title_index.exact(data, titles[0])]
+
+    print(f"Found {len(filtered_data)} entries for '{filtered_data[0]['Title']}'.")
     return filtered_data
 
 
 # Prepare data for plotting
+@profiling.timed()
 def prepare_for_plot(filtered_data):
+    # Sales are already floats in the loaded dataset
     plot_data = {}
 
     for row in filtered_data:
-        platform = row.get('Platform') or row.get('platform') or 'Unknown'
-        sales_values = []
-
-        for logical_col in SALES_COLUMNS_HEADERS:
-            upper_key = logical_col
-            lower_key = logical_col.lower()
-
-            try:
-                raw_val = row.get(upper_key)
-                if raw_val is None:
-                    raw_val = row.get(lower_key)
-
-                value = float(raw_val) if raw_val not in (None, '') else 0.0
-                sales_values.append(value)
-
-            except (ValueError, TypeError):
-                sales_values.append(0.0)
-
-        plot_data[platform] = sales_values
+        platform = row[PLATFORM_COLUMN_HEADER] or 'Unknown'
+        plot_data[platform] = [row[col] for col in SALES_COLUMNS_HEADERS]
 
     return plot_data
 
 
-# Create grouped bar chart
-def create_bar_chart(plot_data, game_name):
+# Draw grouped bars onto existing axes
+def draw_bar_chart(ax, plot_data, game_name):
     platforms = list(plot_data.keys())
     num_platforms = len(platforms)
     num_regions = len(SALES_COLUMNS_HEADERS)
@@ -154,8 +94,6 @@ def create_bar_chart(plot_data, game_name):
     x_pos = list(range(num_regions))
     bar_width = 0.8 / num_platforms
 
-    fig, ax = plt.subplots(figsize=(12, 6))
-
     for i, platform in enumerate(platforms):
         sales = plot_data[platform]
         color = PLATFORM_COLORS.get(platform, PLATFORM_COLORS['DEFAULT'])
@@ -177,18 +115,41 @@ def create_bar_chart(plot_data, game_name):
     ax.legend(title='Platform', loc='upper right')
     ax.grid(axis='y', linestyle='--', alpha=0.7)
 
+
+# Create grouped bar chart in a new window
+def create_bar_chart(plot_data, game_name):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+
+    draw_bar_chart(ax, plot_data, game_name)
+
     plt.tight_layout()
     plt.show()
 
 
-# GUI entry point
-def run_gui_feature1(full_data, game_name):
+# Filter and prepare in one step
+@profiling.timed()
+def chart_data(full_data, game_name):
+    """
+    Return (title, plot_data) for the title `game_name` resolves to,
+    or None if nothing matches. `title` is spelled as in the dataset.
+    """
     filtered = filter_game_data(full_data, game_name)
 
     if filtered is None:
+        return None
+
+    return filtered[0][GAME_COLUMN_HEADER], prepare_for_plot(filtered)
+
+
+# GUI entry point
+def run_gui_feature1(full_data, game_name):
+    found = chart_data(full_data, game_name)
+
+    if found is None:
         return False
 
-    plot_data = prepare_for_plot(filtered)
-    create_bar_chart(plot_data, game_name)
+    create_bar_chart(found[1], found[0])
 
     return True
@@ -1,5 +1,16 @@
 # feature2.py — Search & Filtering System
 
+# Imports
+import profiling
+import query
+import query_cache
+import title_index
+import topk
+from table import MISSING_YEAR
+
+# Number of results shown per search
+TOP_N = 5
+
 
 # Print games to CLI
 def print_games(games):
@@ -23,26 +34,69 @@ def print_games(games):
     print("----------------------\n")
 
 
+# Best matches by global sales
+def top_by_sales(database, rows, limit=TOP_N):
+    """
+    Return the `limit` best-selling games among the given row numbers.
+    """
+    return [
+        database[row]
+        for row in topk.top_rows(database, 'Global_Sales', limit, rows)
+    ]
+
+
+# Rows whose column equals a value
+@profiling.timed()
+def rows_matching(database, column, value):
+    """
+    Return row numbers whose `column` (Platform, Genre or Publisher)
+    equals `value`, ignoring case, from the table's dictionary codes.
+    """
+    codes = database.codes(column)
+
+    return codes.rows(codes.lookup(value))
+
+
 # GUI helper search
-def search_games(database, keyword):
+@profiling.timed()
+@query_cache.memoize(lambda keyword, limit=TOP_N: (title_index.normalize(keyword), limit))
+def search_games(database, keyword, limit=TOP_N):
     """
     Search games by name for GUI.
-    Returns top 5 matches by Global Sales.
+    Returns top matches by Global Sales (5 unless `limit` is given).
     """
-    keyword = keyword.strip().lower()
+    rows = title_index.search(database, keyword)
 
-    results = [
-        g for g in database
-        if keyword in g["Title"].strip().lower()
-    ]
+    return top_by_sales(database, rows, limit)
+
+
+# GUI helper composite query
+@profiling.timed()
+def query_games(database, text, limit=TOP_N):
+    """
+    Run a composite query such as
+        name~"mario" AND platform=Wii AND year 2005..2010 AND global>=1.0
+    and return the top matches by Global Sales.
+    Raises ValueError if the query cannot be parsed.
+    """
+    rows = query.select(database, text)
+
+    return top_by_sales(database, rows, limit)
+
+
+# Streaming search
+def search_games_stream(chunks, keyword, limit=TOP_N):
+    """
+    Search games by name over a stream of GameTable chunks.
+    Only the current top matches are kept between chunks.
+    """
+    best = []
 
-    results = sorted(
-        results,
-        key=lambda g: g["Global_Sales"],
-        reverse=True
-    )[:5]
+    for chunk in chunks:
+        found = [dict(g) for g in search_games(chunk, keyword, limit)]
+        best = topk.merge(best, found, key=lambda g: g["Global_Sales"], k=limit)
 
-    return results
+    return best
 
 
 # CLI search by name
@@ -55,75 +109,34 @@ def search_by_name(database, preset_name=None):
     else:
         name = input("Enter game name to search: ").strip().lower()
 
-    results = [
-        g for g in database
-        if name in g['Title'].strip().lower()
-    ]
-
-    top5 = sorted(
-        results,
-        key=lambda g: g['Global_Sales'],
-        reverse=True
-    )[:5]
-
-    print_games(top5)
+    print_games(search_games(database, name))
 
 
 # CLI search by platform
 def search_by_platform(database):
     """Search games by platform in CLI."""
-    platform = input("Enter platform: ").strip().lower()
-
-    results = [
-        g for g in database
-        if g['Platform'].strip().lower() == platform
-    ]
+    platform = input("Enter platform: ")
+    rows = rows_matching(database, 'Platform', platform)
 
-    top5 = sorted(
-        results,
-        key=lambda g: g['Global_Sales'],
-        reverse=True
-    )[:5]
-
-    print_games(top5)
+    print_games(top_by_sales(database, rows))
 
 
 # CLI search by genre
 def search_by_genre(database):
     """Search games by genre in CLI."""
-    genre = input("Enter genre: ").strip().lower()
-
-    results = [
-        g for g in database
-        if g['Genre'].strip().lower() == genre
-    ]
+    genre = input("Enter genre: ")
+    rows = rows_matching(database, 'Genre', genre)
 
-    top5 = sorted(
-        results,
-        key=lambda g: g['Global_Sales'],
-        reverse=True
-    )[:5]
-
-    print_games(top5)
+    print_games(top_by_sales(database, rows))
 
 
 # CLI search by publisher
 def search_by_publisher(database):
     """Search games by publisher in CLI."""
-    publisher = input("Enter publisher: ").strip().lower()
+    publisher = input("Enter publisher: ")
+    rows = rows_matching(database, 'Publisher', publisher)
 
-    results = [
-        g for g in database
-        if g['Publisher'].strip().lower() == publisher
-    ]
-
-    top5 = sorted(
-        results,
-        key=lambda g: g['Global_Sales'],
-        reverse=True
-    )[:5]
-
-    print_games(top5)
+    print_games(top_by_sales(database, rows))
 
 
 # Filter games by year and sales
@@ -141,20 +154,37 @@ def filter_games(database):
         print("Invalid input. Please enter numbers only.")
         return
 
-    results = [
-        g for g in database
-        if g['Year_of_Release'] is not None
-        and start <= g['Year_of_Release'] <= end
-        and g['Global_Sales'] >= min_sales
+    years = database.column('Year_of_Release')
+    sales = database.column('Global_Sales')
+
+    rows = [
+        row for row in range(len(database))
+        if years[row] != MISSING_YEAR
+        and start <= years[row] <= end
+        and sales[row] >= min_sales
     ]
 
-    top5 = sorted(
-        results,
-        key=lambda g: g['Global_Sales'],
-        reverse=True
-    )[:5]
+    print_games(top_by_sales(database, rows))
+
+
+# CLI composite query
+def advanced_query(database):
+    """
+    Combine name, platform, genre, publisher, year and sales
+    conditions in one query.
+    """
+    print("Join conditions with AND, for example:")
+    print(f"  {query.EXAMPLE}")
+    text = input("Query: ")
+
+    try:
+        rows = query.select(database, text)
+    except ValueError as error:
+        print(f"Invalid query: {error}")
+        return
 
-    print_games(top5)
+    print(f"{len(rows)} games matched.")
+    print_games(top_by_sales(database, rows))
 
 
 # CLI menu
@@ -169,6 +199,7 @@ def run(database):
         print("3. Search by Genre")
         print("4. Search by Publisher")
         print("5. Filter by Year + Min Sales")
+        print("6. Advanced Query")
         print("Q. Back to Menu")
 
         choice = input("Choose an option: ").strip().upper()
@@ -183,6 +214,8 @@ def run(database):
             search_by_publisher(database)
         elif choice == "5":
             filter_games(database)
+        elif choice == "6":
+            advanced_query(database)
         elif choice == "Q":
             break
         else:
@@ -1,5 +1,15 @@
 # feature3.py — Game Recommendations
 
+# Imports
+import profiling
+import query_cache
+import scoring
+import title_index
+import topk
+
+# Number of recommendations returned
+TOP_N = 5
+
 
 # Print recommendations to CLI
 def print_rec(games):
@@ -22,51 +32,101 @@ def print_rec(games):
 
 
 # Core recommendation logic
-def rec_game(database, chosen_game):
+@profiling.timed()
+def rec_game(database, chosen_game, limit=TOP_N):
     """
     Compare a chosen game against others and return top recommendations.
+    Genre match scores 2, platform match 1 and global sales within
+    1.0m score 1; games with the chosen title are skipped.
+    """
+    scorer = scoring.scorer_for(database)
+
+    return [
+        (database[row], score)
+        for row, score in scorer.recommend(chosen_game, limit)
+    ]
+
+
+# Recommendations for a game already in the table
+@profiling.timed()
+def rec_row(database, row, limit=TOP_N):
+    """
+    Return recommendations for the game at position `row`.
+    Served from the precomputed lookup when one is loaded and current.
+    """
+    precomputed = database.indexes.get('recommendations')
+
+    if precomputed is not None:
+        recs = precomputed.lookup(row, limit)
+
+        if recs is not None:
+            return [(database[rec], score) for rec, score in recs]
+
+    return rec_game(database, database[row], limit)
+
+
+# Streaming recommendation scoring
+def rec_game_stream(chunks, chosen_game, limit=TOP_N):
     """
-    recommendations = []
+    Score a stream of GameTable chunks against a chosen game in one pass.
+    Only the current top recommendations are kept between chunks.
+    """
+    best = []
+
+    for chunk in chunks:
+        found = [
+            (dict(g), score)
+            for g, score in rec_game(chunk, chosen_game, limit)
+        ]
+        best = topk.merge(best, found, key=lambda x: x[1], k=limit)
+
+    return best
+
+
+# Find the first matching game in a stream
+def find_game_stream(chunks, title):
+    """
+    Return the first game whose title contains `title`, or None.
+    Stops reading as soon as a match is found.
+    """
+    for chunk in chunks:
+        matches = title_index.search(chunk, title)
 
-    for game in database:
-        if game["Title"].strip().lower() == chosen_game["Title"].strip().lower():
-            continue
+        if matches:
+            return dict(chunk[matches[0]])
 
-        score = 0
+    return None
 
-        if game["Genre"].strip().lower() == chosen_game["Genre"].strip().lower():
-            score += 2
 
-        if game["Platform"].strip().lower() == chosen_game["Platform"].strip().lower():
-            score += 1
+# Streaming GUI helper
+def recommend_games_stream(open_stream, title, limit=TOP_N):
+    """
+    Return recommended games for a dataset that is too large to load.
+    `open_stream` is called to start each pass over the data.
+    """
+    chosen = find_game_stream(open_stream(), title)
 
-        if abs(game["Global_Sales"] - chosen_game["Global_Sales"]) <= 1.0:
-            score += 1
+    if chosen is None:
+        return []
 
-        if score > 0:
-            recommendations.append((game, score))
+    recs = rec_game_stream(open_stream(), chosen, limit)
 
-    recommendations.sort(key=lambda x: x[1], reverse=True)
-    return recommendations[:5]
+    return [g for g, score in recs]
 
 
 # GUI helper
-def recommend_games(database, title):
+@profiling.timed()
+@query_cache.memoize(lambda title, limit=TOP_N: (title_index.normalize(title), limit))
+def recommend_games(database, title, limit=TOP_N):
     """
     Return recommended games for GUI.
     """
-    title = title.strip().lower()
+    row = title_index.resolve_row(database, title)
 
-    matches = [
-        g for g in database
-        if title in g["Title"].strip().lower()
-    ]
-
-    if not matches:
+    if row is None:
         return []
 
-    chosen = matches[0]
-    recs = rec_game(database, chosen)
+    recs = rec_row(database, row, limit)
 
     return [g for g, score in recs]
 
@@ -80,16 +140,13 @@ def run(database):
 
     chosen_name = input("Enter game name: ").strip().lower()
 
-    matches = [
-        g for g in database
-        if chosen_name in g["Title"].strip().lower()
-    ]
+    row = title_index.resolve_row(database, chosen_name)
 
-    if not matches:
+    if row is None:
         print("Game not found.")
         return
 
-    chosen_game = matches[0]
-    results = rec_game(database, chosen_game)
+    print(f"Recommendations for {database[row]['Title']}:")
+    results = rec_row(database, row)
 
     print_rec(results)
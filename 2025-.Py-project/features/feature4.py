@@ -1,61 +1,113 @@
 # feature4.py — Top 5 Games by Region Leaderboards
 
+# Imports
+import leaderboard
+import profiling
+import query_cache
+import topk
+
+# Sales column for each region
+REGIONS = {
+    "NA_Sales": "North America",
+    "EU_Sales": "Europe",
+    "JP_Sales": "Japan",
+    "Other_Sales": "Other Regions",
+    "Global_Sales": "Global"
+}
+
+# Number of games per leaderboard
+TOP_N = 5
+
+
+# Top games for one region
+@profiling.timed()
+def top_games(database, key, limit=TOP_N, filters=None):
+    """
+    Return the best-selling games for sales column `key`.
+    `filters` maps columns such as 'Genre' or 'Platform' to required values.
+    Served from the precomputed leaderboards when the table has them.
+    """
+    boards = database.indexes.get('leaderboards')
+
+    if boards is not None:
+        rows = boards.top(database, key, limit, filters)
+    else:
+        candidates = leaderboard.filter_rows(database, filters)
+        rows = topk.top_rows(database, key, limit, candidates)
+
+    return [database[row] for row in rows]
+
 
 # CLI version
-def top_five_games_by_region(database):
+def top_five_games_by_region(database, filters=None):
     """
     Print top 5 games for each region.
     """
-    regions = {
-        "NA_Sales": "North America",
-        "EU_Sales": "Europe",
-        "JP_Sales": "Japan",
-        "Other_Sales": "Other Regions",
-        "Global_Sales": "Global"
-    }
+    print_leaderboards(top_five_games_by_region_gui(database, filters=filters))
 
-    for key, region_name in regions.items():
-        print(f"\n--- TOP 5 GAMES IN {region_name} ---")
 
-        sorted_games = sorted(
-            database,
-            key=lambda g: g[key],
-            reverse=True
-        )
-        top_five = sorted_games[:5]
+# Print leaderboards to CLI
+def print_leaderboards(leaderboards):
+    """
+    Print the games of each region's leaderboard ({region: games}).
+    """
+    for key, region_name in REGIONS.items():
+        print(f"\n--- TOP 5 GAMES IN {region_name} ---")
 
-        for i, game in enumerate(top_five, start=1):
+        for i, game in enumerate(leaderboards[region_name], start=1):
             print(
                 f"{i}. {game['Title']} ({game['Platform']}) — {game[key]} million units"
             )
 
 
 # GUI-friendly version
-def top_five_games_by_region_gui(database):
+@profiling.timed()
+@query_cache.memoize(
+    lambda limit=TOP_N, filters=None: (limit, tuple(sorted(leaderboard.normalize_filters(filters).items()))),
+    copy=lambda boards: {region: list(games) for region, games in boards.items()}
+)
+def top_five_games_by_region_gui(database, limit=TOP_N, filters=None):
     """
-    Return top 5 games per region for GUI.
+    Return top games per region for GUI (5 unless `limit` is given).
     """
-    regions = {
-        "NA_Sales": "North America",
-        "EU_Sales": "Europe",
-        "JP_Sales": "Japan",
-        "Other_Sales": "Other Regions",
-        "Global_Sales": "Global"
-    }
-
     output = {}
 
-    for key, region_name in regions.items():
-        sorted_games = sorted(
-            database,
-            key=lambda g: g[key],
-            reverse=True
-        )
-        output[region_name] = sorted_games[:5]
+    for key, region_name in REGIONS.items():
+        output[region_name] = top_games(database, key, limit, filters)
+
+    return output
+
+
+# Streaming version
+def top_five_games_by_region_stream(chunks, limit=TOP_N, filters=None):
+    """
+    Return top games per region from a stream of GameTable chunks.
+    Only the current leaders per region are kept between chunks.
+    """
+    output = {region_name: [] for region_name in REGIONS.values()}
+
+    for chunk in chunks:
+        chunk_top = top_five_games_by_region_gui(chunk, limit, filters)
+
+        for key, region_name in REGIONS.items():
+            found = [dict(g) for g in chunk_top[region_name]]
+
+            output[region_name] = topk.merge(
+                output[region_name],
+                found,
+                key=lambda g: g[key],
+                k=limit
+            )
 
     return output
 
 
 # CLI entry point
 def run(database):
-    top_five_games_by_region(database)
+    genre = input("Filter by genre (blank for all): ")
+    platform = input("Filter by platform (blank for all): ")
+
+    top_five_games_by_region(
+        database,
+        filters={'Genre': genre, 'Platform': platform}
+    )
@@ -0,0 +1,149 @@
+# feature5.py — Sales Rollups by Platform, Genre, Publisher and Year
+
+# Imports
+import cube
+import profiling
+import query_cache
+
+# Number of groups shown per rollup in the console
+TOP_N = 20
+
+
+# Grouped sales totals
+@profiling.timed()
+@query_cache.memoize(
+    lambda by=(), where=None, measure='Global_Sales', order='total': (
+        tuple(name.strip().lower() for name in by),
+        tuple(sorted((name.strip().lower(), str(value).strip().lower()) for name, value in (where or {}).items())),
+        measure.strip().lower(),
+        order,
+    )
+)
+def rollup(database, by=(), where=None, measure='Global_Sales', order='total'):
+    """
+    Return (members, games, total, share) per group of the `by`
+    dimensions among the games matching `where` (see cube.SalesCube.query).
+    Served from the table's aggregation cube when it has one.
+    """
+    sales_cube = database.indexes.get('cube') or cube.SalesCube.build(database)
+    return sales_cube.query(by, where, measure, order)
+
+
+# Dimension names from text such as "genre, year"
+def parse_dimensions(text):
+    return [cube.dimension(name) for name in text.replace(',', ' ').split()]
+
+
+# Filters from "dimension=value" strings
+def parse_where(items):
+    """Return {dimension: value} for items like 'platform=PS2'."""
+    where = {}
+
+    for item in items or ():
+        name, sep, value = item.partition('=')
+
+        if not sep:
+            raise ValueError(f"use dimension=value, not '{item}'")
+
+        where[cube.dimension(name)] = value.strip()
+
+    return where
+
+
+# Text for one group
+def format_group(result, measure):
+    members, games, total, share = result
+    name = ' / '.join(str(member) for member in members) or 'All games'
+
+    if cube.measure(measure) == 'Count':
+        return f"{name} — {games} games ({share:.1%})"
+
+    return f"{name} — {total:.2f}m ({share:.1%}, {games} games)"
+
+
+# Heading for a rollup
+def describe(by, where, measure):
+    column = cube.measure(measure)
+    text = 'Games' if column == 'Count' else column.replace('_', ' ')
+
+    if by:
+        text += " by " + ", ".join(cube.label(cube.dimension(name)) for name in by)
+
+    if where:
+        text += " where " + ", ".join(
+            f"{cube.label(cube.dimension(name))}={value}" for name, value in where.items()
+        )
+
+    return text
+
+
+# Print a rollup to CLI
+def print_rollup(results, by, where, measure, limit=TOP_N):
+    print(f"\n--- {describe(by, where, measure)} ---")
+
+    if not results:
+        print("No games found.")
+        return
+
+    shown = results if limit is None else results[:limit]
+
+    for i, result in enumerate(shown, start=1):
+        print(f"{i}. {format_group(result, measure)}")
+
+    if len(results) > len(shown):
+        print(f"... and {len(results) - len(shown)} more groups")
+
+
+# CLI entry point
+def run(database):
+    """
+    Console rollups: group the games, drill into a group by another
+    dimension, and roll back up.
+    """
+    try:
+        measure = cube.measure(input("Measure (na, eu, jp, other, global or count) [global]: ") or 'global')
+        by = parse_dimensions(input("Group by (platform, genre, publisher, year) [genre]: ") or 'genre')
+    except ValueError as error:
+        print(f"Invalid rollup: {error}")
+        return
+
+    where = {}
+    trail = []
+
+    while True:
+        results = rollup(database, by, where, measure)
+        print_rollup(results, by, where, measure)
+
+        choice = input("\nGroup number to drill into, U to roll up, Q to go back: ").strip().upper()
+
+        if choice == "Q":
+            break
+
+        if choice == "U":
+            if trail:
+                by, where = trail.pop()
+            else:
+                print("Already at the top level.")
+
+            continue
+
+        if not choice.isdigit() or not 1 <= int(choice) <= min(len(results), TOP_N):
+            print("Invalid choice.")
+            continue
+
+        members = results[int(choice) - 1][0]
+        fixed = dict(where, **dict(zip(by, members)))
+        remaining = [cube.label(dim) for dim in cube.DIMENSIONS if dim not in fixed]
+
+        if not remaining:
+            print("Every dimension is already fixed.")
+            continue
+
+        try:
+            next_by = parse_dimensions(input(f"Break down by ({', '.join(remaining).lower()}): ") or remaining[0])
+        except ValueError as error:
+            print(f"Invalid dimension: {error}")
+            continue
+
+        trail.append((by, where))
+        by, where = next_by, fixed
@@ -2,16 +2,31 @@
 # Import GUI libraries
 import tkinter as tk
 from tkinter import ttk, messagebox
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
 
 # Import feature modules
 import features.feature1 as feature1
 import features.feature2 as feature2
 import features.feature3 as feature3
 import features.feature4 as feature4
+import features.feature5 as feature5
+import cube
 
-# Import data loader and config
+# Import data loader, config and background runner
 from loader import init
 from config import file_path
+from worker import TaskRunner, POLL_MS
+import profiling
+from live_search import IncrementalSearch
+import watcher
+
+# Pause after the last keystroke before searching as you type
+DEBOUNCE_MS = 120
+
+# Choices on the Sales Rollups tab
+ROLLUP_MEASURES = ["Global", "NA", "EU", "JP", "Other", "Count"]
+ROLLUP_DIMENSIONS = ["Platform", "Genre", "Publisher", "Year"]
 
 
 # Main application window
@@ -22,30 +37,131 @@ class GameApp(tk.Tk):
         # Window setup
         self.title("Game Database System")
         self.geometry("950x650")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
-        # Load data
-        self.data = init(file_path)
+        # Data arrives from a background load
+        self.data = None
+        self.live_search = None
+        self.sync = None
+        self.changes = None
+        self.runner = TaskRunner(self)
 
         # Create tab container
         notebook = ttk.Notebook(self)
         notebook.pack(expand=True, fill="both")
 
+        # Status bar
+        self.status = tk.Label(self, text="Loading game data...", anchor="w")
+        self.status.pack(fill="x", side="bottom")
+
         # Create tabs
         self.tab_feature1 = ttk.Frame(notebook)
         self.tab_feature2 = ttk.Frame(notebook)
         self.tab_feature3 = ttk.Frame(notebook)
         self.tab_feature4 = ttk.Frame(notebook)
+        self.tab_feature5 = ttk.Frame(notebook)
 
         notebook.add(self.tab_feature1, text="Sales Analysis")
         notebook.add(self.tab_feature2, text="Search")
         notebook.add(self.tab_feature3, text="Recommendations")
         notebook.add(self.tab_feature4, text="Top 5 Leaderboards")
+        notebook.add(self.tab_feature5, text="Sales Rollups")
 
         # Build tabs
         self.build_feature1_tab()
         self.build_feature2_tab()
         self.build_feature3_tab()
         self.build_feature4_tab()
+        self.build_feature5_tab()
+
+        # Load data without blocking the window
+        self.runner.submit(
+            "load",
+            init,
+            file_path,
+            on_done=self.on_data_loaded,
+            on_error=self.on_load_failed
+        )
+
+    # Background loading
+    def on_data_loaded(self, data):
+        self.data = data
+        self.live_search = IncrementalSearch(data)
+        self.status.config(text=f"Loaded {len(data)} games.")
+
+        # Indexes are built on first use; build them now so the first query is quick
+        self.runner.submit("indexes", data.indexes.build_all, on_done=lambda _: None)
+
+        # Follow later edits of the CSV files
+        self.sync = watcher.DatasetSync(data, file_path)
+        self.after(watcher.POLL_MS, self.watch_files)
+
+    def on_load_failed(self, error):
+        self.status.config(text="Could not load game data.")
+        messagebox.showerror("Load Failed", f"Could not load '{file_path}':\n{error}")
+
+    # File watching: changes are found in the background and applied between queries
+    def watch_files(self):
+        if self.changes is None and not self.runner.is_busy("watch"):
+            self.runner.submit(
+                "watch",
+                self.sync.check,
+                on_done=self.on_files_checked,
+                on_error=self.on_watch_failed
+            )
+
+        self.after(watcher.POLL_MS, self.watch_files)
+
+    def on_files_checked(self, changes):
+        self.changes = changes
+        self.apply_changes()
+
+    def apply_changes(self):
+        if self.changes is None:
+            return
+
+        # Queries still running finish on the data they started with
+        if not self.runner.is_idle():
+            self.after(POLL_MS, self.apply_changes)
+            return
+
+        changes, self.changes = self.changes, None
+
+        if self.sync.apply(changes) and len(changes):
+            self.status.config(text=f"Reloaded changes ({changes}). {len(self.data)} games.")
+
+    def on_watch_failed(self, error):
+        self.status.config(text=f"Could not reload game data: {error}")
+
+    def data_ready(self):
+        """Warn and return False while the data is still loading."""
+        if self.data is None:
+            messagebox.showinfo("Please Wait", "Game data is still loading.")
+            return False
+
+        return True
+
+    # Run a feature call in the background and show a loading state
+    def run_in_background(self, channel, output, func, *args, on_done):
+        output.delete("1.0", tk.END)
+        output.insert(tk.END, "Loading...")
+        self.status.config(text="Working...")
+
+        def finish(result):
+            self.status.config(text=f"Loaded {len(self.data)} games.")
+            output.delete("1.0", tk.END)
+            on_done(result)
+
+        def fail(error):
+            self.status.config(text="Something went wrong.")
+            output.delete("1.0", tk.END)
+            output.insert(tk.END, f"Error: {error}")
+
+        self.runner.submit(channel, func, *args, on_done=finish, on_error=fail)
+
+    def on_close(self):
+        self.runner.shutdown()
+        self.destroy()
 
     # Feature 1: Sales Analysis
     def build_feature1_tab(self):
@@ -61,6 +177,12 @@ class GameApp(tk.Tk):
             command=self.do_feature1
         ).pack(pady=10)
 
+        # One figure is embedded in the tab and redrawn for every chart
+        self.f1_figure = Figure(figsize=(9, 4.5))
+        self.f1_canvas = FigureCanvasTkAgg(self.f1_figure, master=frame)
+        self.f1_canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    @profiling.timed()
     def do_feature1(self):
         game_name = self.f1_entry.get().strip()
 
@@ -68,13 +190,38 @@ class GameApp(tk.Tk):
             messagebox.showwarning("Missing Input", "Enter a game title.")
             return
 
-        success = feature1.run_gui_feature1(self.data, game_name)
+        if not self.data_ready():
+            return
+
+        self.status.config(text="Working...")
+
+        self.runner.submit(
+            "chart",
+            feature1.chart_data,
+            self.data,
+            game_name,
+            on_done=lambda found: self.show_chart(found, game_name)
+        )
 
-        if not success:
+    @profiling.timed()
+    def show_chart(self, found, game_name):
+        if found is None:
+            self.status.config(text=f"Loaded {len(self.data)} games.")
             messagebox.showerror(
                 "Not Found",
                 f"No sales data found for '{game_name}'"
             )
+            return
+
+        # The typed name may be a prefix or a near miss; show the game it matched
+        title, plot_data = found
+        self.status.config(text=f"Showing regional sales for '{title}'.")
+
+        self.f1_figure.clear()
+        ax = self.f1_figure.add_subplot()
+        feature1.draw_bar_chart(ax, plot_data, title)
+        self.f1_figure.tight_layout()
+        self.f1_canvas.draw_idle()
 
     # Feature 2: Search
     def build_feature2_tab(self):
@@ -83,18 +230,93 @@ class GameApp(tk.Tk):
         tk.Label(frame, text="Enter search keyword:").pack(pady=10)
         self.f2_entry = tk.Entry(frame, width=40)
         self.f2_entry.pack()
+        self.f2_entry.bind("<KeyRelease>", self.on_search_typed)
+        self.f2_pending = None
 
         tk.Button(frame, text="Search", command=self.do_search).pack(pady=10)
 
+        tk.Label(frame, text=f"Or combine conditions, e.g. {feature2.query.EXAMPLE}").pack()
+        self.f2_query_entry = tk.Entry(frame, width=70)
+        self.f2_query_entry.pack()
+
+        tk.Button(frame, text="Run Query", command=self.do_query).pack(pady=10)
+
         self.f2_output = tk.Text(frame, height=22)
         self.f2_output.pack(fill="both", expand=True)
 
+    # Search as you type, once typing pauses
+    def on_search_typed(self, event):
+        if self.f2_pending is not None:
+            self.after_cancel(self.f2_pending)
+
+        self.f2_pending = self.after(DEBOUNCE_MS, self.do_live_search)
+
+    @profiling.timed()
+    def do_live_search(self):
+        self.f2_pending = None
+
+        # Before the data is loaded only the Search button reports it
+        if self.live_search is None:
+            return
+
+        keyword = self.f2_entry.get().strip()
+
+        # Narrowed from an earlier keystroke's rows, so quick enough to run here
+        rows = self.live_search.quick_rows(keyword) if keyword else ()
+
+        if rows is not None:
+            # An older search still running must not replace these results
+            self.runner.cancel("search")
+            self.status.config(text=f"Loaded {len(self.data)} games.")
+            self.f2_output.delete("1.0", tk.END)
+
+            if keyword:
+                self.show_search_results(feature2.top_by_sales(self.data, rows))
+
+            return
+
+        # A first scan, or one that needs the title index built, runs in the background
+        self.run_in_background(
+            "search",
+            self.f2_output,
+            lambda: feature2.top_by_sales(self.data, self.live_search.rows(keyword)),
+            on_done=self.show_search_results
+        )
+
+    @profiling.timed()
     def do_search(self):
+        if not self.data_ready():
+            return
+
         keyword = self.f2_entry.get().strip()
-        results = feature2.search_games(self.data, keyword)
 
-        self.f2_output.delete("1.0", tk.END)
+        self.run_in_background(
+            "search",
+            self.f2_output,
+            feature2.search_games,
+            self.data,
+            keyword,
+            on_done=self.show_search_results
+        )
+
+    @profiling.timed()
+    def do_query(self):
+        if not self.data_ready():
+            return
+
+        text = self.f2_query_entry.get()
+
+        self.run_in_background(
+            "search",
+            self.f2_output,
+            feature2.query_games,
+            self.data,
+            text,
+            on_done=self.show_search_results
+        )
 
+    @profiling.timed()
+    def show_search_results(self, results):
         if not results:
             self.f2_output.insert(tk.END, "No results found.")
             return
@@ -122,12 +344,24 @@ class GameApp(tk.Tk):
         self.f3_output = tk.Text(frame, height=22)
         self.f3_output.pack(fill="both", expand=True)
 
+    @profiling.timed()
     def do_feature3(self):
-        title = self.f3_entry.get().strip()
-        results = feature3.recommend_games(self.data, title)
+        if not self.data_ready():
+            return
 
-        self.f3_output.delete("1.0", tk.END)
+        title = self.f3_entry.get().strip()
 
+        self.run_in_background(
+            "recommend",
+            self.f3_output,
+            feature3.recommend_games,
+            self.data,
+            title,
+            on_done=self.show_recommendations
+        )
+
+    @profiling.timed()
+    def show_recommendations(self, results):
         if not results:
             self.f3_output.insert(
                 tk.END,
@@ -151,6 +385,14 @@ class GameApp(tk.Tk):
             font=("Arial", 16)
         ).pack(pady=10)
 
+        tk.Label(frame, text="Genre filter (optional):").pack()
+        self.f4_genre_entry = tk.Entry(frame, width=30)
+        self.f4_genre_entry.pack()
+
+        tk.Label(frame, text="Platform filter (optional):").pack()
+        self.f4_platform_entry = tk.Entry(frame, width=30)
+        self.f4_platform_entry.pack()
+
         tk.Button(
             frame,
             text="Show Leaderboards",
@@ -160,10 +402,25 @@ class GameApp(tk.Tk):
         self.f4_output = tk.Text(frame, height=25)
         self.f4_output.pack(fill="both", expand=True)
 
+    @profiling.timed()
     def do_feature4(self):
-        results = feature4.top_five_games_by_region_gui(self.data)
-        self.f4_output.delete("1.0", tk.END)
+        if not self.data_ready():
+            return
+
+        filters = {
+            'Genre': self.f4_genre_entry.get(),
+            'Platform': self.f4_platform_entry.get(),
+        }
+
+        self.run_in_background(
+            "leaderboards",
+            self.f4_output,
+            lambda: feature4.top_five_games_by_region_gui(self.data, filters=filters),
+            on_done=self.show_leaderboards
+        )
 
+    @profiling.timed()
+    def show_leaderboards(self, results):
         for region, games in results.items():
             self.f4_output.insert(
                 tk.END,
@@ -175,3 +432,134 @@ class GameApp(tk.Tk):
                     tk.END,
                     f"{i}. {g['Title']} ({g['Platform']}) — {g['Global_Sales']}m\n"
                 )
+
+    # Feature 5: Sales Rollups
+    def build_feature5_tab(self):
+        frame = self.tab_feature5
+
+        tk.Label(
+            frame,
+            text="Sales Rollups",
+            font=("Arial", 16)
+        ).pack(pady=10)
+
+        controls = tk.Frame(frame)
+        controls.pack()
+
+        tk.Label(controls, text="Measure:").grid(row=0, column=0, padx=4)
+        self.f5_measure = ttk.Combobox(controls, values=ROLLUP_MEASURES, state="readonly", width=8)
+        self.f5_measure.set("Global")
+        self.f5_measure.grid(row=0, column=1)
+
+        tk.Label(controls, text="Group by:").grid(row=0, column=2, padx=4)
+        self.f5_by = ttk.Combobox(controls, values=ROLLUP_DIMENSIONS, state="readonly", width=10)
+        self.f5_by.set("Genre")
+        self.f5_by.grid(row=0, column=3)
+
+        tk.Label(controls, text="then by:").grid(row=0, column=4, padx=4)
+        self.f5_then = ttk.Combobox(controls, values=[""] + ROLLUP_DIMENSIONS, state="readonly", width=10)
+        self.f5_then.grid(row=0, column=5)
+
+        tk.Label(controls, text="Drill down by:").grid(row=0, column=6, padx=4)
+        self.f5_drill = ttk.Combobox(controls, values=ROLLUP_DIMENSIONS, state="readonly", width=10)
+        self.f5_drill.set("Platform")
+        self.f5_drill.grid(row=0, column=7)
+
+        buttons = tk.Frame(frame)
+        buttons.pack(pady=10)
+
+        tk.Button(buttons, text="Show Totals", command=self.do_feature5).pack(side="left", padx=5)
+        tk.Button(buttons, text="Roll Up", command=self.do_roll_up).pack(side="left", padx=5)
+
+        self.f5_heading = tk.Label(frame, text="Double-click a group to drill down by the chosen dimension.")
+        self.f5_heading.pack()
+
+        self.f5_tree = ttk.Treeview(frame, columns=("group", "games", "total", "share"), show="headings")
+
+        for column, heading, width in (
+            ("group", "Group", 420), ("games", "Games", 80), ("total", "Total", 100), ("share", "Share", 80)
+        ):
+            self.f5_tree.heading(column, text=heading)
+            self.f5_tree.column(column, width=width, anchor="w" if column == "group" else "e")
+
+        self.f5_tree.pack(fill="both", expand=True)
+        self.f5_tree.bind("<Double-1>", self.on_rollup_drill)
+
+        # Current level and the levels above it, for rolling up
+        self.f5_level = None
+        self.f5_results = []
+        self.f5_trail = []
+
+    @profiling.timed()
+    def do_feature5(self):
+        if not self.data_ready():
+            return
+
+        by = [self.f5_by.get()]
+
+        if self.f5_then.get() and self.f5_then.get() != by[0]:
+            by.append(self.f5_then.get())
+
+        self.f5_trail = []
+        self.show_rollup(by, {})
+
+    def on_rollup_drill(self, event):
+        item = self.f5_tree.identify_row(event.y)
+
+        if not item or self.f5_level is None:
+            return
+
+        by, where = self.f5_level
+        members = self.f5_results[int(item)][0]
+        fixed = dict(where, **dict(zip(by, members)))
+        dim = self.f5_drill.get()
+
+        if any(cube.dimension(name) == cube.dimension(dim) for name in fixed):
+            messagebox.showinfo("Drill Down", f"{dim} is already fixed here; choose another dimension.")
+            return
+
+        self.f5_trail.append(self.f5_level)
+        self.show_rollup([dim], fixed)
+
+    def do_roll_up(self):
+        if not self.f5_trail:
+            messagebox.showinfo("Roll Up", "Already at the top level.")
+            return
+
+        self.show_rollup(*self.f5_trail.pop())
+
+    # Totals may need the cube built or a grouping rolled up, so they run in the background
+    @profiling.timed()
+    def show_rollup(self, by, where):
+        measure = self.f5_measure.get()
+        self.status.config(text="Working...")
+
+        def fail(error):
+            self.status.config(text=f"Could not total the sales: {error}")
+
+        self.runner.submit(
+            "rollup",
+            feature5.rollup,
+            self.data,
+            by,
+            where,
+            measure,
+            on_done=lambda results: self.fill_rollup(by, where, measure, results),
+            on_error=fail
+        )
+
+    @profiling.timed()
+    def fill_rollup(self, by, where, measure, results):
+        self.status.config(text=f"Loaded {len(self.data)} games.")
+        self.f5_level = (by, where)
+        self.f5_results = results
+        self.f5_heading.config(text=feature5.describe(by, where, measure))
+        self.f5_tree.delete(*self.f5_tree.get_children())
+
+        for i, (members, games, total, share) in enumerate(results):
+            self.f5_tree.insert("", tk.END, iid=str(i), values=(
+                " / ".join(str(member) for member in members) or "All games",
+                games,
+                games if measure == "Count" else f"{total:.2f}m",
+                f"{share:.1%}",
+            ))
@@ -0,0 +1,237 @@
+# leaderboard.py — Precomputed sales rankings
+
+# Imports
+from array import array
+from bisect import bisect_left, bisect_right
+
+import profiling
+from table import SALES_COLUMNS, UNKNOWN, normalize
+import topk
+
+
+# Normalise filter values once per query
+def normalize_filters(filters):
+    """
+    Return `filters` ({column: value}) with blank values dropped and
+    the rest stripped and lower-cased.
+    """
+    if not filters:
+        return {}
+
+    return {
+        column: normalize(value)
+        for column, value in filters.items()
+        if value and value.strip()
+    }
+
+
+# Turn filters into integer code checks
+def encode_filters(table, filters):
+    """
+    Return the non-blank `filters` ({column: value} over Platform,
+    Genre or Publisher) as (codes, code) pairs: the column's per-row
+    code array and the code a matching row must hold.
+    """
+    encoded = []
+
+    for column, value in normalize_filters(filters).items():
+        codes = table.codes(column)
+        encoded.append((codes.codes, codes.lookup(value)))
+
+    return encoded
+
+
+# Check a row against encoded filters
+def matches(row, encoded):
+    """Return True if row `row` satisfies every encoded filter."""
+    for codes, code in encoded:
+        if codes[row] != code:
+            return False
+
+    return True
+
+
+# Rows passing the filters
+def filter_rows(table, filters):
+    """
+    Return every row number of `table` that satisfies `filters`.
+    Starts from the rows of the rarest filter value and checks the
+    remaining filters by code.
+    """
+    filters = normalize_filters(filters)
+
+    if not filters:
+        return range(len(table))
+
+    buckets = [
+        table.codes(column).rows(table.codes(column).lookup(value))
+        for column, value in filters.items()
+    ]
+    encoded = encode_filters(table, filters)
+    smallest = min(buckets, key=len)
+    profiling.scanned(len(smallest))
+
+    return [row for row in smallest if matches(row, encoded)]
+
+
+# Ranking of one sales column
+class RankIndex:
+    """
+    Row numbers of a table kept sorted by one sales column, highest first.
+    Equal sales keep table order, the same as a stable sort.
+    The sorted values are stored alongside so rows can be found and moved
+    with a binary search instead of a rebuild.
+    """
+
+    def __init__(self, column):
+        self.column = column
+        self._negated = array('d')
+        self._rows = array('I')
+
+    # Rank every row of a table
+    @classmethod
+    def build(cls, table, column):
+        """Rank all rows of `table` by `column`."""
+        index = cls(column)
+        values = table.column(column)
+        order = sorted(range(len(values)), key=lambda row: -values[row])
+
+        index._rows = array('I', order)
+        index._negated = array('d', (-values[row] for row in order))
+        return index
+
+    # Position of a (value, row) pair in the ranking
+    def _position(self, value, row):
+        negated = -value
+        low = bisect_left(self._negated, negated)
+        high = bisect_right(self._negated, negated, low)
+
+        return bisect_left(self._rows, row, low, high)
+
+    # Add a row to the ranking
+    def insert(self, row, value):
+        """Place `row` with sales `value` at its ranked position."""
+        position = self._position(value, row)
+        self._negated.insert(position, -value)
+        self._rows.insert(position, row)
+
+    # Take a row out of the ranking
+    def remove(self, row, value):
+        """Remove `row`, which was ranked with sales `value`."""
+        position = self._position(value, row)
+
+        if position >= len(self._rows) or self._rows[position] != row:
+            raise KeyError(row)
+
+        del self._negated[position]
+        del self._rows[position]
+
+    # Iterate rows from best to worst
+    def ranked(self):
+        """Return the row numbers in rank order."""
+        return self._rows
+
+    # Rows within a value range
+    def rows_between(self, low, high):
+        """Return the rows whose value lies in [low, high], best first."""
+        start = bisect_left(self._negated, -high)
+        end = bisect_right(self._negated, -low)
+
+        return self._rows[start:end]
+
+    # Number of rows within a value range
+    def count_between(self, low, high):
+        """Return how many rows have a value in [low, high]."""
+        start = bisect_left(self._negated, -high)
+        end = bisect_right(self._negated, -low)
+
+        return max(end - start, 0)
+
+    # Best rows, optionally filtered
+    def top(self, table, n, filters=None):
+        """
+        Return the row numbers of the `n` best rows.
+        With filters, the rows of the rarest filter value are ranked
+        directly when that is cheaper than walking the ranking until
+        `n` rows match.
+        """
+        filters = normalize_filters(filters)
+
+        if not filters:
+            return self._rows[:n].tolist()
+
+        encoded = encode_filters(table, filters)
+
+        # A value that never occurs matches no row
+        if any(code == UNKNOWN for codes, code in encoded):
+            return []
+
+        smallest = min(
+            (table.codes(column).rows(code) for column, (codes, code) in zip(filters, encoded)),
+            key=len
+        )
+
+        # Walking the ranking checks about n * len(table) / len(smallest) rows
+        if len(smallest) * len(smallest) <= n * len(table):
+            profiling.scanned(len(smallest))
+            rows = [row for row in smallest if matches(row, encoded)]
+
+            # Buckets are sorted, so ties keep table order as in the ranking
+            return topk.top_rows(table, self.column, n, rows)
+
+        found = []
+
+        for row in self._rows:
+            if len(found) >= n:
+                break
+
+            if matches(row, encoded):
+                found.append(row)
+
+        return found
+
+
+# Rankings for every sales column
+class Leaderboards:
+    """
+    Keeps one RankIndex per sales column of a table and updates them
+    as rows are added or changed.
+    """
+
+    def __init__(self, ranks):
+        self._ranks = ranks
+
+    # Rank a whole table
+    @classmethod
+    def build(cls, table):
+        """Build rankings for all sales columns of `table`."""
+        return cls({column: RankIndex.build(table, column) for column in SALES_COLUMNS})
+
+    # Ranking for one column
+    def rank(self, column):
+        """Return the RankIndex for a sales column."""
+        return self._ranks[column]
+
+    # Best rows for one column
+    def top(self, table, column, n, filters=None):
+        """Return the row numbers of the `n` best rows by `column`."""
+        return self._ranks[column].top(table, n, filters)
+
+    # Table hook: a row was appended
+    def on_insert(self, table, row):
+        for column, rank in self._ranks.items():
+            rank.insert(row, table.value(row, column))
+
+    # Table hook: a row was changed
+    def on_update(self, table, row, old):
+        for column, rank in self._ranks.items():
+            new_value = table.value(row, column)
+
+            if new_value != old[column]:
+                rank.remove(row, old[column])
+                rank.insert(row, new_value)
+
+    # Table hook: the last row was removed
+    def on_delete(self, table, row, old):
+        for column, rank in self._ranks.items():
+            rank.remove(row, old[column])
@@ -0,0 +1,107 @@
+# live_search.py — Incremental title search for search-as-you-type
+
+# Imports
+from array import array
+from collections import OrderedDict
+import threading
+
+import title_index
+
+# Recent query results kept for backspacing and narrowing
+CACHE_SIZE = 32
+
+
+# Search state that follows a query as it is typed
+class IncrementalSearch:
+    """
+    Answers title searches for a query that changes one keystroke at a time.
+    If an earlier query is contained in the new one, every match of the new
+    query is already among the earlier matches, so only those rows are
+    re-checked instead of the whole table. Recent results are kept in a
+    small LRU cache so backspacing is a lookup.
+
+    A first scan can run on a worker thread with rows() while the Tk
+    thread only calls quick_rows(), which never waits for it.
+    """
+
+    def __init__(self, database, cache_size=CACHE_SIZE):
+        self.database = database
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._version = getattr(database, 'version', None)
+        self._lock = threading.Lock()
+
+    # Forget cached results (e.g. after the data changed)
+    def clear(self):
+        self._cache.clear()
+
+    # Normalised titles of every row
+    def _titles(self):
+        index = self.database.indexes.get('title')
+
+        if index is not None:
+            return index.titles
+
+        return [title_index.normalize(title) for title in self.database.column('Title')]
+
+    # Matching rows for a query
+    def rows(self, query):
+        """Return the rows, in table order, whose title contains `query`."""
+        with self._lock:
+            return self._rows(title_index.normalize(query), quick=False)
+
+    # Matching rows, only when no scan is needed
+    def quick_rows(self, query):
+        """
+        Return the rows for `query` when they are cached or can be
+        narrowed from a cached query using the built title index, or
+        None when that would mean a scan, building the title index or
+        waiting for a search running on another thread.
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+
+        try:
+            return self._rows(title_index.normalize(query), quick=True)
+        finally:
+            self._lock.release()
+
+    def _rows(self, query, quick):
+        # Cached rows describe older data once the table changes
+        version = getattr(self.database, 'version', None)
+
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+        cached = self._cache.get(query)
+
+        if cached is not None:
+            self._cache.move_to_end(query)
+            return cached
+
+        # Narrow the longest cached query that the new one contains
+        base = max(
+            (previous for previous in self._cache if previous in query),
+            key=len,
+            default=None
+        )
+
+        if quick and (base is None or not self.database.indexes.is_built('title')):
+            return None
+
+        if base is None:
+            rows = array('I', title_index.search(self.database, query))
+        else:
+            titles = self._titles()
+            rows = array('I', (
+                row for row in self._cache[base]
+                if query in titles[row]
+            ))
+
+        self._cache[query] = rows
+
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return rows
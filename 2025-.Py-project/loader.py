@@ -1,43 +1,467 @@
 # Import CSV library
 import csv
 
+# Import file, process pool and storage helpers
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import errno
+import functools
+import glob
+import io
+import os
+import sys
+
+# Import columnar storage, snapshot cache and indexes
+from table import GameTable, LoadSource, COLUMNS, SALES_COLUMNS, STRING_COLUMNS, normalize
+from title_index import TitleIndex
+from leaderboard import Leaderboards
+from scoring import ScoringIndex
+from query import QueryIndex
+from cube import SalesCube
+import profiling
+import rec_store
+import snapshot
+
 
 # Load game data from a CSV file
-def init(file_path):
+@profiling.timed('loader.init')
+def init(file_path, use_snapshot=True, workers=None):
     """
     Loads and processes game data from the CSV file.
-    Returns a list of game dictionaries.
+    Returns a GameTable holding every game column by column.
+
+    `file_path` may also be a glob pattern or a list of paths and
+    patterns; the files are then parsed in parallel and merged (see
+    load_files). Large single files are parsed in parallel too.
+
+    When `use_snapshot` is set, a binary snapshot next to a single CSV
+    is used instead of parsing, and rewritten whenever the CSV changes.
+
+    The table's `source` records which file lines became its rows, so
+    a watcher can follow later edits without parsing everything again.
     """
-    # Store all games
-    games = []
+    paths = resolve_paths(file_path)
+    single = paths[0] if len(paths) == 1 else None
+
+    # Taken before reading, so edits made while loading are noticed later
+    stamp = file_stamp(paths)
+
+    with profiling.section('loader.snapshot_load'):
+        games = snapshot.load(single) if use_snapshot and single else None
+
+    if games is None:
+        report = LoadReport()
+        fingerprint = snapshot.fingerprint(single) if use_snapshot and single else None
+
+        with profiling.section('loader.parse_csv'):
+            games = load_files(paths, workers, report)
+
+        games.source = LoadSource(report.dropped)
+
+        if fingerprint is not None:
+            with profiling.section('loader.snapshot_save'):
+                snapshot.save(games, single, fingerprint)
+
+    if games.source is not None:
+        games.source.stamp = stamp
+        games.source.version = games.version
+
+    build_indexes(games)
+
+    # Use precomputed recommendations if the batch job has been run
+    if single:
+        with profiling.section('loader.recs_load'):
+            recommendations = rec_store.load(single, len(games))
+
+        if recommendations is not None:
+            games.indexes['recommendations'] = recommendations
+
+    # Return all games
+    return games
+
+
+# Register the indexes shared by the features
+def build_indexes(games):
+    """
+    Attaches the derived indexes used by the features to `games`.
+    Each one is built the first time a feature looks it up (see
+    table.TableIndexes), so loading, and above all a warm start from
+    the snapshot, does not pay for indexes that are never used.
+    """
+    builders = {
+        'title': TitleIndex.build,
+        'leaderboards': Leaderboards.build,
+        'scoring': ScoringIndex.build,
+        'query': QueryIndex.build,
+        'cube': SalesCube.build,
+    }
+
+    for name, build in builders.items():
+        games.indexes.register(name, functools.partial(_build_index, name, build))
+
+
+# Build one index, timed under its own profiling section
+def _build_index(name, build, games):
+    with profiling.section(f'loader.index.{name}'):
+        return build(games)
+
+
+# Default number of rows per streamed chunk
+CHUNK_SIZE = 10000
+
+
+# Turn one CSV row into a game record
+def parse_row(row):
+    """
+    Converts a raw CSV row into a game dictionary.
+    Raises ValueError when a numeric field cannot be parsed.
+    """
+    return {
+        'Title': row['name'].strip(),
+        'Platform': row['platform'].strip(),
+        'Year_of_Release': int(float(row['year'])) if row['year'] else None,
+        'Genre': row['genre'].strip(),
+        'Publisher': row['publisher'].strip(),
+        'NA_Sales': float(row['na_sales']) if row['na_sales'] else 0.0,
+        'EU_Sales': float(row['eu_sales']) if row['eu_sales'] else 0.0,
+        'JP_Sales': float(row['jp_sales']) if row['jp_sales'] else 0.0,
+        'Other_Sales': float(row['other_sales']) if row['other_sales'] else 0.0,
+        'Global_Sales': float(row['global_sales']) if row['global_sales'] else 0.0,
+    }
+
+
+# Count rows read and rows dropped
+class LoadReport:
+    """
+    Tracks how many rows were loaded and how many were skipped
+    because they could not be parsed.
+    """
+
+    def __init__(self):
+        self.loaded = 0
+        self.skipped = 0
+        self.replaced = 0
+
+        # Numbers of the data lines not loaded, by file (see table.LoadSource)
+        self.dropped = {}
+
+    def __str__(self):
+        text = f"{self.loaded} games loaded, {self.skipped} invalid rows skipped"
+
+        if self.replaced:
+            text += f", {self.replaced} rows replaced by later files"
+
+        return text
+
+
+# Parse the CSV file into a table
+def load_csv(file_path, report=None):
+    """
+    Parses every row of the CSV file into a GameTable.
+    """
+    if report is None:
+        report = LoadReport()
+
+    # Without a chunk size the whole file arrives as one table
+    games = next(stream(file_path, chunk_size=None, report=report))
+    games.skipped_rows = report.skipped
+    profiling.scanned(report.loaded + report.skipped)
+    return games
+
+
+# Stream the CSV file in chunks
+def stream(file_path, chunk_size=CHUNK_SIZE, report=None):
+    """
+    Yields the CSV file as a series of GameTable chunks of at most
+    `chunk_size` rows, so memory stays bounded by the chunk size.
+    A `chunk_size` of None yields the whole file as one chunk.
+    Invalid rows are skipped and counted in `report`.
+    """
+    if report is None:
+        report = LoadReport()
+
+    chunk = GameTable()
+    dropped = report.dropped.setdefault(file_path, [])
 
     # Open the CSV file
-    with open(file_path, 'r', encoding="utf-8") as file:
+    with open(file_path, 'r', encoding="utf-8", newline='') as file:
         reader = csv.DictReader(file)
 
         # Process each row
-        for row in reader:
+        for number, row in enumerate(reader):
             try:
                 # Create a game record
-                game = {
-                    'Title': row['name'].strip(),
-                    'Platform': row['platform'].strip(),
-                    'Year_of_Release': int(float(row['year'])) if row['year'] else None,
-                    'Genre': row['genre'].strip(),
-                    'Publisher': row['publisher'].strip(),
-                    'NA_Sales': float(row['na_sales']) if row['na_sales'] else 0.0,
-                    'EU_Sales': float(row['eu_sales']) if row['eu_sales'] else 0.0,
-                    'JP_Sales': float(row['jp_sales']) if row['jp_sales'] else 0.0,
-                    'Other_Sales': float(row['other_sales']) if row['other_sales'] else 0.0,
-                    'Global_Sales': float(row['global_sales']) if row['global_sales'] else 0.0,
-                }
-
-                # Add game to list
-                games.append(game)
-
+                game = parse_row(row)
             except ValueError:
                 # Skip invalid rows
+                report.skipped += 1
+                dropped.append(number)
                 continue
 
-    # Return all games
+            # Add game to the current chunk
+            chunk.append(game)
+            report.loaded += 1
+
+            if chunk_size is not None and len(chunk) >= chunk_size:
+                yield chunk
+                chunk = GameTable()
+
+    if len(chunk) or chunk_size is None:
+        yield chunk
+
+
+# Inputs at least this large in total are parsed on a process pool
+PARALLEL_MIN_BYTES = 8 << 20
+
+# Smallest byte range handed to one worker
+MIN_RANGE_BYTES = 2 << 20
+
+# Byte ranges per worker, so uneven ranges still balance
+RANGES_PER_WORKER = 4
+
+
+# Size and modification time of files
+def file_stamp(paths):
+    """
+    Return a comparable stamp of `paths`: (path, mtime_ns, size) per file.
+    Raises OSError if a file is missing.
+    """
+    stamp = []
+
+    for path in paths:
+        stat = os.stat(path)
+        stamp.append((path, stat.st_mtime_ns, stat.st_size))
+
+    return tuple(stamp)
+
+
+# Files named by a path, a glob pattern or a list of them
+def resolve_paths(source):
+    """
+    Return the CSV files named by `source`: a path, a glob pattern, or
+    a list of either. Pattern matches are sorted, so the file order
+    (which decides duplicates) is the same on every run.
+    Raises FileNotFoundError for a pattern without matches.
+    """
+    items = [source] if isinstance(source, (str, os.PathLike)) else list(source)
+    paths = []
+
+    for item in items:
+        item = os.fspath(item)
+
+        if any(char in item for char in '*?['):
+            matches = sorted(glob.glob(item))
+
+            if not matches:
+                raise FileNotFoundError(errno.ENOENT, "no files match", item)
+
+            paths.extend(matches)
+        else:
+            paths.append(item)
+
+    if not paths:
+        raise FileNotFoundError(errno.ENOENT, "no CSV files given", '')
+
+    return paths
+
+
+# Cut a CSV file into byte ranges on record boundaries
+def split_ranges(path, parts):
+    """
+    Return the header field names of `path` and up to `parts` (start,
+    end) byte ranges covering every data line, each starting and ending
+    on a record boundary. Quoted fields may hold line breaks: a cut is
+    only made at a line break with an even number of quote characters
+    before it, i.e. one outside any quoted field.
+    """
+    with open(path, 'rb') as file:
+        header = _read_record(file, 0)
+        start = position = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        step = max(MIN_RANGE_BYTES, -(-(size - start) // max(parts, 1)))
+        ranges = []
+        quotes = 0
+
+        while start < size:
+            end = min(start + step, size)
+
+            # Move the cut to the end of the record it falls in
+            if end < size:
+                quotes += file.read(end - position).count(b'"')
+                _read_record(file, quotes)
+                end = position = file.tell()
+                quotes = 0
+
+            ranges.append((start, end))
+            start = end
+
+    fieldnames = next(csv.reader([header.decode('utf-8')]))
+    return fieldnames, ranges
+
+
+# Read up to the next line break outside quotes
+def _read_record(file, quotes):
+    """
+    Read from `file` up to and including the next line break that is
+    not inside a quoted field, given the number of quote characters
+    since the last record boundary. Return the bytes read.
+    """
+    data = line = file.readline()
+    quotes += line.count(b'"')
+
+    while quotes % 2 and line:
+        line = file.readline()
+        quotes += line.count(b'"')
+        data += line
+
+    return data
+
+
+# Parse one byte range of a CSV file
+def parse_range(path, start, end, fieldnames):
+    """
+    Parse the lines in bytes start..end of `path` and return their
+    columns (plain lists and arrays, cheap to send between processes)
+    and the numbers, counted from the start of the range, of the rows
+    skipped as invalid.
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    reader = csv.DictReader(io.StringIO(data.decode('utf-8'), newline=''), fieldnames=fieldnames)
+    chunk = GameTable()
+    skipped = []
+
+    for number, row in enumerate(reader):
+        try:
+            chunk.append(parse_row(row))
+        except ValueError:
+            skipped.append(number)
+
+    return {col: chunk.column(col) for col in COLUMNS}, skipped
+
+
+# Process pool task
+def _parse_job(job):
+    return parse_range(*job)
+
+
+# Parse several CSV files into one table
+def load_files(paths, workers=None, report=None):
+    """
+    Parse `paths` into one GameTable, in file order.
+
+    A single file below PARALLEL_MIN_BYTES is read like before. Larger
+    inputs are cut into byte ranges on record boundaries and parsed on a
+    process pool of `workers` (default: one per core); results come back
+    in range order, so the table is the same as a sequential parse.
+
+    With several files, a (title, platform) pair found in more than one
+    file is taken from the last file that has it, and dropped from the
+    earlier ones, so newer shards listed later win.
+    Lines that are not loaded are recorded in `report`.
+    """
+    if report is None:
+        report = LoadReport()
+
+    total = sum(os.path.getsize(path) for path in paths)
+    workers = workers or os.cpu_count() or 1
+
+    if len(paths) == 1 and (total < PARALLEL_MIN_BYTES or workers == 1):
+        return load_csv(paths[0], report)
+
+    parts = workers * RANGES_PER_WORKER if total >= PARALLEL_MIN_BYTES else 1
+    jobs = []
+    owners = []
+
+    for number, path in enumerate(paths):
+        fieldnames, ranges = split_ranges(path, parts)
+        jobs.extend((path, start, end, fieldnames) for start, end in ranges)
+        owners.extend([number] * len(ranges))
+
+    if total >= PARALLEL_MIN_BYTES and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_job, jobs))
+    else:
+        results = [_parse_job(job) for job in jobs]
+
+    games = merge_parts(list(zip(owners, results)), dedupe=len(paths) > 1, report=report)
+    report.dropped = {paths[number]: lines for number, lines in report.dropped.items()}
+    return games
+
+
+# Combine parsed ranges into one table
+def merge_parts(parts, dedupe=True, report=None):
+    """
+    Concatenate (file number, (columns, skipped)) parts in order into a
+    GameTable. With `dedupe`, rows whose (title, platform) also occurs
+    in a later-numbered file are dropped. The numbers of the lines not
+    loaded are recorded in `report.dropped` by file number.
+    """
+    if report is None:
+        report = LoadReport()
+
+    keys = []
+    last_file = {}
+
+    for number, (columns, skipped) in parts:
+        part_keys = list(zip(
+            map(normalize, columns['Title']),
+            map(normalize, columns['Platform'])
+        ))
+        keys.append(part_keys)
+
+        if dedupe:
+            for key in part_keys:
+                last_file[key] = number
+
+        report.skipped += len(skipped)
+
+    merged = {col: [] for col in STRING_COLUMNS}
+    merged['Year_of_Release'] = array('i')
+
+    for col in SALES_COLUMNS:
+        merged[col] = array('d')
+
+    first_line = {}
+
+    for (number, (columns, skipped)), part_keys in zip(parts, keys):
+        if dedupe:
+            keep = [row for row, key in enumerate(part_keys) if last_file[key] == number]
+            report.replaced += len(part_keys) - len(keep)
+        else:
+            keep = range(len(part_keys))
+
+        # Lines not loaded, numbered from the start of the part's file
+        start = first_line.get(number, 0)
+        lines = len(part_keys) + len(skipped)
+        first_line[number] = start + lines
+        dropped = report.dropped.setdefault(number, [])
+
+        if len(keep) == len(part_keys):
+            dropped.extend(start + line for line in skipped)
+        else:
+            invalid = set(skipped)
+            row_lines = [line for line in range(lines) if line not in invalid]
+            kept = set(keep)
+            replaced = [row_lines[row] for row in range(len(part_keys)) if row not in kept]
+            dropped.extend(start + line for line in sorted(skipped + replaced))
+
+        for col in COLUMNS:
+            values = columns[col]
+
+            if len(keep) == len(values):
+                merged[col].extend(values)
+            else:
+                merged[col].extend(values[row] for row in keep)
+
+    # Strings from worker processes are separate objects: share them again
+    for col in STRING_COLUMNS:
+        merged[col] = [sys.intern(value) for value in merged[col]]
+
+    games = GameTable.from_columns(merged)
+    games.skipped_rows = report.skipped
+    report.loaded = len(games)
+    profiling.scanned(report.loaded + report.skipped + report.replaced)
     return games
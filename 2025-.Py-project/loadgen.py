@@ -0,0 +1,107 @@
+# loadgen.py — Load generator for the HTTP/JSON service
+
+# Imports
+import argparse
+import asyncio
+from collections import Counter
+import statistics
+import time
+from urllib.parse import quote
+
+from server import HOST, PORT
+
+# Requests sent when no paths are given: a mix of every endpoint
+DEFAULT_PATHS = [
+    '/search?q=mario',
+    '/search?q=call%20of%20duty',
+    '/search?q=a',
+    '/query?q=' + quote('name~"mario" AND platform=Wii AND year 2005..2010'),
+    '/recommend?title=halo%203',
+    '/recommend?title=tetris',
+    '/leaderboards',
+    '/leaderboards?genre=puzzle',
+]
+
+
+# One keep-alive client sending requests back to back
+async def client(host, port, paths, deadline, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = 0
+
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[sent % len(paths)]
+            sent += 1
+
+            started = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+
+            head = await reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            length = 0
+
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            statuses[int(lines[0].split()[1])] += 1
+    finally:
+        writer.close()
+
+
+# Run the load test
+async def run(host=HOST, port=PORT, paths=DEFAULT_PATHS, connections=16, duration=10.0):
+    """
+    Keep `connections` clients busy for `duration` seconds and print
+    requests per second, latency percentiles and status counts.
+    """
+    latencies = []
+    statuses = Counter()
+    started = time.perf_counter()
+    deadline = started + duration
+
+    await asyncio.gather(*(
+        client(host, port, paths[i % len(paths):] + paths[:i % len(paths)], deadline, latencies, statuses)
+        for i in range(connections)
+    ))
+
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+
+    if not ordered:
+        print("No requests completed.")
+        return
+
+    print(f"{len(ordered)} requests in {elapsed:.1f}s over {connections} connections")
+    print(f"{len(ordered) / elapsed:.1f} requests/s")
+    print(
+        f"latency p50 {statistics.median(ordered) * 1000:.2f} ms, "
+        f"p95 {ordered[int(len(ordered) * 0.95)] * 1000:.2f} ms, "
+        f"max {ordered[-1] * 1000:.2f} ms"
+    )
+    print("status codes: " + ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items())))
+
+
+# Command line entry point
+def main():
+    parser = argparse.ArgumentParser(description="Load test the HTTP/JSON service.")
+    parser.add_argument('paths', nargs='*', help="request paths to cycle through (default: a mix)")
+    parser.add_argument('--host', default=HOST, help="server address")
+    parser.add_argument('--port', type=int, default=PORT, help="server port")
+    parser.add_argument('--connections', type=int, default=16, help="concurrent keep-alive clients")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds to run")
+    args = parser.parse_args()
+
+    if args.connections < 1:
+        parser.error("--connections must be at least 1")
+
+    asyncio.run(run(args.host, args.port, args.paths or DEFAULT_PATHS, args.connections, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,51 @@
+# Import command line parsing
+import argparse
+
 # Import feature modules
-import features.feature1 as feature1
+# (the GUI, tkinter and matplotlib are imported only when a window or chart is requested)
 import features.feature2 as feature2
 import features.feature3 as feature3
 import features.feature4 as feature4
+import features.feature5 as feature5
 
 # Import configuration and helpers
 from config import file_path
-from loader import init
-from gui import GameApp
+from loader import LoadReport, init, resolve_paths, stream
+import profiling
+import title_index
 
 
-# Main program function
-def main():
+# Load the data for console use
+def load(csv_path=file_path):
+    """Load the CSV with progress messages; returns None if it is missing."""
     print("Loading game data...")
 
     try:
-        database = init(file_path)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        return
+        database = init(csv_path)
+    except FileNotFoundError as error:
+        print(f"Error: File '{error.filename or csv_path}' not found.")
+        return None
+
+    print(f"Loaded {len(database)} games ({database.skipped_rows} invalid rows skipped).")
+    return database
+
+
+# Main program function
+def main(csv_path=file_path):
+    database = load(csv_path)
 
-    print(f"Loaded {len(database)} games.")
+    if database is None:
+        return
 
     while True:
         print("\n1. Feature 2 (Search)")
         print("2. Feature 3 (Recommendations)")
         print("3. Feature 4 (Top 5 Games by Region)")
-        print("4. Exit")
+        print("4. Feature 5 (Sales Rollups)")
+        print("5. Exit")
+
+        if profiling.is_enabled():
+            print("P. Profiling summary")
 
         choice = input("Choose an option: ").strip()
 
@@ -37,13 +56,168 @@ def main():
         elif choice == "3":
             feature4.run(database)
         elif choice == "4":
+            feature5.run(database)
+        elif choice == "5":
             print("Goodbye!")
             break
+        elif choice.upper() == "P" and profiling.is_enabled():
+            profiling.dump()
         else:
             print("Invalid choice.")
 
 
-# Start the application
-if __name__ == "__main__":
+# Run the GUI until its window is closed
+def run_gui():
+    from gui import GameApp
+
     app = GameApp()
     app.mainloop()
+
+
+# Answer a single request from the command line and exit
+def run_once(args):
+    database = load(args.csv)
+
+    if database is None:
+        return
+
+    if args.search is not None:
+        feature2.print_games(feature2.search_games(database, args.search))
+    elif args.query is not None:
+        try:
+            feature2.print_games(feature2.query_games(database, args.query))
+        except ValueError as error:
+            print(f"Invalid query: {error}")
+    elif args.recommend is not None:
+        row = title_index.resolve_row(database, args.recommend)
+
+        if row is not None:
+            print(f"Recommendations for {database[row]['Title']}:")
+            feature3.print_rec(feature3.rec_row(database, row))
+        else:
+            print("Game not found.")
+    elif args.top:
+        feature4.top_five_games_by_region(database)
+    elif args.rollup is not None:
+        try:
+            by = feature5.parse_dimensions(' '.join(args.rollup))
+            where = feature5.parse_where(args.where)
+            results = feature5.rollup(database, by, where, args.measure)
+        except ValueError as error:
+            print(f"Invalid rollup: {error}")
+            return
+
+        feature5.print_rollup(results, by, where, args.measure, limit=None)
+    elif args.chart is not None:
+        import features.feature1 as feature1
+
+        feature1.run_gui_feature1(database, args.chart)
+
+
+# Answer a single request by reading the CSV in chunks
+def run_stream(args):
+    """
+    Answer --search, --recommend or --top without loading the CSV:
+    it is read in chunks and only the current best games are kept.
+    Prints the skipped-row report of the last pass over the file.
+    """
+    reports = []
+
+    # Start a pass over the file with its own report
+    def open_stream():
+        reports.append(LoadReport())
+        return stream(paths[0], report=reports[-1])
+
+    try:
+        paths = resolve_paths(args.csv)
+
+        if len(paths) != 1:
+            print("Error: --stream reads a single CSV file.")
+            return
+
+        print("Streaming game data...")
+
+        if args.search is not None:
+            found = feature2.search_games_stream(open_stream(), args.search)
+        elif args.recommend is not None:
+            chosen = feature3.find_game_stream(open_stream(), args.recommend)
+            found = None if chosen is None else feature3.rec_game_stream(open_stream(), chosen)
+        else:
+            found = feature4.top_five_games_by_region_stream(open_stream())
+    except FileNotFoundError as error:
+        print(f"Error: File '{error.filename or args.csv}' not found.")
+        return
+
+    print(f"Read {reports[-1].loaded} games ({reports[-1].skipped} invalid rows skipped).")
+
+    if args.search is not None:
+        feature2.print_games(found)
+    elif args.recommend is None:
+        feature4.print_leaderboards(found)
+    elif chosen is None:
+        print("Game not found.")
+    else:
+        print(f"Recommendations for {chosen['Title']}:")
+        feature3.print_rec(found)
+
+
+# Command line options
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Game Database System")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--gui', action='store_true', help="open the window (the default)")
+    mode.add_argument('--console', action='store_true', help="use the text menu")
+    mode.add_argument('--search', metavar='KEYWORD', help="print the best-selling title matches")
+    mode.add_argument('--query', metavar='QUERY', help='run a composite query, e.g. \'name~"mario" AND platform=Wii\'')
+    mode.add_argument('--recommend', metavar='TITLE', help="print recommendations for a game")
+    mode.add_argument('--top', action='store_true', help="print the regional leaderboards")
+    mode.add_argument('--chart', metavar='TITLE', help="show the regional sales chart for a game")
+    mode.add_argument('--rollup', nargs='*', metavar='DIMENSION',
+                      help="print sales totals grouped by platform, genre, publisher and/or year")
+    parser.add_argument('--stream', action='store_true',
+                        help="read the CSV in chunks instead of loading it (with --search, --recommend or --top)")
+    parser.add_argument('--measure', default='global',
+                        help="sales column summed by --rollup: na, eu, jp, other, global or count")
+    parser.add_argument('--where', action='append', metavar='DIMENSION=VALUE',
+                        help="restrict --rollup to one platform, genre, publisher or year (repeatable)")
+    parser.add_argument('--csv', nargs='+', default=file_path,
+                        help="CSV files or glob patterns to read in console and one-shot modes")
+    parser.add_argument(
+        '--stats', action='store_true',
+        help=f"record per-call timings and print a summary on exit (or set {profiling.ENV_VAR}=1)"
+    )
+    parser.add_argument(
+        '--profile', nargs='?', const='', metavar='FILE',
+        help="run the session under cProfile, optionally saving the raw stats to FILE"
+    )
+    args = parser.parse_args(argv)
+
+    if args.stream and args.search is None and args.recommend is None and not args.top:
+        parser.error("--stream works with --search, --recommend or --top")
+
+    return args
+
+
+# Start the application
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.stats:
+        profiling.enable()
+
+    if args.console:
+        session = (main, args.csv)
+    elif args.stream:
+        session = (run_stream, args)
+    elif any(value is not None for value in (args.search, args.query, args.recommend, args.chart, args.rollup)) or args.top:
+        session = (run_once, args)
+    else:
+        session = (run_gui,)
+
+    if args.profile is not None:
+        profiling.profile_session(*session, output=args.profile or None)
+    else:
+        session[0](*session[1:])
+
+    if profiling.is_enabled():
+        profiling.dump()
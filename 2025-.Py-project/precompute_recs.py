@@ -0,0 +1,112 @@
+# precompute_recs.py — Batch job that precomputes recommendations for every game
+
+# Imports
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import time
+
+from config import file_path
+import loader
+import rec_store
+import scoring
+import snapshot
+
+# Games handled by one task
+SHARD_SIZE = 500
+
+# Table loaded once per worker process
+_worker_games = None
+
+
+# Worker start-up
+def _init_worker(csv_path):
+    global _worker_games
+    _worker_games = loader.init(csv_path)
+
+
+# Recommendations for one range of rows
+def compute_shard(start, end, top_n):
+    """
+    Compute the top `top_n` recommendations for rows start..end-1 of the
+    worker's table. Returns (start, rows, scores) as flat arrays padded
+    with rec_store.NO_ROW.
+    """
+    games = _worker_games
+    scorer = scoring.scorer_for(games)
+    rows = array('i')
+    scores = array('B')
+
+    for row in range(start, end):
+        recs = scorer.recommend(games[row], top_n)
+        padding = top_n - len(recs)
+
+        rows.extend([rec for rec, score in recs] + [rec_store.NO_ROW] * padding)
+        scores.extend([score for rec, score in recs] + [0] * padding)
+
+    return start, rows, scores
+
+
+# Run the whole batch
+def run(csv_path=file_path, workers=None, top_n=5, shard_size=SHARD_SIZE, output=None):
+    """
+    Precompute recommendations for every game on a process pool and
+    write them next to the CSV. Prints progress and throughput.
+    Returns the path of the lookup file.
+    """
+    # Taken before reading, so edits made while computing mark the file stale
+    fingerprint = snapshot.fingerprint(csv_path)
+    total = len(loader.init(csv_path))
+    shards = [(start, min(start + shard_size, total)) for start in range(0, total, shard_size)]
+    results = {}
+    done = 0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(csv_path,)
+    ) as pool:
+        futures = [pool.submit(compute_shard, start, end, top_n) for start, end in shards]
+
+        for future in as_completed(futures):
+            start, rows, scores = future.result()
+            results[start] = (rows, scores)
+            done += len(rows) // top_n
+
+            elapsed = time.perf_counter() - started
+            print(f"{done}/{total} games ({done / elapsed:.0f} games/s)")
+
+    rows = array('i')
+    scores = array('B')
+
+    for start in sorted(results):
+        rows.extend(results[start][0])
+        scores.extend(results[start][1])
+
+    path = rec_store.save(csv_path, top_n, rows, scores, output, fingerprint)
+    elapsed = time.perf_counter() - started
+
+    print(f"Wrote {total} games to {path} in {elapsed:.1f}s ({total / elapsed:.0f} games/s)")
+    return path
+
+
+# Command line entry point
+def main():
+    parser = argparse.ArgumentParser(description="Precompute recommendations for every game.")
+    parser.add_argument('--csv', default=file_path, help="CSV file to read")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--top', type=int, default=5, help="recommendations stored per game")
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help="games per task")
+    parser.add_argument('--output', help="lookup file path (default: next to the CSV)")
+    args = parser.parse_args()
+
+    if args.top < 1 or args.workers < 1 or args.shard_size < 1:
+        parser.error("--top, --workers and --shard-size must be at least 1")
+
+    run(args.csv, args.workers, args.top, args.shard_size, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# profiling.py — Lightweight timing registry and cProfile sessions
+
+# Imports
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+
+# Set this environment variable (e.g. GAMES_PROFILE=1) to record from start-up
+ENV_VAR = 'GAMES_PROFILE'
+
+# Lines of cProfile output printed after a profiled session
+PROFILE_LINES = 30
+
+_enabled = bool(os.environ.get(ENV_VAR))
+_stats = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+# Totals for one instrumented name
+class Stat:
+    """Call count, total and worst time, rows scanned and result sizes for one name."""
+
+    __slots__ = ('calls', 'total', 'worst', 'rows', 'results')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.rows = 0
+        self.results = 0
+
+
+# Turn recording on or off
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+# Forget everything recorded so far
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+# One timed section, nested sections included
+class _Section:
+    __slots__ = ('name', 'started', 'rows', 'result_size')
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.result_size = None
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+
+        if stack is None:
+            stack = _local.stack = []
+
+        stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        _local.stack.pop()
+
+        with _lock:
+            stat = _stats.get(self.name)
+
+            if stat is None:
+                stat = _stats[self.name] = Stat()
+
+            stat.calls += 1
+            stat.total += elapsed
+            stat.worst = max(stat.worst, elapsed)
+            stat.rows += self.rows
+            stat.results += self.result_size or 0
+
+        return False
+
+
+# Stand-in used while recording is off
+class _NoSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SECTION = _NoSection()
+
+
+# Time a block of code
+def section(name):
+    """
+    Return a context manager recording the time spent in the block
+    under `name`. Does nothing while recording is off.
+    """
+    return _Section(name) if _enabled else _NO_SECTION
+
+
+# Time every call of a function
+def timed(name=None):
+    """
+    Decorator recording each call's time and, for results with a
+    length, the result size. While recording is off the only cost is
+    one flag check per call.
+    """
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            with _Section(label) as current:
+                result = func(*args, **kwargs)
+
+                try:
+                    current.result_size = len(result)
+                except TypeError:
+                    pass
+
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+# Count rows examined by the innermost running section
+def scanned(rows):
+    """Add `rows` to the rows-scanned count of the current timed call."""
+    if not _enabled:
+        return
+
+    stack = getattr(_local, 'stack', None)
+
+    if stack:
+        stack[-1].rows += rows
+
+
+# Recorded totals
+def summary():
+    """Return one dict per instrumented name, slowest total first."""
+    with _lock:
+        items = list(_stats.items())
+
+    rows = [
+        {
+            'name': name,
+            'calls': stat.calls,
+            'total_ms': stat.total * 1000,
+            'mean_ms': stat.total * 1000 / stat.calls,
+            'max_ms': stat.worst * 1000,
+            'rows_scanned': stat.rows,
+            'results': stat.results,
+        }
+        for name, stat in items
+    ]
+
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return rows
+
+
+# Print the summary table
+def dump(file=None):
+    """Print the recorded totals as a table."""
+    file = file or sys.stdout
+    rows = summary()
+
+    if not rows:
+        print("No profiling data recorded." if _enabled else
+              f"Profiling is off (set {ENV_VAR}=1 or pass --stats).", file=file)
+        return
+
+    print(f"\n{'name':<52} {'calls':>7} {'total ms':>10} {'mean ms':>9} "
+          f"{'max ms':>9} {'rows':>10} {'results':>8}", file=file)
+
+    for row in rows:
+        print(
+            f"{row['name']:<52} {row['calls']:>7} {row['total_ms']:>10.2f} "
+            f"{row['mean_ms']:>9.3f} {row['max_ms']:>9.3f} "
+            f"{row['rows_scanned']:>10} {row['results']:>8}",
+            file=file
+        )
+
+
+# Run a whole session under cProfile
+def profile_session(func, *args, output=None, lines=PROFILE_LINES):
+    """
+    Call func(*args) under cProfile, then print the top `lines`
+    functions by cumulative time. With `output`, the raw stats are also
+    saved there for pstats or snakeviz. Returns func's result.
+    """
+    profiler = cProfile.Profile()
+
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        if output:
+            profiler.dump_stats(output)
+
+        buffer = io.StringIO()
+        pstats.Stats(profiler, stream=buffer).sort_stats('cumulative').print_stats(lines)
+        print(buffer.getvalue())
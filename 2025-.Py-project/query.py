@@ -0,0 +1,371 @@
+# query.py — Composite queries with a selectivity-based planner
+
+# Imports
+import re
+
+from leaderboard import Leaderboards, RankIndex
+import profiling
+from table import CATEGORY_COLUMNS, MISSING_YEAR, SALES_COLUMNS
+import title_index
+
+# Columns with a sorted index for range predicates
+RANGE_COLUMNS = ['Year_of_Release'] + SALES_COLUMNS
+
+# Field names accepted in query text
+FIELDS = {
+    'name': 'Title',
+    'title': 'Title',
+    'platform': 'Platform',
+    'genre': 'Genre',
+    'publisher': 'Publisher',
+    'year': 'Year_of_Release',
+    'na': 'NA_Sales',
+    'eu': 'EU_Sales',
+    'jp': 'JP_Sales',
+    'other': 'Other_Sales',
+    'global': 'Global_Sales',
+}
+
+# Example shown to users
+EXAMPLE = 'name~"mario" AND platform=Wii AND year 2005..2010 AND global>=1.0'
+
+# One predicate: field, then an operator and value or a low..high range
+CLAUSE = re.compile(
+    r'\s*(?P<field>[A-Za-z_]+)\s*'
+    r'(?:=?\s*(?P<low>-?[\d.]+)\s*\.\.\s*(?P<high>-?[\d.]+)'
+    r'|(?P<op>~|>=|<=|=|>|<)\s*(?P<value>"[^"]*"|[^\s"]+))\s*'
+)
+AND = re.compile(r'AND\b', re.IGNORECASE)
+
+
+# Substring or exact title match
+class TitlePredicate:
+    def __init__(self, keyword, exact=False):
+        self.column = 'Title'
+        self.keyword = title_index.normalize(keyword)
+        self.exact = exact
+
+    def __str__(self):
+        return f'name{"=" if self.exact else "~"}"{self.keyword}"'
+
+    def estimate(self, index):
+        titles = index.title_index()
+
+        if self.exact:
+            return len(titles.exact(self.keyword))
+
+        return titles.estimate(self.keyword)
+
+    def rows(self, index):
+        titles = index.title_index()
+
+        if self.exact:
+            return titles.exact(self.keyword)
+
+        return titles.search(self.keyword)
+
+    def tester(self, index):
+        titles = index.title_index().titles
+        keyword = self.keyword
+
+        if self.exact:
+            return lambda row: titles[row] == keyword
+
+        return lambda row: keyword in titles[row]
+
+
+# Categorical equality, compared as integer codes
+class CategoryPredicate:
+    def __init__(self, column, value):
+        self.column = column
+        self.value = title_index.normalize(value)
+
+    def __str__(self):
+        return f"{self.column}={self.value}"
+
+    def estimate(self, index):
+        return len(self.rows(index))
+
+    def rows(self, index):
+        codes = index.categories[self.column]
+        return codes.rows(codes.lookup(self.value))
+
+    def tester(self, index):
+        codes = index.categories[self.column]
+        code = codes.lookup(self.value)
+        column = codes.codes
+
+        return lambda row: column[row] == code
+
+
+# Numeric range, with optionally open ends
+class RangePredicate:
+    def __init__(self, column, low, high, low_open=False, high_open=False):
+        self.column = column
+        self.low = low
+        self.high = high
+        self.low_open = low_open
+        self.high_open = high_open
+
+        # Missing years are stored as MISSING_YEAR and never match
+        if column == 'Year_of_Release':
+            self.low = max(low, MISSING_YEAR + 1)
+
+    def __str__(self):
+        left = "(" if self.low_open else "["
+        right = ")" if self.high_open else "]"
+        return f"{self.column} in {left}{self.low}, {self.high}{right}"
+
+    def estimate(self, index):
+        return index.ranges[self.column].count_between(self.low, self.high)
+
+    def rows(self, index):
+        rows = index.ranges[self.column].rows_between(self.low, self.high)
+
+        if self.low_open or self.high_open:
+            test = self.tester(index)
+            return [row for row in rows if test(row)]
+
+        return rows
+
+    def tester(self, index):
+        column = index.table.column(self.column)
+        low, high = self.low, self.high
+        low_open, high_open = self.low_open, self.high_open
+
+        def test(row):
+            value = column[row]
+
+            if value < low or (low_open and value == low):
+                return False
+
+            return value < high or (not high_open and value == high)
+
+        return test
+
+
+# Turn one parsed clause into a predicate
+def _predicate(field, op, value, low, high):
+    column = FIELDS.get(field.lower())
+
+    if column is None:
+        raise ValueError(f"unknown field '{field}' (use one of: {', '.join(FIELDS)})")
+
+    if column == 'Title':
+        if op not in ('~', '='):
+            raise ValueError(f"use {field}~text or {field}=text")
+
+        return TitlePredicate(value, exact=(op == '='))
+
+    if column in CATEGORY_COLUMNS:
+        if op != '=':
+            raise ValueError(f"use {field}=value")
+
+        return CategoryPredicate(column, value)
+
+    number = int if column == 'Year_of_Release' else float
+
+    try:
+        if low is not None:
+            return RangePredicate(column, number(low), number(high))
+
+        value = number(value)
+    except ValueError:
+        raise ValueError(f"{field} needs a number") from None
+
+    if op == '~':
+        raise ValueError(f"use =, <, <=, >, >= or low..high with {field}")
+
+    infinity = float('inf')
+
+    return {
+        '=': lambda: RangePredicate(column, value, value),
+        '>=': lambda: RangePredicate(column, value, infinity),
+        '>': lambda: RangePredicate(column, value, infinity, low_open=True),
+        '<=': lambda: RangePredicate(column, -infinity, value),
+        '<': lambda: RangePredicate(column, -infinity, value, high_open=True),
+    }[op]()
+
+
+# Parse query text
+def parse(text):
+    """
+    Parse a query such as
+        name~"mario" AND platform=Wii AND year 2005..2010 AND global>=1.0
+    into a list of predicates. Raises ValueError on malformed queries.
+    """
+    predicates = []
+    position = 0
+    text = text.strip()
+
+    if not text:
+        raise ValueError("empty query")
+
+    while True:
+        match = CLAUSE.match(text, position)
+
+        if match is None:
+            raise ValueError(f"cannot read query at: {text[position:]!r}")
+
+        value = match['value']
+
+        if value is not None and value.startswith('"'):
+            value = value[1:-1]
+
+        predicates.append(_predicate(match['field'], match['op'], value, match['low'], match['high']))
+        position = match.end()
+
+        if position == len(text):
+            return predicates
+
+        joiner = AND.match(text, position)
+
+        if joiner is None:
+            raise ValueError(f"expected AND at: {text[position:]!r}")
+
+        position = joiner.end()
+
+
+# Per-column indexes for composite queries
+class QueryIndex:
+    """
+    Sorted indexes for year and sales which, together with the table's
+    own dictionary codes for the categorical columns (integer code ->
+    sorted rows), answer composite queries. The sales rankings are the
+    table's leaderboards; only the year ranking is kept here.
+
+    The planner estimates how many rows each predicate matches, which is
+    cheap for every index (a bucket length, two binary searches, or the
+    shortest trigram posting list), and starts from the most selective
+    one. Each further predicate either probes the surviving rows one by
+    one or, when its own match set is smaller, is intersected as a set.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._titles = None
+        self._boards = None
+        self.categories = {column: table.codes(column) for column in CATEGORY_COLUMNS}
+        self.years = RankIndex('Year_of_Release')
+        self.ranges = {}
+
+    # Index a whole table
+    @classmethod
+    def build(cls, table):
+        """Index every row of `table`."""
+        index = cls(table)
+        index.years = RankIndex.build(table, 'Year_of_Release')
+        boards = table.indexes.get('leaderboards')
+
+        # Tables without leaderboards (such as streamed chunks) get their own
+        if boards is None:
+            boards = index._boards = Leaderboards.build(table)
+
+        index.ranges = {
+            column: index.years if column == 'Year_of_Release' else boards.rank(column)
+            for column in RANGE_COLUMNS
+        }
+        return index
+
+    # Title index of the table, built on demand for tables without one
+    def title_index(self):
+        titles = self.table.indexes.get('title')
+
+        if titles is None:
+            if self._titles is None:
+                self._titles = title_index.TitleIndex.build(self.table)
+
+            titles = self._titles
+
+        return titles
+
+    # Table hook: a row was appended
+    def on_insert(self, table, row):
+        self.years.insert(row, table.column('Year_of_Release')[row])
+
+        if self._boards is not None:
+            self._boards.on_insert(table, row)
+
+    # Table hook: a row was changed
+    def on_update(self, table, row, old):
+        old_year = MISSING_YEAR if old['Year_of_Release'] is None else old['Year_of_Release']
+        new_year = table.column('Year_of_Release')[row]
+
+        if new_year != old_year:
+            self.years.remove(row, old_year)
+            self.years.insert(row, new_year)
+
+        if self._boards is not None:
+            self._boards.on_update(table, row, old)
+
+    # Table hook: the last row was removed
+    def on_delete(self, table, row, old):
+        year = old['Year_of_Release']
+        self.years.remove(row, MISSING_YEAR if year is None else year)
+
+        if self._boards is not None:
+            self._boards.on_delete(table, row, old)
+
+    # Order predicates by selectivity
+    def plan(self, predicates):
+        """Return (estimate, predicate) pairs, most selective first."""
+        return sorted(
+            ((predicate.estimate(self), predicate) for predicate in predicates),
+            key=lambda step: step[0]
+        )
+
+    # Run parsed predicates
+    def select(self, predicates):
+        """Return the rows, in table order, matching every predicate."""
+        steps = self.plan(predicates)
+        rows = None
+
+        for estimate, predicate in steps:
+            if rows is None:
+                rows = sorted(predicate.rows(self))
+                profiling.scanned(len(rows))
+            elif len(rows) <= estimate:
+                test = predicate.tester(self)
+                profiling.scanned(len(rows))
+                rows = [row for row in rows if test(row)]
+            else:
+                matched = set(predicate.rows(self))
+                profiling.scanned(len(matched))
+                rows = [row for row in rows if row in matched]
+
+            if not rows:
+                break
+
+        return rows
+
+
+# Query index for any table
+def index_for(table):
+    """
+    Return the table's registered QueryIndex, or build a temporary one
+    for tables without it (such as streamed chunks).
+    """
+    index = table.indexes.get('query')
+
+    if index is None:
+        index = QueryIndex.build(table)
+
+    return index
+
+
+# Parse and run a query
+def select(table, text):
+    """
+    Return the rows of `table`, in table order, matching query `text`.
+    Raises ValueError if the query cannot be parsed.
+    """
+    return index_for(table).select(parse(text))
+
+
+# Describe how a query will run
+def explain(table, text):
+    """Return one line per predicate, in execution order, with its estimate."""
+    return [
+        f"{predicate}  (~{estimate} rows)"
+        for estimate, predicate in index_for(table).plan(parse(text))
+    ]
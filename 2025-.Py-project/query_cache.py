@@ -0,0 +1,101 @@
+# query_cache.py — Shared LRU cache for feature query results
+
+# Imports
+from collections import OrderedDict
+import functools
+import threading
+
+# Results kept per cache
+CACHE_SIZE = 512
+
+
+# Thread-safe LRU cache of query results
+class QueryCache:
+    """
+    Maps (dataset version, query name, normalised parameters) to a
+    result. The version stamp changes whenever a table is loaded or
+    modified, so results from older data are never returned; they are
+    simply no longer looked up and age out of the LRU order.
+    One instance is shared by the GUI, the console and the server.
+    Two threads missing the same key at once may both compute it.
+    """
+
+    def __init__(self, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Cached result or a freshly computed one
+    def get(self, key, compute):
+        """Return the result stored for `key`, or store and return compute()."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            self.misses += 1
+
+        result = compute()
+
+        with self._lock:
+            self._entries[key] = result
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return result
+
+    # Drop every stored result
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Cache statistics
+    def stats(self):
+        """Return hit/miss/eviction counts and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+            }
+
+
+# Cache shared by every feature function
+results = QueryCache()
+
+
+# Cache a feature function's results
+def memoize(key, copy=list, cache=None):
+    """
+    Decorator for feature functions taking the dataset first.
+    `key(*args, **kwargs)` receives the remaining arguments and returns
+    their normalised, hashable form. Callers get `copy(result)` so they
+    cannot change the stored value.
+    Tables without indexes (such as streamed chunks, used once) are
+    not cached.
+    """
+    def decorate(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(database, *args, **kwargs):
+            if not getattr(database, 'indexes', None):
+                return func(database, *args, **kwargs)
+
+            store = cache or results
+            cache_key = (database.version, name, key(*args, **kwargs))
+            result = store.get(cache_key, lambda: func(database, *args, **kwargs))
+
+            return copy(result)
+
+        return wrapper
+
+    return decorate
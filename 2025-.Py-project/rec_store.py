@@ -0,0 +1,158 @@
+# rec_store.py — Precomputed recommendation lookup file
+
+# Imports
+from array import array
+import json
+import os
+import struct
+import sys
+
+import snapshot
+
+# File format
+MAGIC = b'GTRECS1\n'
+HEADER_SIZE = struct.Struct('<I')
+SUFFIX = '.recs'
+
+# Padding value for games with fewer recommendations than top_n
+NO_ROW = -1
+
+
+# Lookup file path for a CSV file
+def store_path(csv_path):
+    """Return the path of the recommendation file stored next to `csv_path`."""
+    return csv_path + SUFFIX
+
+
+# Precomputed recommendations for every row
+class PrecomputedRecommendations:
+    """
+    Holds the best `top_n` recommendations for every row of a table as
+    two flat arrays, so serving a recommendation is a slice.
+    Any change to the table marks the lookup as stale.
+    """
+
+    def __init__(self, top_n, rows, scores):
+        self.top_n = top_n
+        self.stale = False
+        self._rows = rows
+        self._scores = scores
+
+    # Number of games covered
+    def __len__(self):
+        return len(self._rows) // self.top_n if self.top_n else 0
+
+    # Serve one game's recommendations
+    def lookup(self, row, limit):
+        """
+        Return up to `limit` (row, score) pairs for table row `row`,
+        or None when the lookup cannot answer (stale or limit too big).
+        """
+        if self.stale or limit > self.top_n or row >= len(self):
+            return None
+
+        start = row * self.top_n
+        pairs = zip(self._rows[start:start + limit], self._scores[start:start + limit])
+
+        return [(rec, score) for rec, score in pairs if rec != NO_ROW]
+
+    # Table hook: a row was appended
+    def on_insert(self, table, row):
+        self.stale = True
+
+    # Table hook: a row was changed
+    def on_update(self, table, row, old):
+        self.stale = True
+
+    # Table hook: a row was removed
+    def on_delete(self, table, row, old):
+        self.stale = True
+
+
+# Write a lookup file
+def save(csv_path, top_n, rows, scores, path=None, fingerprint=None):
+    """
+    Write precomputed recommendation arrays for the table loaded
+    from `csv_path`. `fingerprint` should be taken before the CSV was
+    read, so edits made while computing mark the file stale; it is
+    taken now when omitted. Returns the path written.
+    """
+    path = path or store_path(csv_path)
+    header = json.dumps({
+        'fingerprint': fingerprint or snapshot.fingerprint(csv_path),
+        'byteorder': sys.byteorder,
+        'top_n': top_n,
+        'games': len(rows) // top_n,
+    }).encode('utf-8')
+
+    temp_path = path + '.tmp'
+
+    with open(temp_path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(HEADER_SIZE.pack(len(header)))
+        file.write(header)
+        file.write(rows.tobytes())
+        file.write(scores.tobytes())
+
+    os.replace(temp_path, path)
+    return path
+
+
+# Check the shape of a decoded header
+def _valid_header(header):
+    return (
+        isinstance(header, dict)
+        and isinstance(header.get('fingerprint'), dict)
+        and isinstance(header.get('games'), int)
+        and isinstance(header.get('top_n'), int)
+        and header['top_n'] > 0
+    )
+
+
+# Read a lookup file if it still matches the CSV
+def load(csv_path, games, path=None):
+    """
+    Return the PrecomputedRecommendations for `csv_path`, or None when
+    the file is missing, damaged, written for another CSV or for another
+    row count.
+    """
+    path = path or store_path(csv_path)
+
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+
+    try:
+        if data[:len(MAGIC)] != MAGIC:
+            return None
+
+        start = len(MAGIC) + HEADER_SIZE.size
+        (length,) = HEADER_SIZE.unpack(data[len(MAGIC):start])
+        header = json.loads(data[start:start + length])
+
+        if not _valid_header(header):
+            return None
+
+        if header['byteorder'] != sys.byteorder or header['games'] != games:
+            return None
+
+        if not snapshot.is_fresh(header['fingerprint'], csv_path):
+            return None
+
+        rows = array('i')
+        scores = array('B')
+        count = header['games'] * header['top_n']
+        offset = start + length
+
+        rows.frombytes(data[offset:offset + count * rows.itemsize])
+        offset += count * rows.itemsize
+        scores.frombytes(data[offset:offset + count * scores.itemsize])
+    except (ValueError, KeyError, TypeError, struct.error):
+        return None
+
+    if len(rows) != count or len(scores) != count:
+        return None
+
+    return PrecomputedRecommendations(header['top_n'], rows, scores)
@@ -0,0 +1,163 @@
+# scoring.py — Column-based recommendation scoring
+
+# Imports
+import profiling
+import topk
+from leaderboard import Leaderboards, RankIndex
+from title_index import TitleIndex
+
+# Score rules used by feature3
+GENRE_POINTS = 2
+PLATFORM_POINTS = 1
+SALES_POINTS = 1
+SALES_WINDOW = 1.0
+
+# Slack added to the sales window before the exact abs() check,
+# so float rounding never drops a row the original loop would keep
+WINDOW_SLACK = 1e-9
+
+
+# Precomputed columns for recommendation scoring
+class ScoringIndex:
+    """
+    Scores a chosen game against a table using the genre and platform
+    codes the table keeps, so no strings are re-normalised.
+
+    Only rows that can score above zero are looked at: the genre and
+    platform buckets of the chosen game plus the rows whose global sales
+    fall in the window, found by binary search over the table's
+    Global_Sales leaderboard. Rows with the chosen title come from the
+    title index's groups.
+    Rows outside the buckets score at most SALES_POINTS, so the window
+    is only searched when the buckets alone cannot fill the results.
+    Results match the original per-game loop exactly.
+    """
+
+    def __init__(self, table):
+        self._sales = table.column('Global_Sales')
+        self._titles = TitleIndex()
+        self._sales_rank = RankIndex('Global_Sales')
+        self._owned = []
+        self._columns = {
+            'Genre': table.codes('Genre'),
+            'Platform': table.codes('Platform'),
+        }
+
+    # Score against a whole table
+    @classmethod
+    def build(cls, table):
+        """Set up scoring for `table` from its title and leaderboard indexes."""
+        index = cls(table)
+        titles = table.indexes.get('title')
+        boards = table.indexes.get('leaderboards')
+
+        # Tables without them (such as streamed chunks) get their own
+        if titles is None:
+            titles = TitleIndex.build(table)
+            index._owned.append(titles)
+
+        if boards is None:
+            boards = Leaderboards({'Global_Sales': RankIndex.build(table, 'Global_Sales')})
+            index._owned.append(boards)
+
+        index._titles = titles
+        index._sales_rank = boards.rank('Global_Sales')
+        return index
+
+    # Table hook: a row was appended
+    def on_insert(self, table, row):
+        for owned in self._owned:
+            owned.on_insert(table, row)
+
+    # Table hook: a row was changed
+    def on_update(self, table, row, old):
+        for owned in self._owned:
+            owned.on_update(table, row, old)
+
+    # Table hook: the last row was removed
+    def on_delete(self, table, row, old):
+        for owned in self._owned:
+            owned.on_delete(table, row, old)
+
+    # Rows that can score above zero
+    def candidates(self, chosen_game, with_window=True):
+        """
+        Return the set of rows sharing the chosen game's genre or
+        platform, plus (with `with_window`) the rows whose global sales
+        are inside the window.
+        """
+        genre = self._columns['Genre'].lookup(chosen_game['Genre'])
+        platform = self._columns['Platform'].lookup(chosen_game['Platform'])
+
+        rows = set(self._columns['Genre'].rows(genre))
+        rows.update(self._columns['Platform'].rows(platform))
+
+        if with_window:
+            sales = chosen_game['Global_Sales']
+            window = SALES_WINDOW + WINDOW_SLACK
+            rows.update(self._sales_rank.rows_between(sales - window, sales + window))
+
+        return rows
+
+    # Score the candidate rows against a chosen game
+    def scores(self, chosen_game, candidates):
+        """
+        Return {row: score} for every candidate row scoring above zero.
+        Rows with the chosen game's title are skipped.
+        """
+        same_title = set(self._titles.exact(chosen_game['Title']))
+        genre = self._columns['Genre'].lookup(chosen_game['Genre'])
+        platform = self._columns['Platform'].lookup(chosen_game['Platform'])
+        sales = chosen_game['Global_Sales']
+
+        genres = self._columns['Genre'].codes
+        platforms = self._columns['Platform'].codes
+        sales_column = self._sales
+        scores = {}
+        profiling.scanned(len(candidates))
+
+        for row in candidates:
+            if row in same_title:
+                continue
+
+            score = (
+                (GENRE_POINTS if genres[row] == genre else 0)
+                + (PLATFORM_POINTS if platforms[row] == platform else 0)
+                + (SALES_POINTS if abs(sales_column[row] - sales) <= SALES_WINDOW else 0)
+            )
+
+            if score > 0:
+                scores[row] = score
+
+        return scores
+
+    # Best scoring rows
+    def recommend(self, chosen_game, limit):
+        """
+        Return up to `limit` (row, score) pairs, best first.
+        Equal scores keep table order.
+        """
+        scores = self.scores(chosen_game, self.candidates(chosen_game, with_window=False))
+        strong = sum(1 for score in scores.values() if score > SALES_POINTS)
+
+        # Too few bucket rows beat a sales-only match: add the window
+        if strong < limit:
+            scores = self.scores(chosen_game, self.candidates(chosen_game))
+
+        best = topk.top_k(scores, key=lambda row: (scores[row], -row), k=limit)
+
+        return [(row, scores[row]) for row in best]
+
+
+# Scoring index for any table
+def scorer_for(table):
+    """
+    Return the table's registered ScoringIndex, or build a temporary
+    one for tables without it (such as streamed chunks).
+    """
+    scorer = table.indexes.get('scoring')
+
+    if scorer is None:
+        scorer = ScoringIndex.build(table)
+
+    return scorer
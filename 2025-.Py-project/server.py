@@ -0,0 +1,307 @@
+# server.py — Local HTTP/JSON service over the in-memory dataset
+
+# Imports
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+
+from config import file_path
+import features.feature1 as feature1
+import features.feature2 as feature2
+import features.feature3 as feature3
+import features.feature4 as feature4
+import loader
+import query_cache
+
+# Defaults for the command line
+HOST = '127.0.0.1'
+PORT = 8000
+
+# Seconds a request may take, including waiting for a free slot
+REQUEST_TIMEOUT = 5.0
+
+# Requests handled at the same time; later ones wait for a slot
+MAX_CONCURRENT = 32
+
+# Seconds an idle keep-alive connection is kept open
+IDLE_TIMEOUT = 15.0
+
+# Largest number of results a client may ask for
+MAX_LIMIT = 100
+
+# Longest request head accepted, in bytes
+MAX_HEAD = 16384
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+    504: 'Gateway Timeout',
+}
+
+CHART_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+# A response that ends a request early
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Game row as JSON
+def game_json(game):
+    return dict(game)
+
+
+# Query service
+class GameServer:
+    """
+    Serves search, composite queries, recommendations, leaderboards and
+    charts as JSON over HTTP/1.1 with keep-alive.
+
+    The dataset is loaded once. Feature calls run on a thread pool so
+    the event loop keeps accepting and answering connections while they
+    compute; a semaphore caps how many run at once and every request is
+    bounded by a timeout (a call that overruns is answered with 504 and
+    its worker finishes in the background).
+    """
+
+    def __init__(self, database, workers=None, timeout=REQUEST_TIMEOUT,
+                 max_concurrent=MAX_CONCURRENT):
+        self.database = database
+        self.timeout = timeout
+        self.max_concurrent = max_concurrent
+        self._pool = ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 1) + 2))
+        self._slots = None
+        self._renderer = None
+        self.routes = {
+            '/health': self.health,
+            '/search': self.search,
+            '/query': self.query,
+            '/recommend': self.recommend,
+            '/leaderboards': self.leaderboards,
+            '/chart': self.chart,
+        }
+
+    # Chart renderer, created on the first chart request
+    def renderer(self):
+        if self._renderer is None:
+            from charts import ChartRenderer
+
+            self._renderer = ChartRenderer()
+
+        return self._renderer
+
+    # Endpoint handlers: run on the thread pool, return (status, type, body)
+    def health(self, params):
+        return self.json({'games': len(self.database), 'cache': query_cache.results.stats()})
+
+    def search(self, params):
+        keyword = self.param(params, 'q')
+        results = feature2.search_games(self.database, keyword, self.limit(params))
+        return self.json({'results': [game_json(g) for g in results]})
+
+    def query(self, params):
+        text = self.param(params, 'q')
+
+        try:
+            results = feature2.query_games(self.database, text, self.limit(params))
+        except ValueError as error:
+            raise HTTPError(400, f"invalid query: {error}") from None
+
+        return self.json({'results': [game_json(g) for g in results]})
+
+    def recommend(self, params):
+        title = self.param(params, 'title')
+        results = feature3.recommend_games(self.database, title, self.limit(params))
+        return self.json({'results': [game_json(g) for g in results]})
+
+    def leaderboards(self, params):
+        filters = {
+            'Genre': self.param(params, 'genre', ''),
+            'Platform': self.param(params, 'platform', ''),
+        }
+        boards = feature4.top_five_games_by_region_gui(self.database, self.limit(params), filters)
+        return self.json({
+            region: [game_json(g) for g in games]
+            for region, games in boards.items()
+        })
+
+    def chart(self, params):
+        title = self.param(params, 'title')
+        fmt = self.param(params, 'format', 'png')
+
+        if fmt not in CHART_TYPES:
+            raise HTTPError(400, f"format must be one of: {', '.join(CHART_TYPES)}")
+
+        found = feature1.chart_data(self.database, title)
+
+        if found is None:
+            raise HTTPError(404, f"no sales data found for '{title}'")
+
+        title, plot_data = found
+        return 200, CHART_TYPES[fmt], self.renderer().render(plot_data, title, fmt)
+
+    # Request parameter helpers
+    @staticmethod
+    def param(params, name, default=None):
+        values = params.get(name)
+
+        if values:
+            return values[0]
+
+        if default is None:
+            raise HTTPError(400, f"missing parameter '{name}'")
+
+        return default
+
+    def limit(self, params):
+        try:
+            limit = int(self.param(params, 'limit', str(feature2.TOP_N)))
+        except ValueError:
+            raise HTTPError(400, "limit must be a number") from None
+
+        if not 1 <= limit <= MAX_LIMIT:
+            raise HTTPError(400, f"limit must be between 1 and {MAX_LIMIT}")
+
+        return limit
+
+    @staticmethod
+    def json(payload, status=200):
+        return status, 'application/json', json.dumps(payload).encode('utf-8')
+
+    # Route and run one request
+    async def dispatch(self, method, target):
+        if method != 'GET':
+            raise HTTPError(405, "only GET is supported")
+
+        url = urlsplit(target)
+        handler = self.routes.get(url.path)
+
+        if handler is None:
+            raise HTTPError(404, f"unknown endpoint '{url.path}'")
+
+        params = parse_qs(url.query)
+        loop = asyncio.get_running_loop()
+
+        async def run():
+            async with self._slots:
+                return await loop.run_in_executor(self._pool, handler, params)
+
+        try:
+            return await asyncio.wait_for(run(), self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(504, f"request took longer than {self.timeout}s") from None
+
+    # Read one request head
+    @staticmethod
+    async def read_head(reader):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "request head too large") from None
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split()
+
+        if len(parts) != 3:
+            raise HTTPError(400, "malformed request line")
+
+        headers = {}
+
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        return parts[0], parts[1], parts[2], headers
+
+    # Serve one connection
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                keep_alive = False
+
+                try:
+                    request = await self.read_head(reader)
+
+                    if request is None:
+                        break
+
+                    method, target, version, headers = request
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                    status, content_type, body = await self.dispatch(method, target)
+                except HTTPError as error:
+                    status, content_type, body = self.json({'error': str(error)}, error.status)
+                except Exception as error:  # report, keep serving
+                    status, content_type, body = self.json({'error': f"internal error: {error}"}, 500)
+
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    "\r\n".encode('latin-1') + body
+                )
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # Run until cancelled
+    async def serve(self, host=HOST, port=PORT):
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEAD)
+
+        print(f"Serving {len(self.database)} games on http://{host}:{port}")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Command line entry point
+def main():
+    parser = argparse.ArgumentParser(description="Serve the game database as HTTP/JSON.")
+    parser.add_argument('--host', default=HOST, help="address to listen on")
+    parser.add_argument('--port', type=int, default=PORT, help="port to listen on")
+    parser.add_argument('--csv', nargs='+', default=file_path, help="CSV files or glob patterns to serve")
+    parser.add_argument('--workers', type=int, help="threads running feature calls")
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT, help="seconds per request")
+    parser.add_argument('--max-concurrent', type=int, default=MAX_CONCURRENT,
+                        help="requests computed at the same time")
+    args = parser.parse_args()
+
+    if args.max_concurrent < 1:
+        parser.error("--max-concurrent must be at least 1")
+
+    print("Loading game data...")
+    database = loader.init(args.csv)
+    server = GameServer(database, args.workers, args.timeout, args.max_concurrent)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# snapshot.py — Binary snapshot cache for loaded game tables
+
+# Imports
+from array import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+from table import GameTable, LoadSource, STRING_COLUMNS, SALES_COLUMNS
+
+# File format
+MAGIC = b'GTSNAP1\n'
+HEADER_SIZE = struct.Struct('<I')
+SUFFIX = '.gtsnap'
+
+# Columns are padded to this boundary so each one can be mapped directly
+ALIGNMENT = 8
+
+
+# Snapshot path for a CSV file
+def snapshot_path(csv_path):
+    """Return the path of the snapshot stored next to `csv_path`."""
+    return csv_path + SUFFIX
+
+
+# Hash the CSV contents
+def file_hash(csv_path):
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+
+    with open(csv_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+# Describe the CSV the snapshot was built from
+def fingerprint(csv_path, with_hash=True):
+    """
+    Return size, mtime and (optionally) content hash of a CSV file.
+    """
+    stat = os.stat(csv_path)
+    info = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    if with_hash:
+        info['sha256'] = file_hash(csv_path)
+
+    return info
+
+
+# Decide whether a stored fingerprint still matches the CSV
+def is_fresh(stored, csv_path):
+    """
+    A snapshot is fresh when the CSV size matches and either the mtime
+    is unchanged or the content hash is identical.
+    """
+    current = fingerprint(csv_path, with_hash=False)
+
+    if stored.get('size') != current['size']:
+        return False
+
+    if stored.get('mtime_ns') == current['mtime_ns']:
+        return True
+
+    return stored.get('sha256') == file_hash(csv_path)
+
+
+# Pad a byte buffer to the column alignment
+def _pad(buffer):
+    buffer.extend(b'\0' * (-len(buffer) % ALIGNMENT))
+
+
+# Write a snapshot for a table
+def save(table, csv_path, csv_fingerprint=None):
+    """
+    Write `table` to a snapshot next to `csv_path`.
+    `csv_fingerprint` should be taken before the CSV was parsed, so an
+    edit made while parsing leaves the snapshot stale; it is taken now
+    when omitted.
+    Returns True on success; failures (e.g. read-only folders) are ignored.
+    """
+    strings = {}
+    string_codes = {}
+
+    for col in STRING_COLUMNS:
+        string_codes[col] = array('I', (
+            strings.setdefault(value, len(strings))
+            for value in table.column(col)
+        ))
+
+    encoded = [value.encode('utf-8') for value in strings]
+    string_offsets = array('I', [0])
+
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+
+    # Lay out every block and remember where it starts
+    body = bytearray()
+    blocks = {}
+
+    def add_block(name, data, typecode=None):
+        blocks[name] = {'offset': len(body), 'nbytes': len(data), 'typecode': typecode}
+        body.extend(data)
+        _pad(body)
+
+    add_block('string_offsets', string_offsets.tobytes(), 'I')
+    add_block('string_data', b''.join(encoded))
+
+    for col in STRING_COLUMNS:
+        add_block(col, string_codes[col].tobytes(), 'I')
+
+    for col in ['Year_of_Release'] + SALES_COLUMNS:
+        data = table.column(col)
+        add_block(col, data.tobytes(), data.typecode)
+
+    # Lines of the CSV that are not rows, so the table's source survives a reload
+    dropped = None if table.source is None else table.source.dropped.get(csv_path)
+
+    header = json.dumps({
+        'fingerprint': csv_fingerprint or fingerprint(csv_path),
+        'byteorder': sys.byteorder,
+        'rows': len(table),
+        'skipped_rows': table.skipped_rows,
+        'dropped_lines': dropped,
+        'blocks': blocks,
+    }).encode('utf-8')
+
+    prefix = bytearray(MAGIC + HEADER_SIZE.pack(len(header)) + header)
+    _pad(prefix)
+
+    path = snapshot_path(csv_path)
+    temp_path = path + '.tmp'
+
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(prefix)
+            file.write(body)
+        os.replace(temp_path, path)
+    except OSError:
+        return False
+
+    return True
+
+
+# Read a snapshot header
+def _read_header(view):
+    if view[:len(MAGIC)] != MAGIC:
+        return None, 0
+
+    start = len(MAGIC) + HEADER_SIZE.size
+    (length,) = HEADER_SIZE.unpack(view[len(MAGIC):start])
+    header = json.loads(bytes(view[start:start + length]))
+
+    data_start = start + length
+    data_start += -data_start % ALIGNMENT
+
+    return header, data_start
+
+
+# Check the parts of a header that are read before the columns
+def _valid_header(header):
+    return (
+        isinstance(header, dict)
+        and isinstance(header.get('fingerprint'), dict)
+        and isinstance(header.get('blocks'), dict)
+        and isinstance(header.get('dropped_lines'), (list, type(None)))
+    )
+
+
+# Load a snapshot if it is still valid
+def load(csv_path):
+    """
+    Return the GameTable stored in the snapshot for `csv_path`, or None
+    when there is no snapshot, it is damaged (empty or cut short), or
+    the CSV has changed since it was written.
+    """
+    path = snapshot_path(csv_path)
+
+    try:
+        file = open(path, 'rb')
+    except OSError:
+        return None
+
+    with file:
+        # Empty files cannot be mapped at all
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        with mapped:
+            view = memoryview(mapped)
+
+            try:
+                header, data_start = _read_header(view)
+
+                if not _valid_header(header) or header['byteorder'] != sys.byteorder:
+                    return None
+
+                if not is_fresh(header['fingerprint'], csv_path):
+                    return None
+
+                table = _decode(view, header, data_start)
+
+                if header.get('dropped_lines') is not None:
+                    table.source = LoadSource({csv_path: header['dropped_lines']})
+            except (ValueError, KeyError, TypeError, struct.error):
+                return None
+            finally:
+                view.release()
+
+    return table
+
+
+# Rebuild a table from the mapped snapshot
+def _decode(view, header, data_start):
+    blocks = header['blocks']
+
+    def block(name):
+        info = blocks[name]
+        start = data_start + info['offset']
+        data = view[start:start + info['nbytes']]
+
+        if info['typecode'] is None:
+            return bytes(data)
+
+        values = array(info['typecode'])
+        values.frombytes(data)
+        return values
+
+    offsets = block('string_offsets')
+    blob = block('string_data')
+    strings = [
+        sys.intern(blob[offsets[i]:offsets[i + 1]].decode('utf-8'))
+        for i in range(len(offsets) - 1)
+    ]
+
+    columns = {col: [strings[code] for code in block(col)] for col in STRING_COLUMNS}
+
+    for col in ['Year_of_Release'] + SALES_COLUMNS:
+        columns[col] = block(col)
+
+    table = GameTable.from_columns(columns)
+
+    if len(table) != header['rows']:
+        raise ValueError("snapshot row count mismatch")
+
+    table.skipped_rows = header.get('skipped_rows', 0)
+    return table
@@ -0,0 +1,450 @@
+# table.py — Columnar game storage
+
+# Imports
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import Mapping
+import itertools
+import sys
+import threading
+
+# Column names
+STRING_COLUMNS = ['Title', 'Platform', 'Genre', 'Publisher']
+SALES_COLUMNS = ['NA_Sales', 'EU_Sales', 'JP_Sales', 'Other_Sales', 'Global_Sales']
+COLUMNS = [
+    'Title', 'Platform', 'Year_of_Release', 'Genre', 'Publisher',
+] + SALES_COLUMNS
+
+# Categorical columns that are also stored as integer codes
+CATEGORY_COLUMNS = ['Platform', 'Genre', 'Publisher']
+
+# Stored in the year column when a game has no release year
+MISSING_YEAR = -1
+
+# Code returned for values that never occur in a column
+UNKNOWN = -1
+
+# Source of dataset version stamps, unique across all tables
+_versions = itertools.count(1)
+
+
+# Where the rows of a loaded table came from
+class LoadSource:
+    """
+    For every CSV file a table was loaded from, the numbers (counted
+    from 0, blank lines left out) of the data lines that did not become
+    rows: invalid lines and lines replaced by a later file. The other
+    lines are the table's rows, in file order. `stamp` is the stamp of
+    the files (see loader.file_stamp) taken before they were read, and
+    `version` the table version the description holds for.
+    """
+
+    def __init__(self, dropped, stamp=None, version=None):
+        self.dropped = dropped
+        self.stamp = stamp
+        self.version = version
+
+
+# Normalise a categorical value or title the same way everywhere
+def normalize(text):
+    """Return `text` stripped and lower-cased."""
+    return text.strip().lower()
+
+
+# Integer codes for a normalised string column
+class CodeColumn:
+    """
+    Stores one integer code per row for the normalised value of a
+    string column, so equality checks become integer comparisons.
+    Each distinct raw string is normalised once; later rows holding
+    the same string reuse its code.
+    With `bucketed` set it also keeps the sorted rows for every code.
+    `names` holds the first raw value seen for every code, for display.
+    """
+
+    def __init__(self, bucketed=False):
+        self.vocab = {}
+        self.names = []
+        self.codes = array('I')
+        self.buckets = {} if bucketed else None
+        self._raw = {}
+
+    # Code for a value, adding it to the vocabulary if new
+    def encode(self, value):
+        code = self._raw.get(value)
+
+        if code is None:
+            normalized = normalize(value)
+            code = self.vocab.get(normalized)
+
+            if code is None:
+                code = self.vocab[normalized] = len(self.vocab)
+                self.names.append(value)
+
+            self._raw[value] = code
+
+        return code
+
+    # Code for a value without changing the vocabulary
+    def lookup(self, value):
+        """Return the code of `value`, or UNKNOWN if it never occurs."""
+        code = self._raw.get(value)
+
+        if code is None:
+            code = self.vocab.get(normalize(value), UNKNOWN)
+
+        return code
+
+    # Rows holding a code
+    def rows(self, code):
+        """Return the sorted rows whose value has `code`."""
+        return self.buckets.get(code, ())
+
+    def append(self, value):
+        code = self.encode(value)
+        self.codes.append(code)
+
+        if self.buckets is not None:
+            self.buckets.setdefault(code, array('I')).append(len(self.codes) - 1)
+
+    def set(self, row, value):
+        old_code = self.codes[row]
+        code = self.codes[row] = self.encode(value)
+
+        if self.buckets is None or code == old_code:
+            return
+
+        bucket = self.buckets[old_code]
+        del bucket[bisect_left(bucket, row)]
+        insort(self.buckets.setdefault(code, array('I')), row)
+
+    # Drop the last row
+    def pop(self):
+        code = self.codes.pop()
+
+        if self.buckets is not None:
+            # The last row is the largest, so it ends its bucket
+            self.buckets[code].pop()
+
+
+# Read-only view of a single game
+class GameRow(Mapping):
+    """
+    Lightweight view of one row in a GameTable.
+    Reads values straight from the table columns, so it can be used
+    anywhere the old game dictionaries were used.
+    """
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def index(self):
+        """Row position in the owning table."""
+        return self._index
+
+    def __getitem__(self, key):
+        return self._table.value(self._index, key)
+
+    def __iter__(self):
+        return iter(COLUMNS)
+
+    def __len__(self):
+        return len(COLUMNS)
+
+    def __eq__(self, other):
+        if isinstance(other, GameRow) and other._table is self._table:
+            return other._index == self._index
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash((id(self._table), self._index))
+
+    def __repr__(self):
+        return f"GameRow({dict(self)!r})"
+
+
+# Derived indexes of a table, built when first asked for
+class TableIndexes(dict):
+    """
+    Maps index names to the indexes of one table. An index added with
+    register(name, build) is only built, by `build(table)`, the first
+    time it is looked up with [], get() or `in`, so a table is usable
+    before any index exists. Iterating and values() cover the indexes
+    built so far, which are the only ones row changes need to update:
+    an index built later starts from the rows as they are then.
+    """
+
+    def __init__(self, table):
+        super().__init__()
+        self._table = table
+        self._pending = {}
+
+        # Feature threads may ask for the same index at once
+        self._lock = threading.RLock()
+
+    # Add an index to build on first use
+    def register(self, name, build):
+        """Make `build(table)` the source of index `name`, replacing any built one."""
+        self.pop(name, None)
+        self._pending[name] = build
+
+    # Build every registered index now
+    def build_all(self):
+        """Build the indexes not built yet, e.g. in the background after loading."""
+        for name in list(self._pending):
+            self.get(name)
+
+    # Build a registered index that is looked up for the first time
+    def __missing__(self, name):
+        with self._lock:
+            if dict.__contains__(self, name):
+                return dict.__getitem__(self, name)
+
+            index = self._pending[name](self._table)
+
+            # Stored first, so `in` never misses it while it moves over
+            self[name] = index
+            del self._pending[name]
+            return index
+
+    # Check for an index without building it
+    def is_built(self, name):
+        """Return True if index `name` exists already, so looking it up never waits."""
+        return dict.__contains__(self, name)
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in self._pending
+
+    def __bool__(self):
+        return dict.__len__(self) > 0 or bool(self._pending)
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+
+# Column-oriented game table
+class GameTable:
+    """
+    Stores games column by column instead of one dictionary per row.
+    Sales are kept in array('d'), years in array('i') and repeated
+    strings are interned so equal values share one object.
+    Platform, Genre and Publisher are also dictionary-encoded: every row
+    holds an integer code into a per-column vocabulary of normalised
+    values, shared by all the features for filtering and grouping.
+    """
+
+    def __init__(self):
+        self._columns = {
+            'Title': [],
+            'Platform': [],
+            'Year_of_Release': array('i'),
+            'Genre': [],
+            'Publisher': [],
+        }
+
+        for col in SALES_COLUMNS:
+            self._columns[col] = array('d')
+
+        self._codes = {col: CodeColumn(bucketed=True) for col in CATEGORY_COLUMNS}
+
+        # Rows dropped by the loader because they could not be parsed
+        self.skipped_rows = 0
+
+        # Files and lines the rows were loaded from (a LoadSource), if known
+        self.source = None
+
+        # Changes whenever rows are added, modified or deleted, so results computed
+        # from an older version of the data can be recognised
+        self.version = next(_versions)
+
+        # Derived indexes built over this table, by name.
+        # Each one provides on_insert(table, row), on_update(table, row, old)
+        # and on_delete(table, row, old).
+        self.indexes = TableIndexes(self)
+
+    # Build a table from game dictionaries
+    @classmethod
+    def from_records(cls, records):
+        """
+        Create a table from an iterable of game dictionaries.
+        """
+        table = cls()
+
+        for record in records:
+            table.append(record)
+
+        return table
+
+    # Build a table from ready-made columns
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Create a table that takes ownership of existing column storage.
+        `columns` must hold every column name with equal lengths.
+        """
+        table = cls()
+        lengths = {len(columns[col]) for col in COLUMNS}
+
+        if len(lengths) > 1:
+            raise ValueError("columns have different lengths")
+
+        table._columns = {col: columns[col] for col in COLUMNS}
+
+        for col in CATEGORY_COLUMNS:
+            codes = table._codes[col]
+
+            for value in table._columns[col]:
+                codes.append(value)
+
+        return table
+
+    # Add one game to the end of the table
+    def append(self, game):
+        """
+        Append a game dictionary and return its row index.
+        """
+        columns = self._columns
+
+        for col in STRING_COLUMNS:
+            columns[col].append(sys.intern(game[col]))
+
+        for col in CATEGORY_COLUMNS:
+            self._codes[col].append(columns[col][-1])
+
+        year = game['Year_of_Release']
+        columns['Year_of_Release'].append(MISSING_YEAR if year is None else year)
+
+        for col in SALES_COLUMNS:
+            columns[col].append(game[col])
+
+        row = len(self) - 1
+        self.version = next(_versions)
+
+        for index in self.indexes.values():
+            index.on_insert(self, row)
+
+        return row
+
+    # Change values of an existing game
+    def update(self, row, changes):
+        """
+        Set the columns in `changes` for row `row` and let every
+        derived index adjust itself to the new values.
+        """
+        if not 0 <= row < len(self):
+            raise IndexError("GameTable index out of range")
+
+        old = self.record(row)
+
+        for col, value in changes.items():
+            if col in STRING_COLUMNS:
+                value = sys.intern(value)
+            elif col == 'Year_of_Release' and value is None:
+                value = MISSING_YEAR
+
+            self._columns[col][row] = value
+
+            if col in CATEGORY_COLUMNS:
+                self._codes[col].set(row, value)
+
+        self.version = next(_versions)
+
+        for index in self.indexes.values():
+            index.on_update(self, row, old)
+
+    # Remove a game
+    def delete(self, row):
+        """
+        Remove row `row`. The last row is first moved into its place (an
+        update of `row`), then the last row is dropped, so every other
+        row keeps its number and indexes only ever lose their last row.
+        Returns the old number of the moved row, or None if `row` was last.
+        """
+        if not 0 <= row < len(self):
+            raise IndexError("GameTable index out of range")
+
+        last = len(self) - 1
+        moved = None
+
+        if row != last:
+            self.update(row, self.record(last))
+            moved = last
+
+        old = self.record(last)
+
+        for col in COLUMNS:
+            self._columns[col].pop()
+
+        for col in CATEGORY_COLUMNS:
+            self._codes[col].pop()
+
+        self.version = next(_versions)
+
+        for index in self.indexes.values():
+            index.on_delete(self, last, old)
+
+        return moved
+
+    # Read a single cell
+    def value(self, index, key):
+        """
+        Return the value of column `key` for row `index`.
+        """
+        value = self._columns[key][index]
+
+        if key == 'Year_of_Release' and value == MISSING_YEAR:
+            return None
+
+        return value
+
+    # Direct access to a column
+    def column(self, key):
+        """
+        Return the underlying storage for a column.
+        Sales and year columns are arrays; string columns are lists.
+        """
+        return self._columns[key]
+
+    # Dictionary codes of a categorical column
+    def codes(self, key):
+        """
+        Return the CodeColumn of a categorical column: per-row codes,
+        the normalised vocabulary and the rows for every code.
+        """
+        return self._codes[key]
+
+    # Row view by index
+    def row(self, index):
+        """Return a GameRow view for row `index`."""
+        return GameRow(self, index)
+
+    # Copy a row out as a plain dictionary
+    def record(self, index):
+        """Return row `index` as a plain game dictionary."""
+        return {col: self.value(index, col) for col in COLUMNS}
+
+    def __len__(self):
+        return len(self._columns['Title'])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield GameRow(self, index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [GameRow(self, i) for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("GameTable index out of range")
+
+        return GameRow(self, index)
+
+    def __repr__(self):
+        return f"GameTable({len(self)} games)"
@@ -0,0 +1,80 @@
+# conftest.py — Shared helpers for the tests
+
+# Imports
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the project, next to this folder
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT)
+
+import loader  # noqa: E402
+
+# The full dataset, kept next to the project folder
+DATASET = os.path.join(os.path.dirname(PROJECT), 'games.csv')
+
+HEADER = 'rank,name,platform,year,genre,publisher,na_sales,eu_sales,jp_sales,other_sales,global_sales'
+
+# A few games in the dataset's CSV layout
+GAMES = [
+    '1,Wii Sports,Wii,2006.0,Sports,Nintendo,41.49,29.02,3.77,8.46,82.74',
+    '2,Super Mario Bros.,NES,1985.0,Platform,Nintendo,29.08,3.58,6.81,0.77,40.24',
+    '3,Mario Kart Wii,Wii,2008.0,Racing,Nintendo,15.85,12.88,3.79,3.31,35.82',
+    '4,Wii Sports Resort,Wii,2009.0,Sports,Nintendo,15.75,11.01,3.28,2.96,33.0',
+    '5,Pokemon Red/Pokemon Blue,GB,1996.0,Role-Playing,Nintendo,11.27,8.89,10.22,1.0,31.37',
+    '6,Tetris,GB,1989.0,Puzzle,Nintendo,23.2,2.26,4.22,0.58,30.26',
+    '7,Mario Kart DS,DS,2005.0,Racing,Nintendo,11.38,9.23,6.5,2.9,30.01',
+    '8,Halo 3,X360,2007.0,Shooter,Microsoft Game Studios,9.7,3.28,0.14,1.12,14.24',
+    '9,Tetris,NES,1988.0,Puzzle,Nintendo,2.97,0.69,1.81,0.11,5.58',
+    '10,Halo 3: ODST,X360,2009.0,Shooter,Microsoft Game Studios,4.34,1.35,0.06,0.61,6.36',
+]
+
+# Games whose quoted fields hold line breaks, commas and quotes
+QUOTED = [
+    '11,"Halo\n3: ""Recon""",X360,2009.0,Shooter,"Microsoft\r\nGame Studios",4.34,1.35,0.06,0.61,6.36',
+    '12,"Tetris, ""DX""\n\nEdition",GB,1998.0,Puzzle,Nintendo,1.0,0.5,0.2,0.1,1.8',
+]
+
+
+# Write CSV lines with a modification time that always moves forward
+class CsvFile:
+    def __init__(self, path):
+        self.path = str(path)
+        self._mtime = 1_000_000_000_000_000_000
+
+    def write(self, lines, header=HEADER):
+        with open(self.path, 'w', encoding='utf-8', newline='') as file:
+            file.write(header + '\n' + ''.join(line + '\n' for line in lines))
+
+        self._mtime += 1_000_000_000
+        os.utime(self.path, ns=(self._mtime, self._mtime))
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    return CsvFile(tmp_path / 'games.csv')
+
+
+# Path of the full dataset; tests needing it are skipped without it
+@pytest.fixture(scope='module')
+def dataset():
+    if not os.path.exists(DATASET):
+        pytest.skip(f"{DATASET} is not available")
+
+    return DATASET
+
+
+# The full dataset, loaded once per test module (tests must not change it)
+@pytest.fixture(scope='module')
+def games(dataset):
+    return loader.init(dataset, use_snapshot=False)
+
+
+# Every game of a table, in a stable order
+def games_of(table):
+    return sorted(
+        (tuple(sorted(table.record(row).items(), key=lambda item: item[0])) for row in range(len(table))),
+        key=repr
+    )
@@ -0,0 +1,134 @@
+# test_cube.py — Aggregation cube against a brute-force group-by
+
+# Imports
+import pytest
+
+import cube
+import loader
+from table import normalize
+
+# Groupings, filters and measures, in the names users type
+QUERIES = [
+    ([], {}, 'global'),
+    (['genre'], {}, 'eu'),
+    (['platform', 'year'], {}, 'count'),
+    (['publisher'], {'genre': 'Puzzle'}, 'jp'),
+    (['year'], {'platform': 'wii', 'genre': 'sports'}, 'na'),
+    (['genre', 'publisher'], {'year': '2008'}, 'other'),
+    (['platform'], {'year': 'Unknown'}, 'global'),
+    (['genre'], {'platform': 'NoSuchConsole'}, 'global'),
+]
+
+
+# Member of a game in one dimension, as the cube shows it
+def member(game, dim):
+    if dim == 'Year_of_Release':
+        return cube.UNKNOWN_YEAR if game[dim] is None else game[dim]
+
+    return game[dim]
+
+
+# Key a member by its value, ignoring the case of names
+def folded(value):
+    return normalize(value) if isinstance(value, str) else value
+
+
+# Member a filter value selects, folded like the members
+def wanted(dim, value):
+    if dim == 'Year_of_Release' and value != cube.UNKNOWN_YEAR:
+        return int(value)
+
+    return folded(value)
+
+
+# {members: (count, total)} by grouping every game
+def group_by(table, by, where, measure_name):
+    by = [cube.dimension(name) for name in by]
+    where = {cube.dimension(name): wanted(cube.dimension(name), value) for name, value in where.items()}
+    column = cube.measure(measure_name)
+    groups = {}
+
+    for row in range(len(table)):
+        game = table.record(row)
+
+        if any(folded(member(game, dim)) != value for dim, value in where.items()):
+            continue
+
+        key = tuple(folded(member(game, dim)) for dim in by)
+        count, total = groups.get(key, (0, 0.0))
+        groups[key] = (count + 1, total + (1 if column == 'Count' else game[column]))
+
+    return groups
+
+
+# The cube's answers match the group-by, with shares and order
+def check(table):
+    sales_cube = table.indexes['cube']
+
+    for by, where, measure_name in QUERIES:
+        results = sales_cube.query(by, where, measure_name)
+        expected = group_by(table, by, where, measure_name)
+        found = {tuple(folded(value) for value in members): (count, total)
+                 for members, count, total, share in results}
+
+        assert found.keys() == expected.keys()
+
+        for key, (count, total) in expected.items():
+            assert found[key][0] == count
+            assert found[key][1] == pytest.approx(total, abs=1e-6)
+
+        totals = [total for members, count, total, share in results]
+        assert totals == sorted(totals, reverse=True)
+
+        if results and sum(totals):
+            assert sum(share for *rest, share in results) == pytest.approx(1.0)
+
+
+@pytest.fixture
+def table(dataset):
+    return loader.init(dataset, use_snapshot=False)
+
+
+# Answers straight from the table
+def test_query_matches_group_by(table):
+    check(table)
+
+
+# Hooks keep the finest grouping and those rolled up from it in step
+def test_query_after_changes(table):
+    check(table)
+
+    table.append(dict(table.record(3), Platform='NewConsole', Year_of_Release=None))
+    table.append(table.record(0))
+    table.update(1, {'Genre': 'Puzzle', 'JP_Sales': 9.5, 'Global_Sales': 40.0})
+    table.update(2, {'Year_of_Release': 2008, 'Publisher': 'Hudson Soft'})
+    table.update(4, {'EU_Sales': 0.0})
+    table.delete(5)
+    table.delete(len(table) - 1)
+
+    check(table)
+
+    # Removing every game of a group drops it
+    platforms = table.codes('Platform')
+    code = platforms.lookup('NewConsole')
+
+    while platforms.rows(code):
+        table.delete(platforms.rows(code)[0])
+
+    assert ('newconsole',) not in {
+        tuple(folded(value) for value in members)
+        for members, *rest in table.indexes['cube'].query(['platform'])
+    }
+    check(table)
+
+
+# Names are checked
+def test_unknown_names_raise(table):
+    with pytest.raises(ValueError):
+        table.indexes['cube'].query(['colour'])
+
+    with pytest.raises(ValueError):
+        table.indexes['cube'].query(['genre'], measure_name='sales')
+
+    with pytest.raises(ValueError):
+        table.indexes['cube'].query(['genre'], where={'year': 'soon'})
@@ -0,0 +1,40 @@
+# test_feature1.py — Sales charts name the game they show
+
+# Imports
+import pytest
+
+import features.feature1 as feature1
+
+
+# Typed names resolve to the title as the dataset spells it
+@pytest.mark.parametrize('typed, title', [
+    ('Wii Sports', 'Wii Sports'),
+    ('  wii SPORTS ', 'Wii Sports'),
+    ('wii sport', 'Wii Sports'),
+    ('halo  3', 'Halo 3'),
+])
+def test_chart_data_names_the_resolved_title(games, typed, title):
+    found_title, plot_data = feature1.chart_data(games, typed)
+
+    assert found_title == title
+    assert plot_data == feature1.prepare_for_plot(
+        [games[row] for row in range(len(games)) if games.value(row, 'Title') == title]
+    )
+
+
+# Nothing to chart for a name that matches nothing
+def test_chart_data_not_found(games):
+    assert feature1.chart_data(games, 'zzzzqqq') is None
+
+
+# Rendered charts are titled, and cached, by the resolved title
+def test_rendered_chart_uses_resolved_title(games):
+    pytest.importorskip('matplotlib')
+    import charts
+
+    renderer = charts.ChartRenderer()
+    image = renderer.render_title(games, 'wii sport', fmt='svg')
+
+    assert b'Regional Sales Distribution for: Wii Sports' in image
+    assert renderer.render_title(games, 'Wii Sports', fmt='svg') == image
+    assert (renderer.hits, renderer.misses) == (1, 1)
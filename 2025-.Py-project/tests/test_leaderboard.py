@@ -0,0 +1,71 @@
+# test_leaderboard.py — Rankings against a sorted full scan
+
+# Imports
+import pytest
+
+import loader
+from table import SALES_COLUMNS
+
+# Filters covering a walk of the ranking, a rare bucket and unknown values
+FILTERS = [
+    None,
+    {'Platform': 'Wii'},
+    {'Platform': 'wii ', 'Genre': 'Sports'},
+    {'Publisher': 'Hudson Soft'},
+    {'Publisher': 'Nintendo', 'Platform': 'GB', 'Genre': ''},
+    {'Genre': 'Puzzle', 'Platform': 'NoSuchConsole'},
+]
+
+
+# The best `n` rows by a full sort, ties in table order
+def scan(table, column, n, filters=None):
+    filters = {key: value.strip().lower() for key, value in (filters or {}).items() if value.strip()}
+    rows = [
+        row for row in range(len(table))
+        if all(table.value(row, key).lower() == value for key, value in filters.items())
+    ]
+
+    return sorted(rows, key=lambda row: -table.value(row, column))[:n]
+
+
+# Every ranking and filtered top list matches the scan
+def check(table):
+    boards = table.indexes['leaderboards']
+
+    for column in SALES_COLUMNS:
+        assert list(boards.rank(column).ranked()) == scan(table, column, len(table))
+
+        for filters in FILTERS:
+            for n in (1, 10, 500):
+                assert boards.top(table, column, n, filters) == scan(table, column, n, filters)
+
+
+@pytest.fixture
+def table(dataset):
+    return loader.init(dataset, use_snapshot=False)
+
+
+# The rankings built at load time
+def test_top_matches_scan(table):
+    check(table)
+
+
+# Rankings kept up to date row by row give the same answers
+def test_top_after_changes(table):
+    wii = table.codes('Platform').rows(table.codes('Platform').lookup('wii'))
+
+    # Copies tie with their originals, so tie order is checked too
+    for row in (0, 5, wii[3], len(table) - 1):
+        table.append(table.record(row))
+
+    table.append(dict(table.record(wii[0]), Global_Sales=100.0, Publisher='Hudson Soft'))
+
+    table.update(wii[1], {'Global_Sales': 0.0, 'EU_Sales': 50.0})
+    table.update(wii[2], {'Platform': 'GB', 'Genre': 'Puzzle'})
+    table.update(10, {'Publisher': 'Hudson Soft', 'NA_Sales': 1.0})
+
+    table.delete(wii[4])
+    table.delete(0)
+    table.delete(len(table) - 1)
+
+    check(table)
@@ -0,0 +1,67 @@
+# test_live_search.py — Search as you type against a plain scan
+
+# Imports
+import pytest
+
+from conftest import GAMES
+import loader
+from live_search import IncrementalSearch
+import title_index
+
+
+# Rows whose title contains `query`, by scanning every title
+def scan(table, query):
+    query = title_index.normalize(query)
+    return [row for row in range(len(table)) if query in title_index.normalize(table.value(row, 'Title'))]
+
+
+@pytest.fixture
+def table(csv_file):
+    csv_file.write(GAMES)
+    return loader.init(csv_file.path)
+
+
+# Typing, backspacing and retyping give the rows a scan finds
+def test_rows_match_scan(table):
+    search = IncrementalSearch(table, cache_size=3)
+
+    for query in ['m', 'ma', 'mar', 'mario', 'mario k', 'mar', 'ma', 'h', 'ha', 'halo 3:', 'x', 'tetris']:
+        assert list(search.rows(query)) == scan(table, query)
+
+    table.update(2, {'Title': 'Halo Wars'})
+
+    for query in ['ha', 'halo', 'mario']:
+        assert list(search.rows(query)) == scan(table, query)
+
+
+# Only cached or narrowed queries are answered without a scan
+def test_quick_rows_never_scan(table):
+    search = IncrementalSearch(table)
+    table.indexes.get('title')
+
+    assert search.quick_rows('mario') is None
+    search.rows('mar')
+
+    assert list(search.quick_rows('Mario Kart')) == scan(table, 'mario kart')
+    assert list(search.quick_rows('mar')) == scan(table, 'mar')
+    assert search.quick_rows('halo') is None
+
+    # Changed rows make the cache stale, so a scan is needed again
+    table.update(0, {'Title': 'Mario Sports'})
+    assert search.quick_rows('mario') is None
+
+
+# The Tk thread neither builds the title index nor waits for another search
+def test_quick_rows_never_wait(table):
+    search = IncrementalSearch(table)
+    search.rows('mar')
+    table.indexes.register('title', title_index.TitleIndex.build)
+
+    assert search.quick_rows('mario') is None
+    assert not table.indexes.is_built('title')
+
+    table.indexes.get('title')
+    assert search.quick_rows('mario') is not None
+
+    with search._lock:
+        assert search.quick_rows('mario') is None
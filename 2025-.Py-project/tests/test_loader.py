@@ -0,0 +1,33 @@
+# test_loader.py — Parallel parsing against a sequential read
+
+# Imports
+from conftest import GAMES, QUOTED, games_of
+import loader
+
+# Every byte range ends on a record boundary, however small the ranges
+def test_split_ranges_keep_quoted_line_breaks(csv_file, monkeypatch):
+    csv_file.write(GAMES[:3] + QUOTED[:1] + GAMES[3:6] + QUOTED[1:] + GAMES[6:])
+    monkeypatch.setattr(loader, 'MIN_RANGE_BYTES', 1)
+    expected = loader.load_csv(csv_file.path)
+
+    fieldnames, ranges = loader.split_ranges(csv_file.path, 1000)
+    parts = [(0, loader.parse_range(csv_file.path, start, end, fieldnames)) for start, end in ranges]
+
+    assert len(ranges) == len(GAMES) + len(QUOTED)
+    assert games_of(loader.merge_parts(parts)) == games_of(expected)
+    assert 'Halo\n3: "Recon"' in expected.column('Title')
+
+
+# The process pool gives the same table as a sequential read
+def test_parallel_load_matches_sequential(csv_file, monkeypatch):
+    csv_file.write(QUOTED + GAMES + ['13,Broken,PS2,soon,Action,Nobody,x,0,0,0,0'])
+    monkeypatch.setattr(loader, 'MIN_RANGE_BYTES', 1)
+    monkeypatch.setattr(loader, 'PARALLEL_MIN_BYTES', 0)
+    expected = loader.load_csv(csv_file.path)
+
+    report = loader.LoadReport()
+    games = loader.load_files([csv_file.path], workers=2, report=report)
+
+    assert games_of(games) == games_of(expected)
+    assert (report.loaded, report.skipped) == (len(GAMES) + len(QUOTED), 1)
+    assert report.dropped == {csv_file.path: [len(QUOTED) + len(GAMES)]}
@@ -0,0 +1,68 @@
+# test_query.py — Composite queries against a plain scan
+
+# Imports
+import pytest
+
+import loader
+import query
+
+# Queries and the same condition on one game record
+CASES = [
+    ('name~"mario"', lambda g: 'mario' in g['Title'].lower()),
+    ('name="tetris"', lambda g: g['Title'].lower() == 'tetris'),
+    ('platform=Wii', lambda g: g['Platform'].lower() == 'wii'),
+    ('genre=puzzle AND platform=GB', lambda g: g['Genre'] == 'Puzzle' and g['Platform'] == 'GB'),
+    ('year 2000..2005', lambda g: g['Year_of_Release'] is not None and 2000 <= g['Year_of_Release'] <= 2005),
+    ('year<1990', lambda g: g['Year_of_Release'] is not None and g['Year_of_Release'] < 1990),
+    ('global>=5 AND eu<1', lambda g: g['Global_Sales'] >= 5 and g['EU_Sales'] < 1),
+    ('jp>0.5 AND na<=2', lambda g: g['JP_Sales'] > 0.5 and g['NA_Sales'] <= 2),
+    ('name~"the" AND genre=action AND year>=2008', lambda g: (
+        'the' in g['Title'].lower() and g['Genre'] == 'Action'
+        and g['Year_of_Release'] is not None and g['Year_of_Release'] >= 2008
+    )),
+    ('publisher=nintendo AND other=0.01', lambda g: g['Publisher'] == 'Nintendo' and g['Other_Sales'] == 0.01),
+    ('platform=NoSuchConsole', lambda g: False),
+]
+
+
+# Every query returns exactly the rows a scan finds, in table order
+@pytest.mark.parametrize('text, condition', CASES, ids=[text for text, _ in CASES])
+def test_select_matches_scan(games, text, condition):
+    expected = [row for row in range(len(games)) if condition(games.record(row))]
+
+    assert query.select(games, text) == expected
+
+
+# Results stay right as rows change
+def test_select_after_updates(dataset):
+    table = loader.init(dataset, use_snapshot=False)
+    text = 'platform=Wii AND global>=5 AND year 2006..2009'
+    rows = query.select(table, text)
+    table.update(rows[0], {'Global_Sales': 0.1})
+    table.update(rows[1], {'Year_of_Release': 2012})
+    table.delete(rows[2])
+
+    expected = [
+        row for row in range(len(table))
+        if table.value(row, 'Platform') == 'Wii' and table.value(row, 'Global_Sales') >= 5
+        and table.value(row, 'Year_of_Release') is not None and 2006 <= table.value(row, 'Year_of_Release') <= 2009
+    ]
+
+    assert query.select(table, text) == expected
+
+
+# Tables without registered indexes get temporary ones
+def test_select_on_plain_table(dataset):
+    chunk = next(loader.stream(dataset, chunk_size=2000))
+
+    assert query.select(chunk, 'platform=PS2 AND eu>=1') == [
+        row for row in range(len(chunk))
+        if chunk.value(row, 'Platform') == 'PS2' and chunk.value(row, 'EU_Sales') >= 1
+    ]
+
+
+# Malformed queries are reported
+@pytest.mark.parametrize('text', ['', 'platform>Wii', 'colour=red', 'year=soon', 'genre=action OR genre=puzzle'])
+def test_invalid_queries(text):
+    with pytest.raises(ValueError):
+        query.parse(text)
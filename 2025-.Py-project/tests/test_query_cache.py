@@ -0,0 +1,126 @@
+# test_query_cache.py — Shared LRU cache of query results
+
+# Imports
+import pytest
+
+from conftest import GAMES
+import features.feature2 as feature2
+import loader
+import query_cache
+
+
+# Compute functions that record what they were asked for
+class Computed:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, key):
+        def compute():
+            self.calls.append(key)
+            return key.upper()
+
+        return compute
+
+
+# A fresh shared cache, so counts start at zero
+@pytest.fixture
+def cache(monkeypatch):
+    cache = query_cache.QueryCache(max_size=3)
+    monkeypatch.setattr(query_cache, 'results', cache)
+    return cache
+
+
+@pytest.fixture
+def table(csv_file):
+    csv_file.write(GAMES)
+    return loader.init(csv_file.path)
+
+
+# Hits, misses and evictions are counted
+def test_counters(cache):
+    compute = Computed()
+
+    for key in ['a', 'b', 'a', 'c', 'd', 'a']:
+        assert cache.get(key, compute(key)) == key.upper()
+
+    assert compute.calls == ['a', 'b', 'c', 'd']
+    assert cache.stats() == {'hits': 2, 'misses': 4, 'evictions': 1, 'size': 3}
+
+    cache.clear()
+    assert cache.stats()['size'] == 0
+
+
+# The least recently used result is evicted first
+def test_lru_order(cache):
+    compute = Computed()
+
+    for key in ['a', 'b', 'c', 'a', 'd']:
+        cache.get(key, compute(key))
+
+    # 'b' was used longest ago, since 'a' was looked up again
+    for key in ['a', 'c', 'd']:
+        cache.get(key, compute(key))
+
+    assert compute.calls == ['a', 'b', 'c', 'd']
+
+    cache.get('b', compute('b'))
+    assert compute.calls[-1] == 'b'
+    assert cache.evictions == 2
+
+
+# Cached results are copies, and repeated searches hit
+def test_memoized_search(cache, table):
+    found = feature2.search_games(table, 'mario')
+    found.clear()
+
+    assert [g['Title'] for g in feature2.search_games(table, ' MARIO ')] == [
+        'Super Mario Bros.', 'Mario Kart Wii', 'Mario Kart DS'
+    ]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+# Results from before a change are never returned
+@pytest.mark.parametrize('change', [
+    lambda table: table.update(7, {'Title': 'Mario Halo'}),
+    lambda table: table.append(dict(table.record(7), Title='Mario Party', Global_Sales=50.0)),
+    lambda table: table.delete(1),
+])
+def test_changes_make_results_stale(cache, table, change):
+    before = [g['Title'] for g in feature2.search_games(table, 'mario')]
+    change(table)
+    after = [g['Title'] for g in feature2.search_games(table, 'mario')]
+
+    expected = [
+        table.value(row, 'Title') for row in
+        sorted((row for row in range(len(table)) if 'mario' in table.value(row, 'Title').lower()),
+               key=lambda row: -table.value(row, 'Global_Sales'))[:feature2.TOP_N]
+    ]
+
+    assert after == expected != before
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    # The new result is cached under the new version
+    feature2.search_games(table, 'mario')
+    assert cache.hits == 1
+
+
+# A cached search follows updates to sales and titles
+def test_search_after_update(cache, table):
+    assert feature2.search_games(table, 'halo 3')[0]['Title'] == 'Halo 3'
+
+    table.update(9, {'Global_Sales': 20.0})
+    assert feature2.search_games(table, 'halo 3')[0]['Title'] == 'Halo 3: ODST'
+
+    table.update(0, {'Title': 'Halo 3 Sports'})
+    assert feature2.search_games(table, 'halo 3')[0]['Title'] == 'Halo 3 Sports'
+
+
+# Streamed chunks are used once, so they are not cached
+def test_plain_tables_not_cached(cache, csv_file):
+    csv_file.write(GAMES)
+    chunk = next(loader.stream(csv_file.path))
+
+    feature2.search_games(chunk, 'mario')
+    feature2.search_games(chunk, 'mario')
+
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0}
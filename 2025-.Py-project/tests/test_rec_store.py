@@ -0,0 +1,113 @@
+# test_rec_store.py — Precomputed recommendation files
+
+# Imports
+import json
+
+import pytest
+
+from conftest import GAMES
+import loader
+import precompute_recs
+import rec_store
+import scoring
+import snapshot
+
+
+# Recommendations from the scorer, for every row of `table`
+def expected(table, top_n):
+    scorer = scoring.scorer_for(table)
+    return [scorer.recommend(table[row], top_n) for row in range(len(table))]
+
+
+# The batch job writes a file that the loader picks up and serves from
+def test_round_trip(csv_file):
+    csv_file.write(GAMES)
+    path = precompute_recs.run(csv_file.path, workers=1, top_n=3, shard_size=4)
+    assert path == rec_store.store_path(csv_file.path)
+
+    table = loader.init(csv_file.path)
+    recommendations = table.indexes['recommendations']
+    assert len(recommendations) == len(table)
+
+    for row, recs in enumerate(expected(table, 3)):
+        assert recommendations.lookup(row, 3) == recs
+        assert recommendations.lookup(row, 1) == recs[:1]
+
+    assert recommendations.lookup(0, 4) is None
+
+
+# Any change to the table stops the lookup from answering
+def test_table_changes_mark_it_stale(csv_file):
+    csv_file.write(GAMES)
+    precompute_recs.run(csv_file.path, workers=1, top_n=3)
+    table = loader.init(csv_file.path)
+    recommendations = table.indexes['recommendations']
+
+    table.update(0, {'Genre': 'Racing'})
+
+    assert recommendations.stale
+    assert recommendations.lookup(0, 3) is None
+
+
+# An edited CSV, or one with another row count, makes the file stale
+def test_stale_file_is_ignored(csv_file):
+    csv_file.write(GAMES)
+    precompute_recs.run(csv_file.path, workers=1, top_n=3)
+    assert rec_store.load(csv_file.path, len(GAMES)) is not None
+    assert rec_store.load(csv_file.path, len(GAMES) - 1) is None
+
+    csv_file.write(GAMES[::-1])
+
+    assert rec_store.load(csv_file.path, len(GAMES)) is None
+    assert 'recommendations' not in loader.init(csv_file.path).indexes
+
+
+# The fingerprint is the one taken before the CSV was read
+def test_edit_while_computing_is_noticed(csv_file, monkeypatch):
+    csv_file.write(GAMES)
+    fingerprint = snapshot.fingerprint(csv_file.path)
+    monkeypatch.setattr(precompute_recs, '_worker_games', loader.init(csv_file.path))
+    start, rows, scores = precompute_recs.compute_shard(0, len(GAMES), 3)
+
+    csv_file.write(GAMES[::-1])
+    rec_store.save(csv_file.path, 3, rows, scores, fingerprint=fingerprint)
+
+    assert rec_store.load(csv_file.path, len(GAMES)) is None
+
+
+# Replace the JSON header of a lookup file, keeping its arrays
+def with_header(change):
+    def damage(data):
+        start = len(rec_store.MAGIC) + rec_store.HEADER_SIZE.size
+        (length,) = rec_store.HEADER_SIZE.unpack(data[len(rec_store.MAGIC):start])
+        header = json.dumps(change(json.loads(data[start:start + length]))).encode('utf-8')
+        return rec_store.MAGIC + rec_store.HEADER_SIZE.pack(len(header)) + header + data[start + length:]
+
+    return damage
+
+
+# Ways a lookup file can be damaged: cut short, or with a header of the wrong shape
+DAMAGE = {
+    'empty': lambda data: b'',
+    'header cut': lambda data: data[:20],
+    'arrays cut': lambda data: data[:-1],
+    'list header': with_header(lambda header: [1]),
+    'string fingerprint': with_header(lambda header: dict(header, fingerprint='x')),
+    'string top_n': with_header(lambda header: dict(header, top_n='3')),
+    'zero top_n': with_header(lambda header: dict(header, top_n=0)),
+}
+
+
+# Damaged files are ignored
+@pytest.mark.parametrize('damage', DAMAGE.values(), ids=DAMAGE.keys())
+def test_damaged_file_is_ignored(csv_file, damage):
+    csv_file.write(GAMES)
+    path = precompute_recs.run(csv_file.path, workers=1, top_n=3)
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    with open(path, 'wb') as file:
+        file.write(damage(data))
+
+    assert rec_store.load(csv_file.path, len(GAMES)) is None
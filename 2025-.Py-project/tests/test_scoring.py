@@ -0,0 +1,60 @@
+# test_scoring.py — Recommendations against the original per-game loop
+
+# Imports
+import pytest
+
+import loader
+import scoring
+from table import normalize
+
+
+# Score every other game the way feature3 used to, best first
+def brute_force(table, chosen_game, limit):
+    scores = []
+
+    for row in range(len(table)):
+        game = table.record(row)
+
+        if normalize(game['Title']) == normalize(chosen_game['Title']):
+            continue
+
+        score = (
+            (scoring.GENRE_POINTS if normalize(game['Genre']) == normalize(chosen_game['Genre']) else 0)
+            + (scoring.PLATFORM_POINTS if normalize(game['Platform']) == normalize(chosen_game['Platform']) else 0)
+            + (scoring.SALES_POINTS if abs(game['Global_Sales'] - chosen_game['Global_Sales']) <= scoring.SALES_WINDOW else 0)
+        )
+
+        if score > 0:
+            scores.append((-score, row))
+
+    return [(row, -score) for score, row in sorted(scores)[:limit]]
+
+
+# Chosen games from the top, middle and tail of the dataset
+@pytest.mark.parametrize('row', [0, 1, 57, 4000, 16000])
+def test_recommend_matches_loop(games, row):
+    chosen_game = games.record(row)
+
+    assert scoring.scorer_for(games).recommend(chosen_game, 10) == brute_force(games, chosen_game, 10)
+
+
+# Edited rows are scored with their new values
+def test_recommend_after_updates(dataset):
+    table = loader.init(dataset, use_snapshot=False)
+    chosen_game = table.record(3)
+    table.update(10, {'Title': chosen_game['Title']})
+    table.update(20, {'Global_Sales': chosen_game['Global_Sales']})
+    table.delete(30)
+
+    assert scoring.scorer_for(table).recommend(chosen_game, 25) == brute_force(table, chosen_game, 25)
+
+
+# Tables without a title index or leaderboards get their own
+def test_recommend_on_plain_table(dataset):
+    chunk = next(loader.stream(dataset, chunk_size=2000))
+    chosen_game = chunk.record(5)
+    scorer = scoring.scorer_for(chunk)
+    chunk.indexes['scoring'] = scorer
+    chunk.update(6, {'Global_Sales': chosen_game['Global_Sales']})
+
+    assert scorer.recommend(chosen_game, 10) == brute_force(chunk, chosen_game, 10)
@@ -0,0 +1,131 @@
+# test_snapshot.py — Warm starts from the binary snapshot
+
+# Imports
+import json
+import os
+
+import pytest
+
+from conftest import GAMES, games_of
+import loader
+import snapshot
+
+
+# A table read back from the snapshot holds the same games
+def test_round_trip(csv_file):
+    csv_file.write(GAMES + ['11,Broken,PS2,soon,Action,Nobody,x,0,0,0,0'])
+    parsed = loader.init(csv_file.path)
+    assert os.path.exists(snapshot.snapshot_path(csv_file.path))
+
+    loaded = snapshot.load(csv_file.path)
+
+    assert games_of(loaded) == games_of(parsed)
+    assert loaded.skipped_rows == parsed.skipped_rows == 1
+    assert loaded.source.dropped == parsed.source.dropped
+
+    # Rewriting the header unchanged keeps it readable (see with_header)
+    path = snapshot.snapshot_path(csv_file.path)
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    with open(path, 'wb') as file:
+        file.write(with_header(lambda header: header)(data))
+
+    assert games_of(snapshot.load(csv_file.path)) == games_of(parsed)
+
+
+# An edited CSV makes the old snapshot stale
+def test_stale_snapshot_is_ignored(csv_file):
+    csv_file.write(GAMES)
+    loader.init(csv_file.path)
+    csv_file.write(GAMES[:3])
+
+    assert snapshot.load(csv_file.path) is None
+    assert len(loader.init(csv_file.path)) == 3
+
+
+# The snapshot is stamped with the CSV as it was before parsing
+def test_edit_while_parsing_is_noticed(csv_file, monkeypatch):
+    csv_file.write(GAMES)
+    load_files = loader.load_files
+
+    def edit_then_parse(*args):
+        games = load_files(*args)
+        csv_file.write(GAMES[::-1])
+        return games
+
+    monkeypatch.setattr(loader, 'load_files', edit_then_parse)
+    loader.init(csv_file.path)
+
+    assert snapshot.load(csv_file.path) is None
+
+
+# Indexes are built on first use, from the rows as they are then
+def test_indexes_built_on_first_use(csv_file):
+    csv_file.write(GAMES)
+    loader.init(csv_file.path)
+    table = loader.init(csv_file.path)
+    assert 'title' in table.indexes and list(table.indexes.values()) == []
+
+    table.update(0, {'Title': 'Wii Sports Club'})
+
+    assert list(table.indexes['title'].exact('wii sports club')) == [0]
+    assert set(table.indexes) == {'title'}
+
+    # Indexes built from others pull those in too
+    table.indexes.get('scoring')
+    assert set(table.indexes) == {'title', 'leaderboards', 'scoring'}
+
+    table.indexes.build_all()
+    assert set(table.indexes) == {'title', 'leaderboards', 'scoring', 'query', 'cube'}
+    assert table.indexes.get('missing') is None
+
+
+# Replace the JSON header of a snapshot, keeping its columns
+def with_header(change):
+    def damage(data):
+        start = len(snapshot.MAGIC) + snapshot.HEADER_SIZE.size
+        (length,) = snapshot.HEADER_SIZE.unpack(data[len(snapshot.MAGIC):start])
+        body = data[start + length + (-(start + length) % snapshot.ALIGNMENT):]
+        header = json.dumps(change(json.loads(data[start:start + length]))).encode('utf-8')
+        prefix = snapshot.MAGIC + snapshot.HEADER_SIZE.pack(len(header)) + header
+        return prefix + bytes(-len(prefix) % snapshot.ALIGNMENT) + body
+
+    return damage
+
+
+# Ways a snapshot can be damaged: cut short, or with a header of the wrong shape
+DAMAGE = {
+    'empty': lambda data: b'',
+    'magic only': lambda data: data[:4],
+    'header cut': lambda data: data[:20],
+    'half': lambda data: data[:len(data) // 2],
+    'last column cut': lambda data: data[:-8],
+    'list header': with_header(lambda header: [1]),
+    'string header': with_header(lambda header: 'x'),
+    'list fingerprint': with_header(lambda header: dict(header, fingerprint=[header['fingerprint']])),
+    'string blocks': with_header(lambda header: dict(header, blocks='x')),
+    'number block': with_header(lambda header: dict(header, blocks=dict(header['blocks'], Title=1))),
+    'dict dropped lines': with_header(lambda header: dict(header, dropped_lines={})),
+}
+
+
+# Damaged snapshots are ignored and the CSV is parsed again
+@pytest.mark.parametrize('damage', DAMAGE.values(), ids=DAMAGE.keys())
+def test_damaged_snapshot_falls_back_to_csv(csv_file, damage):
+    csv_file.write(GAMES)
+    parsed = loader.init(csv_file.path)
+    path = snapshot.snapshot_path(csv_file.path)
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    with open(path, 'wb') as file:
+        file.write(damage(data))
+
+    assert snapshot.load(csv_file.path) is None
+    assert games_of(loader.init(csv_file.path)) == games_of(parsed)
+
+    # The fallback wrote a good snapshot again
+    assert games_of(snapshot.load(csv_file.path)) == games_of(parsed)
@@ -0,0 +1,30 @@
+# test_startup.py — Console start-up stays light
+
+# Imports
+import subprocess
+import sys
+
+from conftest import PROJECT
+import benchmark
+
+# Modules only the window and the charts need
+GUI_MODULES = ('tkinter', '_tkinter', 'matplotlib', 'gui')
+
+
+# Importing main leaves the GUI and matplotlib unloaded
+def test_import_main_skips_gui_modules():
+    result = subprocess.run(
+        [sys.executable, '-c', 'import main, sys; print(*sys.modules)'],
+        cwd=PROJECT, check=True, capture_output=True, text=True
+    )
+    loaded = {name.split('.')[0] for name in result.stdout.split()}
+
+    assert 'main' in loaded
+    assert loaded.isdisjoint(GUI_MODULES)
+
+
+# A fresh start stays within the benchmark's start-up budget
+def test_startup_within_budget():
+    startup = benchmark.bench_startup(repeats=3)['p50_ms'] / 1000
+
+    assert startup <= benchmark.STARTUP_BUDGET
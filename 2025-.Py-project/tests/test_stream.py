@@ -0,0 +1,73 @@
+# test_stream.py — Streaming answers against the loaded table
+
+# Imports
+import pytest
+
+from conftest import GAMES
+import features.feature2 as feature2
+import features.feature3 as feature3
+import features.feature4 as feature4
+import loader
+import main
+
+# Small chunks, so results are merged across many of them
+CHUNK_SIZE = 1000
+
+
+# Games as plain dictionaries
+def plain(games):
+    return [dict(game) for game in games]
+
+
+# Chunks of the dataset
+def chunks(dataset):
+    return loader.stream(dataset, chunk_size=CHUNK_SIZE)
+
+
+# Search keeps the best-selling matches across chunks
+@pytest.mark.parametrize('keyword', ['mario', 'the', 'zelda', 'no such game'])
+def test_search_matches_table(games, dataset, keyword):
+    for limit in (1, 5, 50):
+        assert feature2.search_games_stream(chunks(dataset), keyword, limit) == plain(
+            feature2.search_games(games, keyword, limit)
+        )
+
+
+# Recommendations keep the best scores across chunks
+@pytest.mark.parametrize('title', ['Wii Sports', 'Halo 3', 'Tetris'])
+def test_recommend_matches_table(games, dataset, title):
+    chosen = feature3.find_game_stream(chunks(dataset), title)
+    expected = feature3.rec_game(games, chosen, 20)
+
+    assert feature3.rec_game_stream(chunks(dataset), chosen, 20) == [
+        (dict(game), score) for game, score in expected
+    ]
+
+
+# Leaderboards keep the leaders of every region across chunks
+@pytest.mark.parametrize('filters', [None, {'Genre': 'Racing'}, {'Platform': 'GB', 'Genre': ''}])
+def test_top_matches_table(games, dataset, filters):
+    streamed = feature4.top_five_games_by_region_stream(chunks(dataset), 10, filters)
+    loaded = feature4.top_five_games_by_region_gui(games, 10, filters)
+
+    assert streamed == {region: plain(found) for region, found in loaded.items()}
+
+
+# The one-shot command prints what the loaded table gives, and the skipped rows
+@pytest.mark.parametrize('request_args', [['--search', 'halo'], ['--recommend', 'Tetris'], ['--top']])
+def test_command_line(csv_file, capsys, request_args):
+    csv_file.write(GAMES + ['11,Broken,PS2,soon,Action,Nobody,x,0,0,0,0'])
+
+    main.run_once(main.parse_args(request_args + ['--csv', csv_file.path]))
+    loaded = capsys.readouterr().out.splitlines()
+    main.run_stream(main.parse_args(request_args + ['--stream', '--csv', csv_file.path]))
+    streamed = capsys.readouterr().out.splitlines()
+
+    assert streamed[1] == 'Read 10 games (1 invalid rows skipped).'
+    assert streamed[2:] == loaded[2:]
+
+
+# Only search, recommendations and leaderboards can be streamed
+def test_command_line_needs_a_streaming_request():
+    with pytest.raises(SystemExit):
+        main.parse_args(['--stream', '--rollup', 'genre'])
@@ -0,0 +1,103 @@
+# test_title_index.py — Title lookups, fuzzy matches and typed-title resolving
+
+# Imports
+import pytest
+
+from conftest import CsvFile, GAMES
+import loader
+from table import normalize
+import title_index
+from title_index import TitleIndex
+
+KEYWORDS = ['mario', 'tetris', 'wii sports', 'halo 3', 'pokemon', 'zz', 'kart']
+
+
+# Everything the index answers, for comparing two indexes
+def answers(index):
+    return (
+        list(index.titles),
+        {keyword: list(index.exact(keyword)) for keyword in KEYWORDS},
+        {keyword: list(index.search(keyword)) for keyword in KEYWORDS},
+        {keyword: index.prefixed(keyword[:2]) for keyword in KEYWORDS},
+    )
+
+
+# A small table with its indexes, loaded from GAMES
+@pytest.fixture
+def table(tmp_path):
+    csv_file = CsvFile(tmp_path / 'games.csv')
+    csv_file.write(GAMES)
+    return loader.init(csv_file.path, use_snapshot=False)
+
+
+# Lookups agree with plain scans of the titles
+def test_lookups_match_scan(table):
+    index = table.indexes['title']
+    titles = [normalize(title) for title in table.column('Title')]
+
+    for keyword in KEYWORDS:
+        assert list(index.exact(keyword)) == [row for row, title in enumerate(titles) if title == keyword]
+        assert index.search(keyword) == [row for row, title in enumerate(titles) if keyword in title]
+        assert index.prefixed(keyword) == sorted({title for title in titles if title.startswith(keyword)})
+
+
+# Titles joining and leaving groups of one or more rows
+def test_edits_match_rebuilt_index(table):
+    index = table.indexes['title']
+    tetris = list(index.exact('tetris'))
+
+    # One row leaves a two-row group, another joins a one-row group
+    table.update(tetris[0], {'Title': 'Halo 3'})
+    table.update(tetris[1], {'Title': 'Mario Kart Wii'})
+    assert answers(index) == answers(TitleIndex.build(table))
+
+    # A brand new title, then the last rows of groups removed
+    table.update(0, {'Title': 'Zzyzx Racer'})
+    table.append(dict(table.record(3), Title='Mario Kart Wii'))
+    table.delete(len(table) - 1)
+    table.delete(len(table) - 1)
+    assert answers(index) == answers(TitleIndex.build(table))
+
+    # Titles and prefixes that no row holds any more are gone
+    assert not index.exact('tetris') and index.prefixed('te') == []
+
+
+# Exact title, then prefixes and substrings by best sales, then typos
+@pytest.mark.parametrize('text, expected', [
+    ('Tetris', ['tetris']),
+    ('halo 3', ['halo 3', 'halo 3: odst']),
+    ('mario', ['mario kart wii', 'mario kart ds', 'super mario bros.']),
+    ('sports', ['wii sports', 'wii sports resort']),
+    ('wii sprots', ['wii sports', 'wii sports resort']),
+    ('  ', []),
+])
+def test_resolve_order(table, text, expected):
+    assert title_index.resolve(table, text) == expected
+
+
+# Fewer titles when asked, and the best row of the best title
+def test_resolve_limit_and_row(table):
+    assert title_index.resolve(table, 'mario', limit=2) == ['mario kart wii', 'mario kart ds']
+    assert title_index.resolve_row(table, 'TETRIS') == list(table.indexes['title'].exact('tetris'))[0]
+    assert title_index.resolve_row(table, 'no such game at all') is None
+
+
+# Tables and plain lists of games resolve alike
+@pytest.mark.parametrize('text', ['mario kart', 'wii sprots', 'the', 'grand theft auot', 'pokmon', 'zz'])
+def test_resolve_same_without_index(games, text):
+    records = [games.record(row) for row in range(len(games))]
+
+    assert title_index.resolve(records, text) == title_index.resolve(games, text)
+
+
+# With a limit the best titles are the same as without one
+@pytest.mark.parametrize('text', ['mario kart', 'wii sprots', 'super maro bros', 'the legend of zelda twilite', 'fifa socer 2013'])
+def test_similar_limit_keeps_best(games, text):
+    index = games.indexes['title']
+    everything = index.similar(text)
+    best = index.similar(text, 5)
+
+    fifth = everything[:5][-1][0]
+
+    assert [score for score, _ in best[:5]] == [score for score, _ in everything[:5]]
+    assert {title for score, title in everything if score > fifth} <= {title for _, title in best}
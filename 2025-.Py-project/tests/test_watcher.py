@@ -0,0 +1,144 @@
+# test_watcher.py — Incremental reload of edited CSV files
+
+# Imports
+from conftest import CsvFile, GAMES, QUOTED, games_of
+import loader
+import watcher
+
+
+# Run one check (files must look settled for two polls) and apply it
+def sync(dataset):
+    assert dataset.check() is None
+    changes = dataset.check()
+    assert changes is not None
+    assert dataset.apply(changes)
+    return changes
+
+
+# Load a file and prime a watcher on it
+def watch(csv_file, lines):
+    csv_file.write(lines)
+    table = loader.init(csv_file.path, use_snapshot=False)
+    dataset = watcher.DatasetSync(table, csv_file.path)
+    assert len(sync(dataset)) == 0
+    return table, dataset
+
+
+# Save new contents and check the table matches a fresh load
+def edit(csv_file, dataset, lines):
+    csv_file.write(lines)
+    changes = sync(dataset)
+    assert games_of(dataset.database) == games_of(loader.init(csv_file.path, use_snapshot=False))
+    return changes
+
+
+# Unchanged files are not read again
+def test_unchanged_files_give_no_changes(csv_file):
+    table, dataset = watch(csv_file, GAMES)
+
+    assert dataset.check() is None
+    assert dataset.check() is None
+
+
+# A changed value updates its one row
+def test_edit_updates_one_row(csv_file):
+    table, dataset = watch(csv_file, GAMES)
+    lines = list(GAMES)
+    lines[2] = lines[2].replace('35.82', '36.0')
+
+    changes = edit(csv_file, dataset, lines)
+
+    assert (len(changes.inserts), len(changes.deletes)) == (0, 0)
+    assert [update[-1] for update in changes.updates if update[-1]] == [{'Global_Sales': 36.0}]
+
+
+# Added and removed lines become row inserts and deletes
+def test_add_and_remove_lines(csv_file):
+    table, dataset = watch(csv_file, GAMES)
+    lines = GAMES[1:] + ['11,Halo 2,XB,2004.0,Shooter,Microsoft Game Studios,6.82,1.53,0.05,0.08,8.49']
+
+    changes = edit(csv_file, dataset, lines)
+
+    assert (len(changes.inserts), len(changes.deletes)) == (1, 1)
+    assert len(table) == len(GAMES)
+
+
+# Edits after repeated lines come and go
+def test_duplicate_lines_then_edit(csv_file):
+    first, second = GAMES[0], GAMES[1]
+    table, dataset = watch(csv_file, [first, second])
+
+    edit(csv_file, dataset, [first, first, second])
+    assert len(table) == 3
+
+    edit(csv_file, dataset, [first, second])
+    assert len(table) == 2
+
+    # Touch the group of the line that was repeated
+    edit(csv_file, dataset, [first, second, first.replace('2006.0', '2007.0')])
+    assert len(table) == 3
+
+
+# Quoted fields holding line breaks stay one game
+def test_multi_line_quoted_fields(csv_file):
+    table, dataset = watch(csv_file, GAMES[:3] + QUOTED + GAMES[3:])
+    assert len(table) == len(GAMES) + len(QUOTED)
+
+    # Unchanged files give no changes, also on a second look
+    csv_file.write(GAMES[:3] + QUOTED + GAMES[3:])
+    assert len(sync(dataset)) == 0
+
+    lines = GAMES[:3] + [QUOTED[0].replace('6.36', '7.0'), QUOTED[1]] + GAMES[3:]
+    changes = edit(csv_file, dataset, lines)
+    assert str(changes) == "0 added, 1 changed, 0 removed"
+
+
+# Invalid lines are counted, not loaded
+def test_invalid_lines_are_skipped(csv_file):
+    table, dataset = watch(csv_file, GAMES)
+
+    edit(csv_file, dataset, GAMES + ['11,Broken,PS2,soon,Action,Nobody,x,0,0,0,0'])
+
+    assert len(table) == len(GAMES)
+    assert table.skipped_rows == 1
+
+
+# Lines skipped at load time are known to the first check
+def test_invalid_line_from_load_can_be_fixed(csv_file):
+    broken = GAMES[5].replace('30.26', 'lots')
+    table, dataset = watch(csv_file, GAMES[:5] + [broken])
+    assert table.skipped_rows == 1
+
+    changes = edit(csv_file, dataset, GAMES[:6])
+
+    assert len(changes.inserts) == 1
+    assert table.skipped_rows == 0
+
+
+# A table read from the snapshot still knows its lines
+def test_watch_table_loaded_from_snapshot(csv_file):
+    csv_file.write(GAMES)
+    loader.init(csv_file.path)
+    table = loader.init(csv_file.path)
+    dataset = watcher.DatasetSync(table, csv_file.path)
+    assert len(sync(dataset)) == 0
+
+    edit(csv_file, dataset, GAMES[:-1])
+    assert len(table) == len(GAMES) - 1
+
+
+# With several files a (title, platform) pair comes from the last one
+def test_later_file_wins(tmp_path):
+    first, second = CsvFile(tmp_path / 'a.csv'), CsvFile(tmp_path / 'b.csv')
+    first.write(GAMES)
+    second.write([GAMES[2].replace('35.82', '40.0')])
+    pattern = str(tmp_path / '*.csv')
+    table = loader.init(pattern)
+    dataset = watcher.DatasetSync(table, pattern)
+    assert len(sync(dataset)) == 0
+    assert len(table) == len(GAMES)
+
+    # Dropping the override brings back the first file's line
+    second.write([])
+    assert len(sync(dataset)) == 1
+    assert games_of(table) == games_of(loader.init(pattern))
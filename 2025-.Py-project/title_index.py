@@ -0,0 +1,457 @@
+# title_index.py — Trigram index for substring and fuzzy title search
+
+# Imports
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+import heapq
+import math
+
+import profiling
+from table import GameTable, normalize
+
+# Length of the n-grams stored in the index
+GRAM_SIZE = 3
+
+# Candidate lists larger than this are intersected with the next posting list
+INTERSECT_THRESHOLD = 64
+
+# Titles returned by resolve() by default
+RESOLVE_LIMIT = 5
+
+# Part of the query's trigrams a title must share to count as similar
+MIN_SHARED = 0.5
+
+# Lowest similarity (see TitleIndex.similar) of a title that is kept
+MIN_SIMILARITY = 0.2
+
+# Rows with the most shared trigrams that are scored for similarity
+SIMILAR_CANDIDATES = 200
+
+# Posting rows similar() may count beyond the lists it must count
+SIMILAR_SCAN_ROWS = 3000
+
+
+# All distinct trigrams of a string
+def grams(text):
+    """Return the set of GRAM_SIZE-character substrings of `text`."""
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+# Inverted index over normalised titles
+class TitleIndex:
+    """
+    Maps every title trigram to the sorted row numbers containing it.
+    Substring queries intersect the posting lists of the query trigrams
+    and only verify the few remaining candidates.
+    Rows are also grouped by full normalised title for exact lookups,
+    and the distinct titles are kept sorted so the titles starting with
+    a prefix are found with a binary search.
+    Rows with the same title share one string, and a title held by a
+    single row (most of them) maps to the row number itself rather than
+    to an array of rows.
+    """
+
+    def __init__(self):
+        self._titles = []
+        self._postings = {}
+        self._groups = {}
+        self._sorted = None
+
+    # Build an index for a whole table
+    @classmethod
+    def build(cls, table):
+        """Index every title in `table`."""
+        index = cls()
+
+        for row, title in enumerate(table.column('Title')):
+            index.insert(row, title)
+
+        # Drop the spare room the arrays grew while appending
+        postings = index._postings
+
+        for gram, rows in postings.items():
+            postings[gram] = array('I', rows)
+
+        index._sorted = sorted(index._groups)
+        return index
+
+    # Index one more row
+    def insert(self, row, title):
+        """
+        Add `title` for row number `row`.
+        Rows must be inserted in increasing order.
+        """
+        title = self._join(normalize(title), row)
+        self._titles.append(title)
+
+        for gram in grams(title):
+            postings = self._postings.get(gram)
+
+            if postings is None:
+                postings = self._postings[gram] = array('I')
+
+            postings.append(row)
+
+    # Table hook: a row was appended
+    def on_insert(self, table, row):
+        self.insert(row, table.value(row, 'Title'))
+
+    # Table hook: a row was changed
+    def on_update(self, table, row, old):
+        title = normalize(table.value(row, 'Title'))
+        old_title = self._titles[row]
+
+        if title == old_title:
+            return
+
+        self._leave(old_title, row)
+        self._titles[row] = title = self._join(title, row)
+        old_grams = grams(old_title)
+        new_grams = grams(title)
+
+        for gram in old_grams - new_grams:
+            postings = self._postings[gram]
+            del postings[bisect_left(postings, row)]
+
+            if not postings:
+                del self._postings[gram]
+
+        for gram in new_grams - old_grams:
+            insort(self._postings.setdefault(gram, array('I')), row)
+
+    # Table hook: the last row was removed
+    def on_delete(self, table, row, old):
+        title = self._titles.pop()
+        self._leave(title, row)
+
+        # The last row is the largest, so it ends every list it is in
+        for gram in grams(title):
+            postings = self._postings[gram]
+            postings.pop()
+
+            if not postings:
+                del self._postings[gram]
+
+    # Add a row to the group of its title, returning the title's shared string
+    def _join(self, title, row):
+        rows = self._groups.get(title)
+
+        if rows is None:
+            self._groups[title] = row
+
+            if self._sorted is not None:
+                insort(self._sorted, title)
+
+            return title
+
+        if isinstance(rows, int):
+            title = self._titles[rows]
+            self._groups[title] = array('I', sorted((rows, row)))
+        else:
+            title = self._titles[rows[0]]
+            insort(rows, row)
+
+        return title
+
+    # Take a row out of the group of its title
+    def _leave(self, title, row):
+        rows = self._groups[title]
+
+        if isinstance(rows, int):
+            del self._groups[title]
+
+            if self._sorted is not None:
+                del self._sorted[bisect_left(self._sorted, title)]
+
+            return
+
+        del rows[bisect_left(rows, row)]
+
+        if len(rows) == 1:
+            self._groups[title] = rows[0]
+
+    # All normalised titles, by row
+    @property
+    def titles(self):
+        """Return the list of normalised titles (do not modify)."""
+        return self._titles
+
+    # Normalised title of a row
+    def title(self, row):
+        """Return the normalised title stored for `row`."""
+        return self._titles[row]
+
+    # Exact title lookup
+    def exact(self, title):
+        """Return the rows, in table order, whose normalised title equals `title`."""
+        rows = self._groups.get(normalize(title), ())
+        return (rows,) if isinstance(rows, int) else rows
+
+    # Distinct titles starting with a prefix
+    def prefixed(self, prefix):
+        """Return the distinct normalised titles starting with `prefix`, sorted."""
+        prefix = normalize(prefix)
+
+        if self._sorted is None:
+            self._sorted = sorted(self._groups)
+
+        start = bisect_left(self._sorted, prefix)
+
+        # Titles starting with the prefix sort before its last character bumped by one
+        if prefix:
+            end = bisect_left(self._sorted, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        else:
+            end = len(self._sorted)
+
+        return self._sorted[start:end]
+
+    # Titles close to a misspelt one
+    def similar(self, text, limit=None):
+        """
+        Return (similarity, title) pairs for distinct titles sharing at
+        least MIN_SHARED of the trigrams of `text`, most similar first.
+        Similarity is the Dice coefficient of the two trigram sets, and
+        titles below MIN_SIMILARITY are left out. With `limit`, only the
+        `limit` most similar titles (and those tying with the last) are
+        sure to be included.
+
+        A title holding `needed` of the query trigrams holds one of the
+        rarest len(query) - needed + 1, so only their posting lists have
+        to be counted. The next rarest are counted as well while that
+        stays within SIMILAR_SCAN_ROWS rows: fuller counts let checking
+        stop early. Up to SIMILAR_CANDIDATES rows are checked by
+        decreasing count, until no row left can share `needed` trigrams
+        or beat the `limit` best titles.
+        """
+        query = grams(normalize(text))
+
+        if not query:
+            return []
+
+        needed = max(1, math.ceil(len(query) * MIN_SHARED))
+        postings = sorted((self._postings.get(gram, ()) for gram in query), key=len)
+        required = len(query) - needed + 1
+        counts = Counter()
+        scanned = 0
+        counted = 0
+
+        for rows in postings:
+            if counted >= required and scanned + len(rows) > SIMILAR_SCAN_ROWS:
+                break
+
+            counts.update(rows)
+            scanned += len(rows)
+            counted += 1
+
+        profiling.scanned(scanned)
+
+        # Trigrams not counted can add at most this many to a count
+        uncounted = len(query) - counted
+        titles = self._titles
+        found = {}
+        checked = set()
+        best = []
+
+        for row, count in counts.most_common(SIMILAR_CANDIDATES):
+            # A title sharing `most` trigrams has at least as many itself
+            most = min(count + uncounted, len(query))
+
+            if most < needed:
+                break
+
+            if limit and len(best) >= limit and 2 * most / (len(query) + most) < best[0]:
+                break
+
+            title = titles[row]
+
+            if title in checked:
+                continue
+
+            checked.add(title)
+            title_grams = grams(title)
+            shared = len(query & title_grams) if uncounted else count
+            score = 2 * shared / (len(query) + len(title_grams))
+
+            if shared >= needed and score >= MIN_SIMILARITY:
+                found[title] = score
+
+                if limit:
+                    heapq.heappush(best, score)
+
+                    if len(best) > limit:
+                        heapq.heappop(best)
+
+        return sorted(((score, title) for title, score in found.items()), key=lambda pair: -pair[0])
+
+    # Upper bound on the number of matches
+    def estimate(self, keyword):
+        """
+        Return an upper bound on the rows `search(keyword)` can return,
+        taken from the shortest posting list, without verifying titles.
+        """
+        keyword = normalize(keyword)
+
+        if len(keyword) < GRAM_SIZE:
+            return len(self._titles)
+
+        return min(len(self._postings.get(gram, ())) for gram in grams(keyword))
+
+    # Substring search
+    def search(self, keyword):
+        """
+        Return the row numbers, in table order, whose normalised title
+        contains the normalised `keyword`.
+        """
+        keyword = normalize(keyword)
+        titles = self._titles
+
+        # Too short for trigrams: scan the pre-normalised titles
+        if len(keyword) < GRAM_SIZE:
+            profiling.scanned(len(titles))
+            return [row for row, title in enumerate(titles) if keyword in title]
+
+        postings = []
+
+        for gram in grams(keyword):
+            rows = self._postings.get(gram)
+
+            if rows is None:
+                return []
+
+            postings.append(rows)
+
+        postings.sort(key=len)
+        candidates = postings[0]
+
+        for rows in postings[1:]:
+            if len(candidates) <= INTERSECT_THRESHOLD:
+                break
+
+            candidates = sorted(set(candidates).intersection(rows))
+
+        profiling.scanned(len(candidates))
+        return [row for row in candidates if keyword in titles[row]]
+
+
+# Search any dataset by title
+def search(database, keyword):
+    """
+    Return the positions of games whose title contains `keyword`.
+    Uses the table's title index when it has one, otherwise scans.
+    """
+    if isinstance(database, GameTable):
+        index = database.indexes.get('title')
+
+        if index is not None:
+            return index.search(keyword)
+
+    keyword = normalize(keyword)
+
+    return [
+        row for row, g in enumerate(database)
+        if keyword in normalize(g['Title'])
+    ]
+
+
+# Exact title lookup on any dataset
+def exact(database, title):
+    """
+    Return the positions of games whose title equals `title`, ignoring
+    case and surrounding spaces. Uses the title index when available.
+    """
+    if isinstance(database, GameTable):
+        index = database.indexes.get('title')
+
+        if index is not None:
+            return list(index.exact(title))
+
+    title = normalize(title)
+
+    return [
+        row for row, g in enumerate(database)
+        if normalize(g['Title']) == title
+    ]
+
+
+# Title index and sales of any dataset
+def _resolver(database):
+    if isinstance(database, GameTable):
+        index = database.indexes.get('title') or TitleIndex.build(database)
+        leaderboards = database.indexes.get('leaderboards')
+        ranking = None if leaderboards is None else leaderboards.rank('Global_Sales').ranked()
+        return index, database.column('Global_Sales'), ranking
+
+    index = TitleIndex()
+
+    for row, g in enumerate(database):
+        index.insert(row, g['Title'])
+
+    return index, [g['Global_Sales'] for g in database], None
+
+
+# Best titles for what the user typed
+@profiling.timed('title_index.resolve')
+def resolve(database, text, limit=RESOLVE_LIMIT):
+    """
+    Return up to `limit` normalised titles matching `text`, best first:
+    the title itself, then titles starting with it, then titles
+    containing it (each by best global sales), then titles within a few
+    typos of it, most similar first. Only the title index is consulted,
+    never every title; datasets without one get a temporary index.
+    """
+    text = normalize(text)
+
+    if not text:
+        return []
+
+    index, sales, ranking = _resolver(database)
+    found = []
+
+    def best_sales(title):
+        return -max(sales[row] for row in index.exact(title))
+
+    def take(titles):
+        for title in titles:
+            if len(found) >= limit:
+                break
+
+            if title not in found:
+                found.append(title)
+
+    if index.exact(text):
+        take([text])
+
+    # Many prefix hits: walking the sales ranking finds the best ones sooner
+    prefixed = index.prefixed(text)
+
+    if ranking is not None and len(prefixed) ** 2 > limit * len(index.titles):
+        for row in ranking:
+            if len(found) >= limit:
+                break
+
+            if index.title(row).startswith(text):
+                take([index.title(row)])
+    else:
+        take(heapq.nsmallest(limit + len(found), prefixed, key=best_sales))
+
+    # Shorter queries have no trigrams; substring hits would need a scan
+    if len(found) < limit and len(text) >= GRAM_SIZE:
+        contained = dict.fromkeys(index.title(row) for row in index.search(text))
+        take(heapq.nsmallest(limit + len(found), contained, key=best_sales))
+
+    if len(found) < limit:
+        take(title for _, title in sorted(index.similar(text, limit), key=lambda pair: (-pair[0], best_sales(pair[1]))))
+
+    return found
+
+
+# Row of the best title for what the user typed
+def resolve_row(database, text):
+    """Return the first row of the best title for `text` (see resolve), or None."""
+    titles = resolve(database, text, 1)
+
+    if not titles:
+        return None
+
+    return exact(database, titles[0])[0]
@@ -0,0 +1,47 @@
+# topk.py — Bounded top-k selection
+
+# Imports
+import heapq
+
+# Number of results returned when no k is given
+DEFAULT_K = 5
+
+
+# Best k items by key
+def top_k(items, key, k=DEFAULT_K, largest=True):
+    """
+    Return the `k` best items by `key`, best first.
+    Uses a bounded heap, so it costs O(n log k) instead of a full sort.
+    Ties keep their input order, exactly like sorted(...)[:k].
+    """
+    if k <= 0:
+        return []
+
+    if largest:
+        return heapq.nlargest(k, items, key=key)
+
+    return heapq.nsmallest(k, items, key=key)
+
+
+# Best k rows of a table column
+def top_rows(table, column, k=DEFAULT_K, rows=None, largest=True):
+    """
+    Return the row numbers with the `k` highest values of `column`.
+    `rows` limits the selection to a subset of row numbers.
+    """
+    values = table.column(column)
+
+    if rows is None:
+        rows = range(len(table))
+
+    return top_k(rows, key=values.__getitem__, k=k, largest=largest)
+
+
+# Combine a running top k with new items
+def merge(best, items, key, k=DEFAULT_K):
+    """
+    Merge new `items` into an existing top-k list `best`.
+    Earlier items win ties, so merging chunks in order gives the
+    same result as selecting over all of them at once.
+    """
+    return top_k(list(best) + list(items), key=key, k=k)
@@ -0,0 +1,534 @@
+# watcher.py — Keeps a loaded table in step with its CSV files
+
+# Imports
+from array import array
+from collections import Counter
+import csv
+from itertools import compress
+
+from loader import file_stamp, parse_row, resolve_paths
+from table import normalize
+import profiling
+
+# How often the GUI looks at the files, in milliseconds
+POLL_MS = 1000
+
+# Lines that hold no data
+_BLANK = (b'', b'\r')
+
+# With more groups to compare than this, rows are grouped in one pass over the table
+GROUP_SCAN_THRESHOLD = 256
+
+# Stored for rows whose line is not known yet
+NO_FILE = -1
+
+
+# Group a game belongs to between two versions of the files
+def game_group(record):
+    """Return the normalised (title, platform) of a game record."""
+    return (normalize(record['Title']), normalize(record['Platform']))
+
+
+# Parse one raw CSV line
+def parse_line(line, fieldnames):
+    """Return the game record of a data line, or None if it is invalid."""
+    values = next(csv.reader([line.decode('utf-8')]), None)
+
+    if not values:
+        return None
+
+    try:
+        return parse_row(dict(zip(fieldnames, values)))
+    except (ValueError, KeyError):
+        return None
+
+
+# Header and data lines of a CSV file
+def read_lines(path):
+    """
+    Return the header line and the data lines of `path`, in file order.
+    A "line" is one CSV record: a quoted field holding line breaks
+    keeps them, like in loader.split_ranges.
+    """
+    with open(path, 'rb') as file:
+        header = file.readline().rstrip(b'\r\n')
+        data = file.read()
+
+    lines = data.split(b'\n')
+
+    if _quoted_line_break(data):
+        lines = _join_quoted(lines)
+
+    return header, [line for line in lines if line not in _BLANK]
+
+
+# Whether some quoted field holds a line break
+def _quoted_line_break(data):
+    start = data.find(b'"')
+
+    while start >= 0:
+        end = data.find(b'"', start + 1)
+
+        if end < 0 or data.find(b'\n', start, end) >= 0:
+            return True
+
+        # Doubled quotes inside a field close and reopen it, which is the same here
+        start = data.find(b'"', end + 1)
+
+    return False
+
+
+# Join the pieces of records whose quoted fields hold line breaks
+def _join_quoted(pieces):
+    records = []
+    start = 0
+    end = 0
+
+    # Only pieces holding quotes can open a field that spans lines
+    for number in [number for number, piece in enumerate(pieces) if b'"' in piece]:
+        if number < end:
+            continue
+
+        quotes = pieces[number].count(b'"')
+        end = number + 1
+
+        # An odd number of quotes so far means the line break was inside a field
+        while quotes % 2 and end < len(pieces):
+            quotes += pieces[end].count(b'"')
+            end += 1
+
+        if end > number + 1:
+            records.extend(pieces[start:number])
+            records.append(b'\n'.join(pieces[number:end]))
+            start = end
+
+    records.extend(pieces[start:])
+    return records
+
+
+# Differences between the table and the files
+class Changes:
+    """
+    Rows to add, change and remove, found by DatasetSync.check().
+    `inserts` holds (file, line hash, record), `updates` holds (row,
+    file, line hash, changed columns) and `deletes` holds rows. The
+    other fields describe the files after the change and are applied
+    to the watcher's own state.
+    """
+
+    def __init__(self, stamp, version):
+        self.stamp = stamp
+        self.version = version
+        self.inserts = []
+        self.updates = []
+        self.deletes = []
+        self.files = {}
+        self.shadowed = {}
+        self.invalid = []
+
+    # Number of rows that actually change
+    def __len__(self):
+        return len(self.inserts) + len(self.deletes) + sum(1 for update in self.updates if update[3])
+
+    def __str__(self):
+        changed = sum(1 for update in self.updates if update[3])
+        return f"{len(self.inserts)} added, {changed} changed, {len(self.deletes)} removed"
+
+
+# Incremental reload of a loaded table
+class DatasetSync:
+    """
+    Detects changes to the CSV files behind a loaded table and applies
+    them as row inserts, updates and deletes, which the table passes on
+    to every derived index, instead of loading everything again.
+
+    Lines are known by a 64-bit hash only: every file keeps the hashes
+    of its lines, and every row the file and hash of the line it came
+    from (filled in from the table's LoadSource, so nothing is parsed
+    again while the files are as they were loaded). The changed lines
+    are found as multiset differences of the hashes, and only those are
+    parsed. Games are grouped by normalised title and platform; only
+    the groups touched by a changed line are compared with the table,
+    and only games whose values differ are written to it. Apart from
+    reading and hashing the bytes, a reload costs in proportion to the
+    change. Files are taken once their size and modification time have
+    stayed the same for one check, so a file still being written is not
+    read half-way.
+
+    check() only reads the table and can run on a worker thread next to
+    queries. apply() changes it and must be called when no query is
+    running, so a query sees the data entirely before or entirely after
+    a reload. Every result of check() must be applied before the next
+    check.
+    """
+
+    def __init__(self, database, source):
+        self.database = database
+        self.source = source
+        self._stamp = None
+        self._pending = None
+        self._ids = {}
+        self._reset()
+
+    # Forget everything known about the files and the table
+    def _reset(self):
+        self._paths = []
+        self._files = {}
+        self._row_files = None
+        self._row_hashes = None
+        self._shadowed = {}
+        self._shadow_groups = {}
+        self._invalid = {}
+        self._skipped = 0
+
+    # Size and modification time of every file
+    def stamp(self):
+        """Return a comparable stamp of the files, or None if one is missing."""
+        try:
+            return file_stamp(resolve_paths(self.source))
+        except OSError:
+            return None
+
+    # Number for a file with a given header; a new header means new lines
+    def _file_id(self, path, header):
+        return self._ids.setdefault((path, header), len(self._ids))
+
+    # Group of a table row
+    def _group_of(self, row):
+        table = self.database
+        return (normalize(table.value(row, 'Title')), normalize(table.value(row, 'Platform')))
+
+    # Match the rows to the lines they were loaded from
+    def _prime(self, stamp, paths, current):
+        """
+        Fill in the line of every row from the table's LoadSource.
+        Returns False, leaving the rows unknown, when the source does
+        not describe the files and table as they are now.
+        """
+        table = self.database
+        source = table.source
+        self._row_files = array('i', [NO_FILE]) * len(table)
+        self._row_hashes = array('q', [0]) * len(table)
+
+        if source is None or source.stamp != stamp or source.version != table.version:
+            return False
+
+        dropped = {path: sorted(set(source.dropped.get(path, ()))) for path in paths}
+
+        if sum(len(current[path][1]) - len(dropped[path]) for path in paths) != len(table):
+            return False
+
+        if any(numbers and numbers[-1] >= len(current[path][1]) for path, numbers in dropped.items()):
+            return False
+
+        row = 0
+        shadowed = Counter()
+
+        for path in paths:
+            header, lines, hashes = current[path]
+            fid = self._file_id(path, header)
+            skip = set(dropped[path])
+            kept = hashes if not skip else [h for number, h in enumerate(hashes) if number not in skip]
+
+            self._row_hashes[row:row + len(kept)] = array('q', kept)
+            self._row_files[row:row + len(kept)] = array('i', [fid]) * len(kept)
+            row += len(kept)
+
+            # Only the lines that are not rows are parsed
+            fieldnames = next(csv.reader([header.decode('utf-8')]))
+
+            for number in dropped[path]:
+                record = parse_line(lines[number], fieldnames)
+
+                if record is None:
+                    self._invalid.setdefault(fid, Counter())[hashes[number]] += 1
+                    self._skipped += 1
+                else:
+                    shadowed[(game_group(record), fid, hashes[number])] += 1
+
+            self._files[path] = (fid, header, array('q', hashes))
+
+        for (group, fid, line), count in shadowed.items():
+            self._shadowed.setdefault(group, {})[(fid, line)] = count
+            self._shadow_groups[(fid, line)] = group
+
+        self._paths = list(paths)
+        return True
+
+    # Rows of some groups
+    def _group_rows(self, groups):
+        table = self.database
+        titles = table.indexes.get('title')
+        found = {group: [] for group in groups}
+
+        if titles is None or len(groups) > GROUP_SCAN_THRESHOLD:
+            keys = zip(map(normalize, table.column('Title')), map(normalize, table.column('Platform')))
+
+            for row, group in enumerate(keys):
+                if group in found:
+                    found[group].append(row)
+        else:
+            platforms = table.column('Platform')
+
+            for title, platform in groups:
+                found[(title, platform)] = [
+                    row for row in titles.exact(title) if normalize(platforms[row]) == platform
+                ]
+
+        return found
+
+    # Find what changed
+    @profiling.timed('watcher.check')
+    def check(self):
+        """
+        Return the Changes needed to bring the table up to date with
+        the files, or None when they have not changed (or are still
+        being written).
+        """
+        stamp = self.stamp()
+
+        if stamp is None or stamp == self._stamp:
+            return None
+
+        # Wait until the files have stopped changing
+        if stamp != self._pending:
+            self._pending = stamp
+            return None
+
+        table = self.database
+        changes = Changes(stamp, table.version)
+        paths = [path for path, _, _ in stamp]
+        current = {}
+
+        for path in paths:
+            header, lines = read_lines(path)
+            current[path] = (header, lines, list(map(hash, lines)))
+
+        # Without a usable LoadSource every group is compared once
+        everything = self._row_files is None and not self._prime(stamp, paths, current)
+
+        # Lines that appeared or disappeared (or changed count) in each file
+        counts = {}
+        added = []
+        removed = []
+
+        for path in paths:
+            header, lines, hashes = current[path]
+            fid = self._file_id(path, header)
+            new = counts[fid] = Counter(hashes)
+            changes.files[path] = (fid, header, array('q', hashes))
+            old_fid, _, old_hashes = self._files.get(path, (None, None, ()))
+
+            if old_fid == fid:
+                old = Counter(old_hashes)
+            else:
+                old = Counter()
+                removed.extend((old_fid, line) for line in set(old_hashes))
+
+            more = new - old
+            removed.extend((fid, line) for line in old - new)
+
+            if more:
+                raw = dict(zip(hashes, lines))
+                added.extend((fid, line, raw[line]) for line in more)
+
+        for path, (fid, _, hashes) in self._files.items():
+            if path not in current:
+                removed.extend((fid, line) for line in set(hashes))
+
+        # Groups whose lines changed
+        groups = set()
+        extra = {}
+        parsed = {}
+        headers = {fid: header for fid, header, _ in changes.files.values()}
+        fieldnames = {}
+
+        for fid, line, text in added:
+            if fid not in fieldnames:
+                fieldnames[fid] = next(csv.reader([headers[fid].decode('utf-8')]))
+
+            record = parse_line(text, fieldnames[fid])
+
+            if record is None:
+                changes.invalid.append((fid, line, counts[fid][line]))
+                continue
+
+            group = game_group(record)
+            parsed[(fid, line)] = record
+            extra.setdefault(group, []).append((fid, line))
+            groups.add(group)
+
+        row_lines = set()
+
+        for fid, line in removed:
+            if line in self._invalid.get(fid, ()):
+                changes.invalid.append((fid, line, counts.get(fid, Counter())[line]))
+            elif (fid, line) in self._shadow_groups:
+                groups.add(self._shadow_groups[(fid, line)])
+            else:
+                row_lines.add(line)
+
+        if row_lines:
+            rows = compress(range(len(table)), map(row_lines.__contains__, self._row_hashes))
+            groups.update(self._group_of(row) for row in rows)
+
+        if everything:
+            groups.update(zip(map(normalize, table.column('Title')), map(normalize, table.column('Platform'))))
+
+        # A new file order can change which file a shared group comes from
+        old_order = [path for path in self._paths if path in current]
+
+        if old_order != [path for path in paths if path in self._files]:
+            groups.update(self._shadowed)
+
+        sources = {fid: current[path] for path, (fid, _, _) in changes.files.items()}
+        raw_lines = {}
+
+        def record_of(fid, line):
+            if (fid, line) not in parsed:
+                if fid not in raw_lines:
+                    _, lines, hashes = sources[fid]
+                    raw_lines[fid] = dict(zip(hashes, lines))
+
+                if fid not in fieldnames:
+                    fieldnames[fid] = next(csv.reader([headers[fid].decode('utf-8')]))
+
+                parsed[(fid, line)] = parse_line(raw_lines[fid][line], fieldnames[fid])
+
+            return parsed[(fid, line)]
+
+        order = [changes.files[path][0] for path in paths]
+
+        for group, rows in self._group_rows(groups).items():
+            self._match(group, rows, extra.get(group, ()), order, counts, record_of, changes)
+
+        profiling.scanned(len(added) + len(removed))
+        return changes
+
+    # Pair the lines of one group with the rows holding it
+    def _match(self, group, rows, extra, order, counts, record_of, changes):
+        table = self.database
+        known = {}
+
+        for row in rows:
+            known.setdefault(self._row_files[row], set()).add(self._row_hashes[row])
+
+        for fid, line in list(self._shadowed.get(group, ())) + list(extra):
+            known.setdefault(fid, set()).add(line)
+
+        # With several files a (title, platform) pair comes from the last one
+        winner = None
+        wanted = Counter()
+        shadowed = {}
+
+        for fid in reversed(order):
+            lines = {line: counts[fid][line] for line in known.get(fid, ()) if counts[fid][line] > 0}
+
+            if not lines:
+                continue
+
+            if winner is None:
+                winner = fid
+                wanted.update(lines)
+            else:
+                shadowed.update(((fid, line), count) for line, count in lines.items())
+
+        changes.shadowed[group] = shadowed
+        unmatched = []
+        pending = []
+
+        # Rows whose line has not changed
+        for row in rows:
+            line = self._row_hashes[row]
+
+            if self._row_files[row] == winner and wanted[line] > 0:
+                wanted[line] -= 1
+            else:
+                unmatched.append(row)
+
+        # Rows that already hold a new line's values, as on the first check
+        for line in wanted.elements():
+            record = record_of(winner, line)
+
+            for position, row in enumerate(unmatched):
+                if table.record(row) == record:
+                    changes.updates.append((row, winner, line, {}))
+                    del unmatched[position]
+                    break
+            else:
+                pending.append((line, record))
+
+        # The other rows take the other lines; the rest are added or removed
+        for row, (line, record) in zip(unmatched, pending):
+            old = table.record(row)
+            changed = {col: value for col, value in record.items() if old[col] != value}
+            changes.updates.append((row, winner, line, changed))
+
+        changes.deletes.extend(unmatched[len(pending):])
+        changes.inserts.extend((winner, line, record) for line, record in pending[len(unmatched):])
+
+    # Bring the table up to date
+    @profiling.timed('watcher.apply')
+    def apply(self, changes):
+        """
+        Apply Changes from check() to the table and its indexes.
+        Returns False, applying nothing, when the table was modified
+        in some other way since the check; the next check starts over.
+        """
+        table = self.database
+
+        if changes.version != table.version:
+            self._reset()
+            return False
+
+        row_files = self._row_files
+        row_hashes = self._row_hashes
+
+        # Updates first, then deletes from the end: a delete moves the last row
+        for row, fid, line, changed in changes.updates:
+            if changed:
+                table.update(row, changed)
+
+            row_files[row] = fid
+            row_hashes[row] = line
+
+        for row in sorted(changes.deletes, reverse=True):
+            table.delete(row)
+            last_file = row_files.pop()
+            last_line = row_hashes.pop()
+
+            if row < len(row_files):
+                row_files[row] = last_file
+                row_hashes[row] = last_line
+
+        for fid, line, record in changes.inserts:
+            table.append(record)
+            row_files.append(fid)
+            row_hashes.append(line)
+
+        # Remember the lines that are not rows
+        for group, shadowed in changes.shadowed.items():
+            for key in self._shadowed.pop(group, ()):
+                self._shadow_groups.pop(key, None)
+
+            if shadowed:
+                self._shadowed[group] = shadowed
+                self._shadow_groups.update(dict.fromkeys(shadowed, group))
+
+        for fid, line, count in changes.invalid:
+            lines = self._invalid.setdefault(fid, Counter())
+            self._skipped += count - lines[line]
+
+            if count:
+                lines[line] = count
+            else:
+                lines.pop(line, None)
+
+            if not lines:
+                del self._invalid[fid]
+
+        self._paths = list(changes.files)
+        self._files = changes.files
+        self._stamp = changes.stamp
+        table.skipped_rows = self._skipped
+        return True
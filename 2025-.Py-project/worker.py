@@ -0,0 +1,111 @@
+# worker.py — Background task runner for the GUI
+
+# Imports
+from concurrent.futures import ThreadPoolExecutor
+import queue
+
+# How often finished tasks are collected on the Tk main thread
+POLL_MS = 30
+
+
+# Thread pool that reports back to Tk
+class TaskRunner:
+    """
+    Runs feature functions on a thread pool and hands their results to
+    callbacks on the Tk main thread, polled with after().
+
+    Every task belongs to a channel (e.g. "search"). Submitting on a
+    channel cancels the previous task if it has not started yet, and
+    drops its result if it has, so only the latest request is shown.
+    """
+
+    def __init__(self, root, workers=2):
+        self._root = root
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._finished = queue.Queue()
+        self._current = {}
+        self._undelivered = set()
+        self._closed = False
+
+        root.after(POLL_MS, self._poll)
+
+    # Start a task
+    def submit(self, channel, func, *args, on_done, on_error=None):
+        """
+        Run func(*args) in the background. `on_done(result)` or
+        `on_error(exception)` is called on the main thread unless a newer
+        task has been submitted on the same channel in the meantime.
+        """
+        previous = self._current.get(channel)
+
+        if previous is not None:
+            previous.cancel()
+
+        future = self._pool.submit(func, *args)
+        self._current[channel] = future
+        self._undelivered.add(future)
+
+        future.add_done_callback(
+            lambda done: self._finished.put((channel, done, on_done, on_error))
+        )
+
+        return future
+
+    # Stop waiting for a channel's task
+    def cancel(self, channel):
+        """
+        Cancel the latest task on `channel` if it has not started yet,
+        and drop its result if it has.
+        """
+        future = self._current.pop(channel, None)
+
+        if future is not None:
+            future.cancel()
+
+    # Check whether a channel has a task in flight
+    def is_busy(self, channel):
+        """Return True while the latest task on `channel` is unfinished."""
+        return channel in self._current
+
+    # Check whether any task is still running or waiting to be delivered
+    def is_idle(self):
+        """
+        Return True when no task is in flight on any channel, including
+        superseded ones still running, so shared data can be changed.
+        """
+        return not self._undelivered
+
+    # Deliver finished tasks on the main thread
+    def _poll(self):
+        if self._closed:
+            return
+
+        while True:
+            try:
+                channel, future, on_done, on_error = self._finished.get_nowait()
+            except queue.Empty:
+                break
+
+            self._undelivered.discard(future)
+
+            # Superseded or cancelled: nobody is waiting for this result
+            if self._current.get(channel) is not future or future.cancelled():
+                continue
+
+            del self._current[channel]
+            error = future.exception()
+
+            if error is None:
+                on_done(future.result())
+            elif on_error is not None:
+                on_error(error)
+            else:
+                self._root.report_callback_exception(type(error), error, error.__traceback__)
+
+        self._root.after(POLL_MS, self._poll)
+
+    # Stop accepting work
+    def shutdown(self):
+        """Cancel pending tasks and stop polling."""
+        self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)